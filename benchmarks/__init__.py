@@ -0,0 +1 @@
+'''Performance benchmarks for the ETS2 radio utility. Run with ``python -m benchmarks.run_benchmarks``.'''
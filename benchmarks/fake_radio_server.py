@@ -0,0 +1,226 @@
+'''A local stand-in for Icecast/Shoutcast servers, for benchmarks and manual testing.
+
+Paths (the trailing ``<id>.mp3`` is free-form):
+
+- ``/stream/<id>.mp3``   healthy stream with ICY headers, paced at ``?kbps=`` (default 128)
+- ``/slow/<id>.mp3``     waits ``?delay=`` seconds (default 2) before answering like ``/stream``
+- ``/dead/<id>.mp3``     drops the connection without a response
+- ``/error/<code>``      answers with that HTTP status and a short body
+- ``/redirect/<id>.mp3`` 302 redirect to ``/stream/<id>.mp3``
+- ``/file/<name>``       a real audio file from the ``--media`` directory, looped like a live stream
+- ``/html/<id>.mp3``     200 OK with an HTML page, as some dead stations answer
+- ``/pls/<path>``        a .pls playlist pointing at ``/<path>`` (``/m3u/<path>`` for .m3u)
+
+``/stream`` sends silent MPEG-like bytes that pass a normal check but don't
+decode; use ``/file`` with real MP3 or AAC samples to test deep verification.
+
+Send ``Icy-MetaData: 1`` to get ICY metadata blocks every ``icy-metaint`` bytes.
+'''
+
+import argparse
+import os
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BURST_BYTES = 64 * 1024
+ICY_METAINT = 16000
+# Streams end after this long so abandoned clients don't keep threads busy forever
+MAX_STREAM_SECONDS = 30
+
+MEDIA_TYPES = {
+    ".mp3": "audio/mpeg", ".aac": "audio/aac", ".m4a": "audio/mp4", ".ogg": "audio/ogg", ".opus": "audio/ogg",
+}
+# /file streams are paced at this rate unless ?kbps= is given; faster than real time for any sample
+DEFAULT_FILE_KBPS = 320
+
+
+class FakeRadioHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "Icecast 2.4.4"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        kind = parts.path.strip("/").split("/", 1)[0]
+
+        if kind == "dead":
+            self.close_connection = True
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return
+        if kind == "error":
+            try:
+                code = int(parts.path.rstrip("/").rsplit("/", 1)[-1])
+            except ValueError:
+                code = 500
+            self.send_body(code, b"error")
+            return
+        if kind == "redirect":
+            target = parts.path.replace("/redirect/", "/stream/", 1)
+            self.send_response(302)
+            self.send_header("Location", target)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if kind in ("pls", "m3u"):
+            target = f"http://{self.headers.get('Host', '127.0.0.1')}/{parts.path.split('/', 2)[2]}"
+            if kind == "pls":
+                playlist = f"[playlist]\nNumberOfEntries=1\nFile1={target}\nTitle1=Fake Radio\n"
+                self.send_body(200, playlist.encode(), "audio/x-scpls")
+            else:
+                self.send_body(200, f"#EXTM3U\n#EXTINF:-1,Fake Radio\n{target}\n".encode(), "audio/x-mpegurl")
+            return
+        if kind == "html":
+            self.send_body(200, b"<!DOCTYPE html><html><body>Station offline</body></html>", "text/html")
+            return
+        if kind == "file":
+            self.send_file(parts.path.split("/", 2)[2], int(query.get("kbps", [str(DEFAULT_FILE_KBPS)])[0]))
+            return
+        if kind == "slow":
+            time.sleep(float(query.get("delay", ["2"])[0]))
+        elif kind != "stream":
+            self.send_body(404, b"not found")
+            return
+        self.send_stream(int(query.get("kbps", ["128"])[0]), parts.path)
+
+    def send_body(self, code, body, content_type="text/plain"):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stream(self, kbps, path):
+        metadata = self.headers.get("Icy-MetaData") == "1"
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("icy-br", str(kbps))
+        self.send_header("icy-name", f"Fake Radio {path.rsplit('/', 1)[-1]}")
+        self.send_header("icy-genre", "Benchmark")
+        if metadata:
+            self.send_header("icy-metaint", str(ICY_METAINT))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        bytes_per_tick = max(1, kbps * 1000 // 8 // 10)
+        audio = FakeAudio(metadata)
+        started = time.monotonic()
+        try:
+            self.wfile.write(audio.read(BURST_BYTES))
+            while time.monotonic() - started < MAX_STREAM_SECONDS:
+                self.wfile.write(audio.read(bytes_per_tick))
+                self.wfile.flush()
+                time.sleep(0.1)
+        except OSError:
+            pass
+
+    def send_file(self, name, kbps):
+        media_dir = self.server.media_dir
+        path = os.path.join(media_dir or "", os.path.basename(name))
+        try:
+            if not media_dir:
+                raise OSError("no --media directory")
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.send_body(404, b"not found")
+            return
+        if not data:
+            self.send_body(404, b"empty file")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", MEDIA_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream"))
+        self.send_header("icy-br", str(kbps))
+        self.send_header("icy-name", f"Fake Radio {os.path.basename(path)}")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        bytes_per_tick = max(1, kbps * 1000 // 8 // 10)
+        position = 0
+        started = time.monotonic()
+        try:
+            while time.monotonic() - started < MAX_STREAM_SECONDS:
+                chunk = bytearray()
+                while len(chunk) < bytes_per_tick:
+                    piece = data[position:position + bytes_per_tick - len(chunk)]
+                    chunk += piece
+                    position = (position + len(piece)) % len(data)
+                self.wfile.write(chunk)
+                self.wfile.flush()
+                time.sleep(0.1)
+        except OSError:
+            pass
+
+
+class FakeAudio:
+    '''Silent MPEG-like bytes, with ICY metadata blocks inserted when requested.'''
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.until_metadata = ICY_METAINT
+        self.title_count = 0
+
+    def read(self, size):
+        if not self.metadata:
+            return b"\xff\xfb\x90\x00" * (size // 4) + b"\x00" * (size % 4)
+        out = bytearray()
+        while size > 0:
+            take = min(size, self.until_metadata)
+            out += b"\x00" * take
+            size -= take
+            self.until_metadata -= take
+            if self.until_metadata == 0:
+                self.title_count += 1
+                text = f"StreamTitle='Fake Artist - Song {self.title_count}';".encode()
+                blocks = (len(text) + 15) // 16
+                out += bytes([blocks]) + text.ljust(blocks * 16, b"\x00")
+                self.until_metadata = ICY_METAINT
+        return bytes(out)
+
+
+class FakeRadioServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Directory /file serves from, or None
+    media_dir = None
+
+
+def start_server(host="127.0.0.1", port=0, media_dir=None):
+    '''Start the server on a background thread and return it; its URL is ``server_url(server)``.'''
+    server = FakeRadioServer((host, port), FakeRadioHandler)
+    server.media_dir = media_dir
+    threading.Thread(target=server.serve_forever, name="fake-radio", daemon=True).start()
+    return server
+
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a fake Icecast/Shoutcast server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--media", help="directory of sample audio files served under /file/")
+    args = parser.parse_args(argv)
+    server = FakeRadioServer((args.host, args.port), FakeRadioHandler)
+    server.media_dir = args.media
+    print(f"Fake radio server on {server_url(server)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+'''Time the hot paths (load, filter, sort, tree refresh, Test All, save) and save the results as JSON.
+
+Run from the repository root::
+
+    python -m benchmarks.run_benchmarks --sizes 100 10000 100000 -o bench.json
+    python -m benchmarks.run_benchmarks -o new.json --compare bench.json
+
+The tree refresh benchmark needs a display (use ``xvfb-run`` on a headless
+machine) and is skipped otherwise. Everything runs against a temporary home
+directory so the real settings and check cache are never touched.
+'''
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+# Test All against the fake server is only run for lists up to this size
+DEFAULT_CHECK_LIMIT = 500
+FILTER_QUERIES = ("radio", "ma", "jazz lounge", "caf")
+TYPED_QUERY = "marilu"
+
+# A metric this many times slower than the baseline counts as a regression
+DEFAULT_TOLERANCE = 1.25
+
+
+def best_of(func, repeat):
+    '''Run ``func`` ``repeat`` times and return the fastest wall time in seconds.'''
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_core(size, workdir, repeat):
+    '''Benchmarks that need no GUI: load, index, filter, sort and save.'''
+    from search_index import SearchIndex
+    from sort_order import SortOrder
+    from stream_core import load_streams, write_sii
+    from stream_store import StreamStore
+
+    from benchmarks.synthetic_sii import write_synthetic_sii
+
+    path = os.path.join(workdir, f"synthetic_{size}.sii")
+    write_synthetic_sii(path, size)
+    results = {}
+
+    results["load"] = best_of(lambda: load_streams(path), repeat)
+
+    gc.collect()
+    tracemalloc.start()
+    streams, _ = load_streams(path)
+    results["memory_per_stream_bytes"] = tracemalloc.get_traced_memory()[0] / max(size, 1)
+    tracemalloc.stop()
+
+    # What the GUI keeps: the same streams in the compact store
+    gc.collect()
+    tracemalloc.start()
+    store = StreamStore()
+    store.extend(load_streams(path)[0])
+    results["store_memory_per_stream_bytes"] = tracemalloc.get_traced_memory()[0] / max(size, 1)
+    tracemalloc.stop()
+    del store
+
+    index = SearchIndex()
+    results["index_build"] = best_of(lambda: index.rebuild(streams), repeat)
+
+    def filter_cold():
+        # None of the queries extends the one before it, so each is answered from the trigram index
+        for query in FILTER_QUERIES:
+            index.search(index.normalize_query((query, "", "")))
+
+    results["filter"] = best_of(filter_cold, repeat) / len(FILTER_QUERIES)
+
+    def filter_typing():
+        for length in range(1, len(TYPED_QUERY) + 1):
+            index.search(index.normalize_query((TYPED_QUERY[:length], "", "")))
+
+    results["filter_as_you_type"] = best_of(filter_typing, repeat) / len(TYPED_QUERY)
+
+    def sort_cold(column):
+        order = SortOrder(lambda col, i: streams[i].get(col, ""), lambda: range(len(streams)))
+        order.toggle(column)
+        order.ordered()
+
+    results["sort_name"] = best_of(lambda: sort_cold("name"), repeat)
+    results["sort_bitrate"] = best_of(lambda: sort_cold("bitrate"), repeat)
+
+    out_path = os.path.join(workdir, f"saved_{size}.sii")
+    results["save"] = best_of(lambda: write_sii(out_path, streams), repeat)
+    return results, streams
+
+
+def bench_treeview(streams, repeat):
+    '''Time update_treeview on a real StreamManagerApp, or return None if Tk can't start.'''
+    try:
+        import tkinter as tk
+
+        root = tk.Tk()
+    except Exception:
+        return None
+
+    try:
+        import stream_manager_gui_with_editing_and_threading as gui
+    except Exception:
+        root.destroy()
+        return None
+
+    results = {}
+    try:
+        root.withdraw()
+        app = gui.StreamManagerApp(root)
+        app.streams.extend(streams)
+        app.search_index.rebuild(app.streams)
+        app.sort_order.invalidate()
+        results["tree_refresh"] = best_of(lambda: (app.clear_treeview(), app.update_treeview()), repeat)
+
+        def status_batch():
+            app.update_statuses({i: "Working" for i in range(0, len(streams), max(1, len(streams) // 500))})
+
+        results["tree_status_batch"] = best_of(status_batch, repeat)
+
+        def filter_and_clear():
+            app.name_filter.set("radio")
+            app.apply_filters()
+            app.name_filter.set("")
+            app.apply_filters()
+
+        results["tree_filter"] = best_of(filter_and_clear, repeat) / 2
+        app.sort_by_column("name")
+        results["tree_sorted_refresh"] = best_of(app.update_treeview, repeat)
+        root.update_idletasks()
+    finally:
+        root.destroy()
+    return results
+
+
+def bench_test_all(size, workers, per_host):
+    '''Run Test All against the fake radio server and return wall time and throughput.'''
+    from stream_core import check_streams
+
+    from benchmarks.fake_radio_server import server_url, start_server
+    from benchmarks.synthetic_sii import generate_streams
+
+    server = start_server()
+    try:
+        streams = generate_streams(size, server_url=server_url(server))
+        jobs = [(i, stream["url"]) for i, stream in enumerate(streams)]
+        started = time.perf_counter()
+        check_streams(jobs, lambda *_: None, max_workers=workers, per_host_limit=per_host)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+    return {"test_all": elapsed, "test_all_streams_per_second": size / elapsed if elapsed else None}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, tolerance):
+    '''Print a comparison table and return the number of regressions beyond ``tolerance``.'''
+    regressions = 0
+    for size, metrics in current["results"].items():
+        old_metrics = baseline.get("results", {}).get(size, {})
+        for name, value in sorted(metrics.items()):
+            old = old_metrics.get(name)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            # Throughput is better when higher; everything else is a cost
+            ratio = old / value if name.endswith("_per_second") else value / old
+            flag = ""
+            if ratio > tolerance:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{size:>8} {name:<28} {old:>12.6g} -> {value:<12.6g} x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="take the best of this many runs")
+    parser.add_argument("--check-limit", type=int, default=DEFAULT_CHECK_LIMIT, help="largest size to run Test All for")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--per-host", type=int, default=16, help="per-host limit (the fake server is a single host)")
+    parser.add_argument("--no-gui", action="store_true", help="skip the treeview benchmarks")
+    parser.add_argument("-o", "--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep the real settings and check cache out of the measurements
+        os.environ["HOME"] = workdir
+        os.environ["USERPROFILE"] = workdir
+
+        results = {}
+        for size in args.sizes:
+            print(f"Benchmarking {size} streams...", file=sys.stderr)
+            metrics, streams = bench_core(size, workdir, args.repeat)
+            if not args.no_gui:
+                tree_metrics = bench_treeview(streams, args.repeat)
+                if tree_metrics is None:
+                    metrics["tree_refresh"] = "skipped: no display or GUI dependencies"
+                else:
+                    metrics.update(tree_metrics)
+            if size <= args.check_limit:
+                metrics.update(bench_test_all(size, args.workers, args.per_host))
+            results[str(size)] = metrics
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
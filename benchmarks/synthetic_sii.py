@@ -0,0 +1,75 @@
+'''Generate synthetic live_streams.sii files in the same format as the bundled one.'''
+
+import argparse
+import random
+
+from stream_core import write_sii
+
+HOSTS = (
+    "icy.unitedradio.it",
+    "icestreaming.rai.it",
+    "ice02.fluidstream.net",
+    "streamingv2.shoutcast.com",
+    "listen.181fm.com",
+    "mp3.ffh.de",
+    "25683.live.streamtheworld.com",
+    "cdn.treraadio.ee",
+)
+NAME_WORDS = (
+    "Radio", "FM", "Marilù", "Rock", "Hits", "Dance", "Anni 90", "Virgin", "Subasio", "Freccia",
+    "Birikina", "Isoradio", "Música", "Café", "Nörd", "Jazz", "Lounge", "Classic", "Power", "Eurovision",
+)
+GENRES = ("Varia", "Rock", "Pop", "Dance", "Jazz", "Rock/Pop", "Varia + Traffico", "Eurovision", "Classica")
+LANGUAGES = ("ITA", "DE", "UK", "US", "NL", "Eesti", "FR", "ES")
+BITRATES = ("64", "96", "128", "128", "128", "192", "256", "320")
+
+# Share of fake-server URLs of each kind when generating files for check benchmarks
+SERVER_KINDS = (("stream", 70), ("slow", 10), ("dead", 10), ("redirect", 10))
+
+
+def generate_streams(count, seed=0, server_url=None):
+    '''Return ``count`` stream dicts.
+
+    With ``server_url`` (e.g. ``http://127.0.0.1:8000``) the URLs point at the
+    fake radio server, mixing healthy, slow, dead and redirecting streams.
+    '''
+    rng = random.Random(seed)
+    kinds = [kind for kind, weight in SERVER_KINDS for _ in range(weight)]
+    streams = []
+    for i in range(count):
+        if server_url:
+            url = f"{server_url.rstrip('/')}/{rng.choice(kinds)}/{i}.mp3"
+        else:
+            scheme = rng.choice(("http", "https"))
+            query = f"?FLID={rng.randint(1, 9)}" if rng.random() < 0.1 else ""
+            url = f"{scheme}://{rng.choice(HOSTS)}/station{i}.mp3{query}"
+        streams.append({
+            "url": url,
+            "name": f"{' '.join(rng.sample(NAME_WORDS, rng.randint(2, 4)))} {i}",
+            "genre": rng.choice(GENRES),
+            "language": rng.choice(LANGUAGES),
+            "bitrate": rng.choice(BITRATES),
+            "extra": "0",
+        })
+    return streams
+
+
+def write_synthetic_sii(path, count, seed=0, server_url=None):
+    '''Write a synthetic .sii file with ``count`` streams to ``path`` and return the streams.'''
+    streams = generate_streams(count, seed=seed, server_url=server_url)
+    write_sii(path, streams)
+    return streams
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic live_streams.sii file.")
+    parser.add_argument("path")
+    parser.add_argument("count", type=int, help="number of streams (e.g. 100 to 1000000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--server-url", help="point URLs at a running fake radio server")
+    args = parser.parse_args(argv)
+    write_synthetic_sii(args.path, args.count, seed=args.seed, server_url=args.server_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 set -euo pipefail
 
 # Build a standalone executable for the stream manager GUI.
+# requests and vlc are imported lazily at runtime, so they must be listed as hidden imports.
 python3 -m PyInstaller \
   --noconsole \
   --onefile \
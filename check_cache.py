@@ -0,0 +1,135 @@
+'''Persistent cache of stream check results, keyed by normalized URL.'''
+
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".ets2_radio_utility_checks.sqlite3")
+DEFAULT_TTL_HOURS = 24
+
+# Writes are committed in groups of this size (and on flush) instead of one transaction per check
+COMMIT_EVERY = 50
+
+# SQLite limits the number of parameters in one statement; stay well below it
+LOOKUP_CHUNK_SIZE = 500
+
+CacheEntry = namedtuple("CacheEntry", "url status checked_at latency http_status detail")
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    '''Return the cache key for ``url``: lowercase scheme and host, no default port or fragment.'''
+    text = url.strip()
+    try:
+        parts = urlsplit(text)
+        port = parts.port
+    except ValueError:
+        return text
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    return urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+class CheckCache:
+    '''SQLite-backed store of the last check result for each URL.
+
+    Safe to share between threads. If the database can't be opened the cache
+    falls back to memory so checking still works, just without persistence.
+    Results recorded after ``close`` (by checks that outlived it) are dropped.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending_writes = 0
+        self._closed = False
+        try:
+            self._conn = self._connect(path)
+        except sqlite3.Error:
+            self.path = ":memory:"
+            self._conn = self._connect(self.path)
+
+    @staticmethod
+    def _connect(path):
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS checks ("
+            " url TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " checked_at REAL NOT NULL,"
+            " latency REAL,"
+            " http_status INTEGER,"
+            " detail TEXT)"
+        )
+        conn.commit()
+        return conn
+
+    def get(self, url):
+        '''Return the CacheEntry for ``url`` or None.'''
+        return self.get_many([url]).get(normalize_url(url))
+
+    def get_many(self, urls):
+        '''Return a dict mapping normalized URL to CacheEntry for every cached URL in ``urls``.'''
+        keys = list({normalize_url(url) for url in urls})
+        found = {}
+        with self._lock:
+            if self._closed:
+                return found
+            for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+                chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT url, status, checked_at, latency, http_status, detail"
+                    f" FROM checks WHERE url IN ({placeholders})",
+                    chunk,
+                )
+                for row in rows:
+                    found[row[0]] = CacheEntry(*row)
+        return found
+
+    def record(self, url, status, latency=None, http_status=None, detail="", checked_at=None):
+        '''Store the result of checking ``url``.'''
+        entry = CacheEntry(
+            normalize_url(url), status, time.time() if checked_at is None else checked_at, latency, http_status, detail
+        )
+        with self._lock:
+            if self._closed:
+                return entry
+            self._conn.execute("INSERT OR REPLACE INTO checks VALUES (?, ?, ?, ?, ?, ?)", entry)
+            self._pending_writes += 1
+            if self._pending_writes >= COMMIT_EVERY:
+                self._commit()
+        return entry
+
+    def flush(self):
+        '''Commit any buffered writes.'''
+        with self._lock:
+            if not self._closed:
+                self._commit()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._commit()
+            self._conn.close()
+            self._closed = True
+
+    def _commit(self):
+        if self._pending_writes:
+            self._conn.commit()
+            self._pending_writes = 0
+
+
+def is_fresh(entry, ttl_hours, now=None):
+    '''Return True if ``entry`` was checked within the last ``ttl_hours``.'''
+    if entry is None:
+        return False
+    now = time.time() if now is None else now
+    return now - entry.checked_at < ttl_hours * 3600
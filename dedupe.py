@@ -0,0 +1,184 @@
+'''Find duplicate streams by URL and near-duplicate stations by name, in roughly linear time.'''
+
+import re
+from collections import namedtuple
+from difflib import SequenceMatcher
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from search_index import fold
+
+URL_DUPLICATE = "url"
+MIRROR_DUPLICATE = "mirror"
+NAME_DUPLICATE = "name"
+
+# Ad, campaign and listener tracking parameters (``FLID`` is Fluidstream's listener id);
+# anything else (``sid``, ``source``, ...) may select the stream
+TRACKING_QUERY_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "flid"}
+TRACKING_QUERY_PREFIXES = ("utm_", "aw_0_", "awparams")
+
+# Words too common in station names to tell two stations apart
+NAME_STOPWORDS = {"radio", "fm", "am", "web", "the", "la", "il", "de", "der", "die", "das", "le", "el", "di", "stream", "live"}
+
+NAME_SIMILARITY = 0.85
+# Blocks shared by more names than this are too unspecific to compare within
+MAX_BLOCK_SIZE = 40
+BLOCK_PREFIX = 3
+
+DuplicateGroup = namedtuple("DuplicateGroup", "kind key ids")
+
+_MIRROR_LABEL_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"\w+")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonical_url(url):
+    '''Return a key shared by URLs that reach the same stream.
+
+    Ignores the scheme, case of the host, default ports, trailing slashes,
+    fragments, the order of query parameters and tracking parameters.
+    '''
+    text = url.strip()
+    try:
+        parts = urlsplit(text)
+        port = parts.port
+    except ValueError:
+        return text.lower()
+    host = (parts.hostname or "").lower()
+    if port is not None and port != _DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    query = [
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_QUERY_PARAMS and not name.lower().startswith(TRACKING_QUERY_PREFIXES)
+    ]
+    path = parts.path.rstrip("/")
+    return f"{host}{path}?{urlencode(sorted(query))}" if query else f"{host}{path}"
+
+
+def mirror_key(url):
+    '''Return ``canonical_url`` with the number in the first host label replaced, or None if it has none.
+
+    ``ice02.example.net`` and ``ice07.example.net`` are often mirrors of one
+    stream, but ``radio1`` and ``radio2`` are usually different stations, so
+    these keys only suggest candidates for the user to confirm.
+    '''
+    key = canonical_url(url)
+    host, slash, rest = key.partition("/")
+    labels = host.split(".")
+    if len(labels) < 3 or host.split(":")[0].replace(".", "").isdigit() or not _MIRROR_LABEL_RE.search(labels[0]):
+        return None
+    labels[0] = _MIRROR_LABEL_RE.sub("#", labels[0])
+    return ".".join(labels) + slash + rest
+
+
+def name_signature(name):
+    '''Return folded, sorted significant words of a station name, e.g. "Radio Subasio!" -> "subasio".'''
+    words = _WORD_RE.findall(fold(name))
+    significant = [word for word in words if word not in NAME_STOPWORDS]
+    return " ".join(sorted(significant or words))
+
+
+def find_url_duplicates(streams):
+    '''Group ``(stream_id, stream)`` pairs whose URLs share a canonical_url.'''
+    groups = {}
+    for stream_id, stream in streams:
+        groups.setdefault(canonical_url(stream["url"]), []).append(stream_id)
+    return [DuplicateGroup(URL_DUPLICATE, key, ids) for key, ids in groups.items() if len(ids) > 1]
+
+
+def find_mirror_duplicates(streams):
+    '''Group ``(stream_id, stream)`` pairs whose URLs differ only by the number of a mirror host.'''
+    groups = {}
+    for stream_id, stream in streams:
+        key = mirror_key(stream["url"])
+        if key is not None:
+            groups.setdefault(key, []).append((stream_id, canonical_url(stream["url"])))
+    return [
+        DuplicateGroup(MIRROR_DUPLICATE, key, [stream_id for stream_id, _ in members])
+        for key, members in groups.items()
+        if len({url_key for _, url_key in members}) > 1
+    ]
+
+
+def find_name_duplicates(streams, threshold=NAME_SIMILARITY):
+    '''Group ``(stream_id, stream)`` pairs with identical or similar station names.
+
+    Names are reduced to signatures first, so only distinct signatures are
+    compared, and only within blocks of signatures sharing a word prefix.
+    Blocks larger than MAX_BLOCK_SIZE are skipped, which keeps the number of
+    comparisons close to linear in the number of names.
+    '''
+    by_signature = {}
+    for stream_id, stream in streams:
+        signature = name_signature(stream["name"])
+        if signature:
+            by_signature.setdefault(signature, []).append(stream_id)
+
+    blocks = {}
+    for signature in by_signature:
+        for word in set(signature.split()):
+            if len(word) >= BLOCK_PREFIX:
+                blocks.setdefault(word[:BLOCK_PREFIX], []).append(signature)
+
+    parent = {}
+
+    def find(signature):
+        root = signature
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while signature != root:
+            parent[signature], signature = root, parent[signature]
+        return root
+
+    compared = set()
+    matcher = SequenceMatcher(autojunk=False)
+    for members in blocks.values():
+        if len(members) < 2 or len(members) > MAX_BLOCK_SIZE:
+            continue
+        for i, first in enumerate(members):
+            matcher.set_seq2(first)
+            for second in members[i + 1:]:
+                pair = (first, second) if first < second else (second, first)
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                if find(first) == find(second):
+                    continue
+                matcher.set_seq1(second)
+                # The quick upper bounds rule out most pairs before the full comparison
+                if (
+                    matcher.real_quick_ratio() >= threshold
+                    and matcher.quick_ratio() >= threshold
+                    and matcher.ratio() >= threshold
+                ):
+                    parent[find(second)] = find(first)
+
+    groups = {}
+    for signature, ids in by_signature.items():
+        groups.setdefault(find(signature), []).extend(ids)
+    return [
+        DuplicateGroup(NAME_DUPLICATE, key, sorted(ids)) for key, ids in groups.items() if len(ids) > 1
+    ]
+
+
+def find_duplicates(streams, names=True, threshold=NAME_SIMILARITY, mirrors=True):
+    '''Return URL duplicate groups, then possible mirrors, then name groups that aren't just one of those again.
+
+    Only the URL groups are certain; mirror and name groups are candidates.
+    '''
+    streams = list(streams)
+    url_groups = find_url_duplicates(streams)
+    if mirrors:
+        # Every URL group lies within a mirror group when its host has a number
+        url_groups += find_mirror_duplicates(streams)
+    if not names:
+        return url_groups
+    same_url = {}
+    for number, group in enumerate(url_groups):
+        for stream_id in group.ids:
+            same_url[stream_id] = number
+    name_groups = [
+        group for group in find_name_duplicates(streams, threshold)
+        if len({same_url.get(stream_id, ("own", stream_id)) for stream_id in group.ids}) > 1
+    ]
+    return url_groups + name_groups
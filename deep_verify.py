@@ -0,0 +1,369 @@
+'''Deep verification: resolve playlists, then decode real audio in a pool of headless VLC processes.
+
+A normal check only proves that a server answers with some bytes. Deep
+verification follows .pls/.m3u playlists to the actual stream, rejects HTML
+pages, and has VLC decode a few seconds of audio, so codecs ETS2 can't play
+and streams that stall after connecting are caught too. VLC runs in separate
+worker processes: a stream that hangs or crashes libvlc costs one worker,
+never the GUI.
+'''
+
+import multiprocessing
+import struct
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urljoin, urlparse
+
+from playback_engine import DEFAULT_NETWORK_CACHING_MS
+
+VERIFY_TIMEOUT = (5, 5)
+
+# Seconds of audio each stream has to decode
+DEFAULT_DECODE_SECONDS = 3.0
+
+# Each worker is a VLC process of its own, so keep the pool small
+DEFAULT_DECODE_WORKERS = 4
+
+# A worker that hasn't answered this long after the audio should have been decoded is killed
+DECODE_GRACE_SECONDS = 10.0
+
+# Playlists are read up to this size and followed at most this many levels deep
+MAX_PLAYLIST_BYTES = 64 * 1024
+MAX_PLAYLIST_DEPTH = 3
+
+SNIFF_BYTES = 4096
+
+PLAYLIST_EXTENSIONS = (".pls", ".m3u")
+PLAYLIST_CONTENT_TYPES = ("audio/x-scpls", "audio/scpls", "audio/x-mpegurl", "audio/mpegurl", "application/pls+xml")
+
+# Names for the most common VLC audio codec fourccs
+CODEC_NAMES = {
+    "mpga": "MP3",
+    "mp3 ": "MP3",
+    "mp4a": "AAC",
+    "aac ": "AAC",
+    "vorb": "Vorbis",
+    "opus": "Opus",
+    "flac": "FLAC",
+    "wma2": "WMA",
+}
+
+# latency and http_status describe the final HTTP response, so a VerifyResult can be stored like a CheckResult
+VerifyResult = namedtuple(
+    "VerifyResult",
+    "is_working latency http_status detail resolved_url codec sample_rate channels decoded_seconds decoded_kbps",
+)
+
+# What a worker process reports for one stream; ``error`` is empty when audio was decoded
+DecodeOutcome = namedtuple("DecodeOutcome", "error codec sample_rate channels decoded_seconds decoded_kbps")
+
+
+def parse_playlist(text):
+    '''Return the stream URLs listed in a .pls or .m3u playlist, in order.'''
+    if text.lstrip().lower().startswith("[playlist]"):
+        entries = []
+        for line in text.splitlines():
+            key, _, value = line.partition("=")
+            key = key.strip().lower()
+            if key.startswith("file") and value.strip():
+                try:
+                    number = int(key[4:])
+                except ValueError:
+                    continue
+                entries.append((number, value.strip()))
+        return [url for _, url in sorted(entries)]
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+
+def is_playlist(url, content_type, head):
+    path = urlparse(url).path.lower()
+    return (
+        content_type in PLAYLIST_CONTENT_TYPES
+        or path.endswith(PLAYLIST_EXTENSIONS)
+        or head.lstrip().lower().startswith((b"[playlist]", b"#extm3u"))
+    )
+
+
+def is_html(content_type, head):
+    start = head.lstrip()[:15].lower()
+    return content_type == "text/html" or start.startswith((b"<!doctype html", b"<html"))
+
+
+def _failed(detail, started=None, http_status=None, resolved_url=""):
+    latency = None if started is None else time.monotonic() - started
+    return VerifyResult(False, latency, http_status, detail, resolved_url, "", None, None, 0.0, None)
+
+
+def resolve_stream(http, url, timeout=VERIFY_TIMEOUT):
+    '''Follow playlists from ``url`` to the audio stream through a PooledHttp.
+
+    Returns ``(url, http_status, latency, failure)``: the stream's URL and
+    its response, and a failed VerifyResult when there is nothing to play.
+    '''
+    import requests
+
+    for _ in range(MAX_PLAYLIST_DEPTH + 1):
+        started = time.monotonic()
+        try:
+            response = http.get(url, timeout=timeout)
+        except requests.exceptions.RequestException as exc:
+            return url, None, None, _failed(type(exc).__name__, started, resolved_url=url)
+        try:
+            if response.status_code != 200:
+                detail = f"HTTP {response.status_code}"
+                return url, response.status_code, None, _failed(detail, started, response.status_code, url)
+            # Report where redirects led
+            url = response.url or url
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            head = b""
+            chunks = response.iter_content(chunk_size=SNIFF_BYTES)
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= SNIFF_BYTES:
+                    break
+            latency = time.monotonic() - started
+            if not head:
+                return url, 200, latency, _failed("Empty response", started, 200, url)
+            if is_html(content_type, head):
+                return url, 200, latency, _failed("HTML page instead of audio", started, 200, url)
+            # VLC plays HLS playlists (#EXT-X- tags) itself
+            if not is_playlist(url, content_type, head) or b"#ext-x-" in head.lower():
+                return url, 200, latency, None
+
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= MAX_PLAYLIST_BYTES:
+                    break
+            text = head.decode("utf-8", errors="replace").lstrip("\ufeff")
+            entries = [urljoin(url, entry) for entry in parse_playlist(text)]
+            entries = [entry for entry in entries if urlparse(entry).scheme in ("http", "https")]
+            if not entries:
+                return url, 200, latency, _failed("Playlist lists no streams", started, 200, url)
+            url = entries[0]
+        except requests.exceptions.RequestException as exc:
+            return url, response.status_code, None, _failed(type(exc).__name__, started, response.status_code, url)
+        finally:
+            http.finish(response)
+    return url, 200, None, _failed("Playlists nested too deeply", None, 200, url)
+
+
+def codec_name(fourcc):
+    return CODEC_NAMES.get(fourcc.lower(), fourcc.strip().upper())
+
+
+def run_vlc_worker(conn, network_caching_ms):
+    '''Worker process: decode each ``(url, seconds)`` received on ``conn`` and send back a DecodeOutcome.'''
+    failure = None
+    try:
+        import vlc
+
+        instance = vlc.Instance("--no-video", "--quiet")
+    except Exception as exc:
+        failure = f"VLC is not available: {exc}"
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        url, seconds = job
+        if failure is not None:
+            outcome = DecodeOutcome(failure, "", None, None, 0.0, None)
+        else:
+            try:
+                outcome = decode_with_vlc(vlc, instance, url, seconds, network_caching_ms)
+            except Exception as exc:
+                outcome = DecodeOutcome(f"VLC error: {exc}", "", None, None, 0.0, None)
+        conn.send(outcome)
+
+
+def decode_with_vlc(vlc, instance, url, seconds, network_caching_ms):
+    '''Play ``url`` into memory callbacks until ``seconds`` of audio were decoded (or it fails).'''
+    decoded = {"frames": 0, "rate": None, "channels": None}
+
+    @vlc.CallbackDecorators.AudioSetupCb
+    def setup(opaque, audio_format, rate, channels):
+        # Accept the decoder's own format; only its rate and channel count are recorded
+        decoded["rate"] = rate[0]
+        decoded["channels"] = channels[0]
+        return 0
+
+    @vlc.CallbackDecorators.AudioCleanupCb
+    def cleanup(opaque):
+        pass
+
+    @vlc.CallbackDecorators.AudioPlayCb
+    def play(opaque, samples, count, pts):
+        decoded["frames"] += count
+
+    media = instance.media_new(url, f":network-caching={int(network_caching_ms)}")
+    player = instance.media_player_new()
+    try:
+        player.set_media(media)
+        player.audio_set_callbacks(play, None, None, None, None, None)
+        player.audio_set_format_callbacks(setup, cleanup)
+        player.play()
+        deadline = time.monotonic() + seconds + DECODE_GRACE_SECONDS / 2
+        error = ""
+        while True:
+            rate = decoded["rate"]
+            if rate and decoded["frames"] / rate >= seconds:
+                break
+            state = player.get_state()
+            if state == vlc.State.Error:
+                error = "VLC could not open or decode the stream"
+                break
+            if state == vlc.State.Ended:
+                error = "Stream ended"
+                break
+            if time.monotonic() > deadline:
+                error = "No audio decoded" if not decoded["frames"] else "Audio stalled"
+                break
+            time.sleep(0.05)
+
+        codec = ""
+        for track in media.tracks_get() or ():
+            if track.type == vlc.TrackType.audio:
+                codec = codec_name(struct.pack("<I", track.codec).decode("ascii", errors="replace"))
+                break
+        rate = decoded["rate"]
+        decoded_seconds = decoded["frames"] / rate if rate else 0.0
+        stats = vlc.MediaStats()
+        kbps = None
+        if media.get_stats(stats):
+            # Scaled as VLC's own media information dialog does to show kbit/s
+            if stats.demux_bitrate > 0:
+                kbps = round(stats.demux_bitrate * 8000)
+            elif decoded_seconds > 0:
+                kbps = round(stats.demux_read_bytes * 8 / 1000 / decoded_seconds)
+        return DecodeOutcome(error, codec, rate, decoded["channels"], decoded_seconds, kbps)
+    finally:
+        player.stop()
+        player.release()
+        media.release()
+
+
+class DecoderPool:
+    '''At most ``max_workers`` worker processes, each decoding one stream at a time.
+
+    ``decode(url)`` blocks the calling thread until a worker is free and has
+    decoded ``seconds`` of audio. A worker that doesn't answer within
+    ``seconds + DECODE_GRACE_SECONDS`` is killed and replaced by a fresh one
+    for the next stream. Workers are started on demand and kept until
+    ``close``. ``target(conn, network_caching_ms)`` is the worker's main
+    function.
+    '''
+
+    def __init__(self, max_workers=DEFAULT_DECODE_WORKERS, seconds=DEFAULT_DECODE_SECONDS,
+                 network_caching_ms=DEFAULT_NETWORK_CACHING_MS, target=run_vlc_worker):
+        self.seconds = seconds
+        self.network_caching_ms = network_caching_ms
+        self.target = target
+        # spawn, not fork: the parent has Tk and worker threads running
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(max(1, max_workers))
+        self._idle = []
+        self._all = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def decode(self, url):
+        '''Decode ``url`` in a worker process and return a DecodeOutcome.'''
+        with self._slots:
+            worker = self._take_worker()
+            if worker is None:
+                return DecodeOutcome("Verification was stopped", "", None, None, 0.0, None)
+            process, conn = worker
+            try:
+                conn.send((url, self.seconds))
+                if conn.poll(self.seconds + DECODE_GRACE_SECONDS):
+                    outcome = conn.recv()
+                    self._give_back(worker)
+                    return outcome
+                detail = "Decoder timed out"
+            except (EOFError, OSError):
+                detail = "Decoder crashed"
+            self._discard(worker)
+            return DecodeOutcome(detail, "", None, None, 0.0, None)
+
+    def close(self):
+        '''Stop every worker; decodes still running fail with "Decoder crashed".'''
+        with self._lock:
+            self._closed = True
+            workers = list(self._all)
+            self._all.clear()
+            self._idle = []
+        for process, conn in workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            process.join(0.5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+            conn.close()
+
+    def _take_worker(self):
+        with self._lock:
+            if self._closed:
+                return None
+            if self._idle:
+                return self._idle.pop()
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=self.target, args=(child_conn, self.network_caching_ms), name="vlc-decoder", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        worker = (process, parent_conn)
+        with self._lock:
+            self._all.add(worker)
+        return worker
+
+    def _give_back(self, worker):
+        with self._lock:
+            if worker in self._all:
+                self._idle.append(worker)
+
+    def _discard(self, worker):
+        process, conn = worker
+        with self._lock:
+            self._all.discard(worker)
+        if process.is_alive():
+            process.kill()
+        process.join()
+        conn.close()
+
+
+def verify_stream(http, pool, url, timeout=VERIFY_TIMEOUT):
+    '''Resolve ``url`` to its audio stream and decode a few seconds of it; returns a VerifyResult.'''
+    resolved, http_status, latency, failure = resolve_stream(http, url, timeout)
+    if failure is not None:
+        return failure
+    outcome = pool.decode(resolved)
+    working = not outcome.error and outcome.decoded_seconds >= pool.seconds
+    return VerifyResult(
+        working, latency, http_status, outcome.error, resolved, outcome.codec, outcome.sample_rate,
+        outcome.channels, outcome.decoded_seconds, outcome.decoded_kbps,
+    )
+
+
+def describe_verify(result):
+    '''Return a multi-line summary of a VerifyResult for display.'''
+    lines = []
+    if result.resolved_url:
+        lines.append(f"Stream: {result.resolved_url}")
+    if result.detail:
+        lines.append(f"Problem: {result.detail}")
+    if result.codec:
+        lines.append(f"Codec: {result.codec}")
+    if result.sample_rate:
+        channels = {1: "mono", 2: "stereo"}.get(result.channels, f"{result.channels} channels")
+        lines.append(f"Sample rate: {result.sample_rate} Hz, {channels}")
+    if result.decoded_kbps:
+        lines.append(f"Decoded bitrate: {result.decoded_kbps} kbps")
+    lines.append(f"Audio decoded: {result.decoded_seconds:.1f} s")
+    return "\n".join(lines)
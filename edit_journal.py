@@ -0,0 +1,197 @@
+'''Append-only journal of unsaved stream edits, replayed after a crash.'''
+
+import bisect
+import json
+import os
+import queue
+import threading
+
+from sii_parser import FIELDS
+from stream_core import fsync_directory
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".ets2_radio_utility_journal.jsonl")
+
+ADD = "add"
+EDIT = "edit"
+DELETE = "delete"
+
+
+def file_signature(path):
+    '''Return ``(size, mtime_ns)``, which changes whenever the file is rewritten.'''
+    info = os.stat(path)
+    return info.st_size, info.st_mtime_ns
+
+
+def stream_values(stream):
+    return [stream[field] for field in FIELDS]
+
+
+def values_stream(values):
+    return dict(zip(FIELDS, (str(value) for value in values)))
+
+
+def read_journal(path, file_path):
+    '''Return the operations journaled against the current version of ``file_path``.
+
+    Returns an empty list when there is no journal, it belongs to another
+    file, or the file has changed since the journal was started. A line cut
+    short by a crash ends the journal.
+    '''
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        signature = list(file_signature(file_path))
+    except OSError:
+        return []
+    operations = []
+    for number, line in enumerate(lines):
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        if number == 0:
+            if entry.get("file") != os.path.abspath(file_path) or entry.get("signature") != signature:
+                return []
+        else:
+            operations.append(entry)
+    return operations
+
+
+class EditJournal:
+    '''Records adds, edits and deletes made since a file was loaded or saved.
+
+    Streams are referred to by their position in that file, and streams added
+    later continue the numbering, so reloading the file and replaying the
+    operations in order gives every stream the same relative id again.
+    Operations are written and fsynced on a background thread, several at a
+    time when they arrive together. Journaling is best effort: if the journal
+    can't be written, editing carries on without it.
+    '''
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self.active = False
+        self.base_ids = []
+        self.base_next = 0
+        self.failed = False
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self, file_path, stream_ids, next_id, resume=False):
+        '''Base the journal on ``file_path``, whose streams have ``stream_ids`` in file order.
+
+        ``next_id`` is the id the next added stream will get. With ``resume``
+        the existing journal for the file is kept and appended to.
+        '''
+        self.base_ids = list(stream_ids)
+        self.base_next = next_id
+        self.active = True
+        if resume:
+            self._put("resume", None)
+            return
+        try:
+            signature = list(file_signature(file_path))
+        except OSError:
+            self.active = False
+            self._put("discard", None)
+            return
+        self._put("start", {"file": os.path.abspath(file_path), "signature": signature, "streams": len(self.base_ids)})
+
+    def stop(self):
+        '''Stop journaling and delete the journal.'''
+        self.active = False
+        self._put("discard", None)
+
+    def ref(self, stream_id):
+        '''Return the position-based id that ``stream_id`` is journaled under.'''
+        if stream_id >= self.base_next:
+            return len(self.base_ids) + stream_id - self.base_next
+        return bisect.bisect_left(self.base_ids, stream_id)
+
+    def record_add(self, stream_ids, streams):
+        '''Record streams added with consecutive ids starting at ``stream_ids[0]``.'''
+        if self.active and stream_ids:
+            self._put("record", {"op": ADD, "id": self.ref(stream_ids[0]), "streams": [stream_values(s) for s in streams]})
+
+    def record_edit(self, stream_id, stream):
+        if self.active:
+            self._put("record", {"op": EDIT, "id": self.ref(stream_id), "stream": stream_values(stream)})
+
+    def record_delete(self, stream_ids):
+        if self.active and stream_ids:
+            self._put("record", {"op": DELETE, "ids": [self.ref(stream_id) for stream_id in stream_ids]})
+
+    def flush(self):
+        '''Wait until everything recorded so far is on disk.'''
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        '''Write what is pending and stop the writer thread; the journal file is kept.'''
+        if self._thread is not None:
+            self._put("close", None)
+            self._thread.join()
+            self._thread = None
+
+    def _put(self, kind, payload):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, daemon=True)
+            self._thread.start()
+        self._queue.put((kind, payload))
+
+    def _write_loop(self):
+        f = None
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            closing = False
+            try:
+                for kind, payload in items:
+                    if kind == "record":
+                        if f is not None:
+                            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+                    elif kind == "close":
+                        closing = True
+                    else:
+                        if f is not None:
+                            f.close()
+                            f = None
+                        if kind == "start":
+                            f = self._create(payload)
+                        elif kind == "resume":
+                            f = open(self.path, "a", encoding="utf-8")
+                        elif os.path.exists(self.path):
+                            os.remove(self.path)
+                if f is not None:
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.failed = False
+            except OSError:
+                self.failed = True
+                if f is not None:
+                    f.close()
+                    f = None
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+            if closing:
+                if f is not None:
+                    f.close()
+                return
+
+    def _create(self, header):
+        # Replace any old journal in one step so a crash can't leave a header for the wrong file
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        return open(self.path, "a", encoding="utf-8")
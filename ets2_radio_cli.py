@@ -0,0 +1,435 @@
+'''Command-line interface for validating, checking, verifying, deduplicating, merging and rewriting ETS2 live_streams.sii files.
+
+Exit codes: 0 when everything is fine, 1 when problems were found (invalid
+entries, streams not responding or duplicates), 2 for usage or file errors.
+'''
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from check_cache import DEFAULT_CACHE_PATH, DEFAULT_TTL_HOURS, CheckCache, is_fresh, normalize_url
+from deep_verify import DEFAULT_DECODE_SECONDS, DEFAULT_DECODE_WORKERS, DecoderPool, verify_stream
+from dedupe import NAME_SIMILARITY, find_duplicates
+from instrumentation import DEFAULT_METRICS_PATH, metrics, timing_rows
+from sii_parser import ERROR
+from stream_checker import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT
+from stream_core import WORKING, check_streams, load_streams, status_text, validate_stream, write_sii
+from stream_import import CONFLICT_RULES, KEEP_EXISTING, PREFER_WORKING, StreamMerger, iter_source
+
+EXIT_OK = 0
+EXIT_PROBLEMS = 1
+EXIT_ERROR = 2
+
+
+def write_report(report, rows, columns, args):
+    '''Write ``report`` as JSON, or ``rows`` as CSV, to ``args.output`` or stdout.'''
+    try:
+        out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            if args.format == "csv":
+                writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump(report, out, indent=2, ensure_ascii=False)
+                out.write("\n")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    except OSError as exc:
+        print(f"Could not write {args.output or 'the report'}: {exc}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+
+def load_or_exit(path):
+    try:
+        return load_streams(path)
+    except OSError as exc:
+        print(f"Could not read {path}: {exc}", file=sys.stderr)
+        sys.exit(EXIT_ERROR)
+
+
+def parse_errors(path, diagnostics):
+    '''Print the ERROR diagnostics (entries the parser had to leave out) and return them.'''
+    errors = [d for d in diagnostics if d.severity == ERROR]
+    for d in errors:
+        print(f"{path}:{d.line_number}: {d.message}", file=sys.stderr)
+    return errors
+
+
+def overwrites_input(args):
+    return not args.output or os.path.realpath(args.output) == os.path.realpath(args.file)
+
+
+def validation_rows(streams, diagnostics):
+    rows = [
+        {"kind": "parse", "index": "", "line": d.line_number, "severity": d.severity, "url": "", "name": "", "message": d.message}
+        for d in diagnostics
+    ]
+    for index, stream in enumerate(streams):
+        error = validate_stream(stream)
+        if error:
+            rows.append(
+                {"kind": "stream", "index": index, "line": "", "severity": ERROR, "url": stream["url"], "name": stream["name"], "message": error}
+            )
+    return rows
+
+
+def cmd_validate(args):
+    streams, diagnostics = load_or_exit(args.file)
+    rows = validation_rows(streams, diagnostics)
+    problems = [row for row in rows if row["severity"] == ERROR]
+    report = {"file": args.file, "streams": len(streams), "problems": rows}
+    write_report(report, rows, ["kind", "index", "line", "severity", "url", "name", "message"], args)
+    return EXIT_PROBLEMS if problems else EXIT_OK
+
+
+def cmd_check(args):
+    streams, _ = load_or_exit(args.file)
+    cache = CheckCache(args.cache) if args.cache else None
+    jobs = [(index, stream["url"]) for index, stream in enumerate(streams)]
+
+    rows = {}
+    if args.only_stale and cache is not None:
+        cached = cache.get_many(url for _, url in jobs)
+        now = time.time()
+        stale = []
+        for index, url in jobs:
+            entry = cached.get(normalize_url(url))
+            if is_fresh(entry, args.ttl, now):
+                rows[index] = {
+                    "index": index, "url": url, "name": streams[index]["name"], "status": entry.status,
+                    "latency_ms": None if entry.latency is None else round(entry.latency * 1000),
+                    "http_status": entry.http_status, "detail": entry.detail, "cached": True,
+                }
+            else:
+                stale.append((index, url))
+        jobs = stale
+
+    lock = threading.Lock()
+    total = len(jobs)
+
+    def on_result(index, result, completed):
+        status = status_text(result)
+        if cache is not None:
+            cache.record(streams[index]["url"], status, result.latency, result.http_status, result.detail)
+        with lock:
+            rows[index] = {
+                "index": index, "url": streams[index]["url"], "name": streams[index]["name"], "status": status,
+                "latency_ms": None if result.latency is None else round(result.latency * 1000),
+                "http_status": result.http_status, "detail": result.detail, "cached": False,
+            }
+        if not args.quiet:
+            print(f"[{completed}/{total}] {status}: {streams[index]['url']}", file=sys.stderr)
+
+    try:
+        check_streams(jobs, on_result, max_workers=args.workers, per_host_limit=args.per_host)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    ordered = [rows[index] for index in sorted(rows)]
+    failing = [row for row in ordered if row["status"] != WORKING]
+    report = {
+        "file": args.file,
+        "streams": len(streams),
+        "checked": total,
+        "working": len(ordered) - len(failing),
+        "failing": len(failing),
+        "results": ordered,
+    }
+    write_report(report, ordered, ["index", "url", "name", "status", "latency_ms", "http_status", "detail", "cached"], args)
+    return EXIT_PROBLEMS if failing else EXIT_OK
+
+
+def cmd_verify(args):
+    streams, _ = load_or_exit(args.file)
+    cache = CheckCache(args.cache) if args.cache else None
+    jobs = [(index, stream["url"]) for index, stream in enumerate(streams)]
+    pool = DecoderPool(args.decoders, args.seconds)
+    rows = {}
+    lock = threading.Lock()
+
+    def on_result(index, result, completed):
+        status = status_text(result)
+        if cache is not None:
+            cache.record(streams[index]["url"], status, result.latency, result.http_status, result.detail)
+        with lock:
+            rows[index] = {
+                "index": index, "url": streams[index]["url"], "name": streams[index]["name"], "status": status,
+                "resolved_url": result.resolved_url, "codec": result.codec, "sample_rate": result.sample_rate,
+                "channels": result.channels, "decoded_seconds": round(result.decoded_seconds, 1),
+                "decoded_kbps": result.decoded_kbps, "listed_kbps": streams[index]["bitrate"], "detail": result.detail,
+            }
+        if not args.quiet:
+            print(f"[{completed}/{len(jobs)}] {status}: {streams[index]['url']}", file=sys.stderr)
+
+    try:
+        check_streams(
+            jobs, on_result, max_workers=args.workers, per_host_limit=args.per_host,
+            check=lambda http, url, timeout: verify_stream(http, pool, url, timeout),
+        )
+    finally:
+        pool.close()
+        if cache is not None:
+            cache.close()
+
+    ordered = [rows[index] for index in sorted(rows)]
+    failing = [row for row in ordered if row["status"] != WORKING]
+    report = {
+        "file": args.file,
+        "streams": len(streams),
+        "playing": len(ordered) - len(failing),
+        "failing": len(failing),
+        "results": ordered,
+    }
+    columns = [
+        "index", "url", "name", "status", "resolved_url", "codec", "sample_rate", "channels",
+        "decoded_seconds", "decoded_kbps", "listed_kbps", "detail",
+    ]
+    write_report(report, ordered, columns, args)
+    return EXIT_PROBLEMS if failing else EXIT_OK
+
+
+def cmd_dedupe(args):
+    streams, _ = load_or_exit(args.file)
+    groups = find_duplicates(
+        enumerate(streams), names=not args.urls_only, threshold=args.threshold, mirrors=not args.urls_only
+    )
+    grouped = [
+        [
+            {"group": number, "kind": group.kind, "key": group.key, "index": index, "url": streams[index]["url"], "name": streams[index]["name"]}
+            for index in group.ids
+        ]
+        for number, group in enumerate(groups)
+    ]
+    rows = [row for group_rows in grouped for row in group_rows]
+    report = {
+        "file": args.file,
+        "streams": len(streams),
+        "groups": [
+            {"kind": group.kind, "key": group.key, "streams": group_rows} for group, group_rows in zip(groups, grouped)
+        ],
+    }
+    write_report(report, rows, ["group", "kind", "key", "index", "url", "name"], args)
+    return EXIT_PROBLEMS if groups else EXIT_OK
+
+
+def cmd_merge(args):
+    streams, diagnostics = load_or_exit(args.file)
+    errors = parse_errors(args.file, diagnostics)
+    if errors and overwrites_input(args) and not args.force:
+        print(
+            f"Not merging into {args.file}: {len(errors)} entries could not be parsed and would be lost. "
+            "Use -o to write elsewhere or --force to overwrite anyway.",
+            file=sys.stderr,
+        )
+        return EXIT_PROBLEMS
+    cache = CheckCache(args.cache) if args.cache and args.rule == PREFER_WORKING else None
+    try:
+        merger = StreamMerger(args.rule)
+        cached = cache.get_many(stream["url"] for stream in streams) if cache is not None else {}
+        modified = os.path.getmtime(args.file)
+        for index, stream in enumerate(streams):
+            entry = cached.get(normalize_url(stream["url"]))
+            merger.add_existing(index, stream["url"], entry.status if entry else "", modified)
+
+        warnings = 0
+        for source in args.sources:
+            try:
+                modified = os.path.getmtime(source)
+                for item in iter_source(source):
+                    if not isinstance(item, dict):
+                        warnings += 1
+                        continue
+                    entry = cache.get(item["url"]) if cache is not None else None
+                    action = merger.merge(item, modified, entry.status if entry else "", len(streams))
+                    if action is None:
+                        continue
+                    if action.target is None:
+                        streams.append(item)
+                    else:
+                        streams[action.target] = item
+            except (OSError, ValueError) as exc:
+                print(f"Could not read {source}: {exc}", file=sys.stderr)
+                return EXIT_ERROR
+    finally:
+        if cache is not None:
+            cache.close()
+
+    output = args.output or args.file
+    try:
+        write_sii(output, streams)
+    except OSError as exc:
+        print(f"Could not write {output}: {exc}", file=sys.stderr)
+        return EXIT_ERROR
+
+    print(
+        f"Wrote {len(streams)} streams to {output}: {merger.summary()}, {warnings} entries unreadable"
+        + (f", {len(errors)} unparsable entries of {args.file} left out" if errors else ""),
+        file=sys.stderr,
+    )
+    for url, error in merger.rejected:
+        print(f"Rejected: {url}: {error}", file=sys.stderr)
+    for url, other in merger.possible:
+        print(f"Possible duplicate: {url} looks like {other}", file=sys.stderr)
+    return EXIT_PROBLEMS if errors else EXIT_OK
+
+
+def cmd_rewrite(args):
+    streams, diagnostics = load_or_exit(args.file)
+    errors = parse_errors(args.file, diagnostics)
+    if errors and overwrites_input(args) and not args.force:
+        print(
+            f"Not rewriting {args.file}: {len(errors)} entries could not be parsed and would be lost. "
+            "Use -o to write elsewhere or --force to overwrite anyway.",
+            file=sys.stderr,
+        )
+        return EXIT_PROBLEMS
+
+    invalid = [index for index, stream in enumerate(streams) if validate_stream(stream)]
+    if args.drop_invalid:
+        dropped = set(invalid)
+        streams = [stream for index, stream in enumerate(streams) if index not in dropped]
+
+    output = args.output or args.file
+    try:
+        write_sii(output, streams)
+    except OSError as exc:
+        print(f"Could not write {output}: {exc}", file=sys.stderr)
+        return EXIT_ERROR
+
+    print(
+        f"Wrote {len(streams)} streams to {output} ({len(errors)} unparsable entries left out, "
+        f"{len(diagnostics) - len(errors)} other parse warnings, "
+        f"{len(invalid)} invalid{' dropped' if args.drop_invalid else ''})",
+        file=sys.stderr,
+    )
+    return EXIT_PROBLEMS if errors or (invalid and not args.drop_invalid) else EXIT_OK
+
+
+def cmd_metrics(args):
+    try:
+        with open(args.file, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as exc:
+        print(f"Could not read {args.file}: {exc}", file=sys.stderr)
+        return EXIT_ERROR
+    rows = timing_rows(snapshot)
+    write_report(snapshot, rows, ["operation", "count", "mean_ms", "min_ms", "max_ms", "p50_ms", "p95_ms"], args)
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Validate, check, merge and rewrite ETS2 live_streams.sii files.")
+    parser.add_argument("--profile", metavar="FILE", help="run the command under cProfile and write the stats to FILE")
+    parser.add_argument("--metrics", metavar="FILE", help="write the timings of this run to FILE as JSON")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_report_options(sub):
+        sub.add_argument("--format", choices=("json", "csv"), default="json", help="report format (default: json)")
+        sub.add_argument("-o", "--output", help="write the report to this file instead of stdout")
+
+    validate = subparsers.add_parser("validate", help="parse a file and report invalid entries")
+    validate.add_argument("file")
+    add_report_options(validate)
+    validate.set_defaults(func=cmd_validate)
+
+    check = subparsers.add_parser("check", help="check every stream concurrently")
+    check.add_argument("file")
+    add_report_options(check)
+    check.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="maximum concurrent checks")
+    check.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST_LIMIT, help="maximum concurrent checks per host")
+    check.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="check result cache shared with the GUI ('' to disable)")
+    check.add_argument("--only-stale", action="store_true", help="skip streams checked within --ttl hours")
+    check.add_argument("--ttl", type=float, default=DEFAULT_TTL_HOURS, help="hours a cached result stays fresh")
+    check.add_argument("-q", "--quiet", action="store_true", help="don't print progress to stderr")
+    check.set_defaults(func=cmd_check)
+
+    verify = subparsers.add_parser("verify", help="resolve playlists and decode a few seconds of every stream with VLC")
+    verify.add_argument("file")
+    add_report_options(verify)
+    verify.add_argument("--seconds", type=float, default=DEFAULT_DECODE_SECONDS, help="seconds of audio to decode")
+    verify.add_argument(
+        "--decoders", type=int, default=DEFAULT_DECODE_WORKERS, help="VLC worker processes (default: %(default)s)"
+    )
+    verify.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="maximum concurrent verifications")
+    verify.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST_LIMIT, help="maximum concurrent checks per host")
+    verify.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="check result cache shared with the GUI ('' to disable)")
+    verify.add_argument("-q", "--quiet", action="store_true", help="don't print progress to stderr")
+    verify.set_defaults(func=cmd_verify)
+
+    dedupe = subparsers.add_parser("dedupe", help="report duplicate streams and similar station names")
+    dedupe.add_argument("file")
+    add_report_options(dedupe)
+    dedupe.add_argument("--urls-only", action="store_true", help="only report streams with the same URL, not possible mirrors or similar names")
+    dedupe.add_argument(
+        "--threshold", type=float, default=NAME_SIMILARITY, help="name similarity from 0 to 1 (default: %(default)s)"
+    )
+    dedupe.set_defaults(func=cmd_dedupe)
+
+    merge = subparsers.add_parser("merge", help="merge streams from .sii, JSON or CSV files into a .sii file")
+    merge.add_argument("file")
+    merge.add_argument("sources", nargs="+", help=".sii, .json, .jsonl or .csv files to merge in, in order")
+    merge.add_argument("-o", "--output", help="write to this file instead of overwriting the input")
+    merge.add_argument(
+        "--rule", choices=CONFLICT_RULES, default=KEEP_EXISTING,
+        help="which copy wins when a stream is already in the list (default: %(default)s)",
+    )
+    merge.add_argument(
+        "--force", action="store_true", help="overwrite the input even if entries that could not be parsed are lost"
+    )
+    merge.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="check result cache used by --rule prefer-working")
+    merge.set_defaults(func=cmd_merge)
+
+    rewrite = subparsers.add_parser("rewrite", help="re-number and re-write a file in canonical form")
+    rewrite.add_argument("file")
+    rewrite.add_argument("-o", "--output", help="write to this file instead of overwriting the input")
+    rewrite.add_argument("--drop-invalid", action="store_true", help="leave out entries that fail validation")
+    rewrite.add_argument(
+        "--force", action="store_true", help="overwrite the input even if entries that could not be parsed are lost"
+    )
+    rewrite.set_defaults(func=cmd_rewrite)
+
+    metrics_report = subparsers.add_parser("metrics", help="report the timings saved by the last GUI session")
+    metrics_report.add_argument(
+        "file", nargs="?", default=DEFAULT_METRICS_PATH, help="metrics file (default: the GUI's, written on exit)"
+    )
+    add_report_options(metrics_report)
+    metrics_report.set_defaults(func=cmd_metrics)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.profile:
+        code = args.func(args)
+    else:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            code = profiler.runcall(args.func, args)
+        finally:
+            try:
+                profiler.dump_stats(args.profile)
+            except OSError as exc:
+                print(f"Could not write {args.profile}: {exc}", file=sys.stderr)
+    if args.metrics:
+        try:
+            metrics.write_json(args.metrics)
+        except OSError as exc:
+            print(f"Could not write {args.metrics}: {exc}", file=sys.stderr)
+    return code
+
+
+if __name__ == "__main__":
+    # verify runs VLC in worker processes, which a frozen executable has to start itself
+    multiprocessing.freeze_support()
+    sys.exit(main())
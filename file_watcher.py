@@ -0,0 +1,142 @@
+'''Change detection for the open .sii file and URL-based diffs of its new contents.'''
+
+import threading
+from collections import deque, namedtuple
+
+from edit_journal import file_signature
+from sii_parser import FIELDS
+
+# Seconds between two looks at the file's size and modification time
+DEFAULT_POLL_INTERVAL = 2.0
+
+# ``updated`` is (id, stream) pairs to change in place, ``added`` streams to append, ``removed`` ids to drop
+StreamDiff = namedtuple("StreamDiff", "updated added removed")
+
+
+class FileWatcher:
+    '''Polls the size and modification time of one file on a background thread.
+
+    A stat every couple of seconds costs next to nothing and works the same
+    on every platform and file system, including network drives where change
+    notifications are unreliable. ``on_change(path)`` is called from the
+    watcher thread once a new signature has been seen on two polls in a row,
+    so a file that is still being written isn't reported half-way. A file
+    that is briefly missing (being replaced) is reported when it is back.
+    '''
+
+    def __init__(self, on_change, interval=DEFAULT_POLL_INTERVAL):
+        self.on_change = on_change
+        self.interval = interval
+        self._path = None
+        self._seen = None
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def watch(self, path, signature=None):
+        '''Watch ``path``, treating ``signature`` (its current one when None) as already seen.'''
+        if signature is None:
+            try:
+                signature = file_signature(path)
+            except OSError:
+                signature = None
+        with self._condition:
+            self._path = path
+            self._seen = signature
+            self._condition.notify()
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="file-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        '''Stop watching; waits for a stat in progress at most.'''
+        if self._thread is None:
+            return
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        watched = None
+        candidate = None
+        while True:
+            with self._condition:
+                self._condition.wait(self.interval)
+                if self._stopped:
+                    return
+                path, seen = self._path, self._seen
+            if path != watched:
+                watched = path
+                candidate = None
+            try:
+                signature = file_signature(path)
+            except OSError:
+                candidate = None
+                continue
+            if signature == seen:
+                candidate = None
+            elif signature != candidate:
+                # Wait one more poll for the writer to finish
+                candidate = signature
+            else:
+                candidate = None
+                with self._condition:
+                    if self._path != path or self._seen != seen:
+                        continue
+                    self._seen = signature
+                self.on_change(path)
+
+
+def diff_streams(current, incoming):
+    '''Work out how to turn the list into the file's new contents, touching as few streams as possible.
+
+    ``current`` is the list's ``(id, stream)`` pairs in id (file) order and
+    ``incoming`` the streams now in the file, in order. Streams are matched by
+    URL, so a kept stream keeps its id and everything tied to it. Between two
+    kept streams, removed and new streams are paired up as edits of the same
+    entry. Ids follow file order, so new streams can only be appended: from
+    the first stream that was inserted before a kept one or moved, the rest
+    of the list is removed and added again.
+    '''
+    by_url = {}
+    for stream_id, stream in current:
+        by_url.setdefault(stream["url"], deque()).append(stream_id)
+    matched = []
+    for stream in incoming:
+        ids = by_url.get(stream["url"])
+        matched.append(ids.popleft() if ids else None)
+    positions = {stream_id: position for position, (stream_id, _) in enumerate(current)}
+
+    updated = []
+    added = []
+    removed = []
+    position = 0
+    gap_start = 0
+    for index in range(len(incoming) + 1):
+        at_end = index == len(incoming)
+        stream_id = None if at_end else matched[index]
+        if stream_id is None and not at_end:
+            continue
+        new_gap = incoming[gap_start:index]
+        end = len(current) if at_end else positions[stream_id]
+        if end < position or (len(new_gap) > end - position and not at_end):
+            # Moved, or new streams before a kept one: rebuild from here on
+            removed.extend(old_id for old_id, _ in current[position:])
+            added.extend(incoming[gap_start:])
+            break
+        old_gap = current[position:end]
+        for (old_id, _), stream in zip(old_gap, new_gap):
+            updated.append((old_id, stream))
+        removed.extend(old_id for old_id, _ in old_gap[len(new_gap):])
+        added.extend(new_gap[len(old_gap):])
+        if at_end:
+            break
+        stream = incoming[index]
+        if any(stream[field] != current[end][1][field] for field in FIELDS):
+            updated.append((stream_id, stream))
+        position = end + 1
+        gap_start = index + 1
+    return StreamDiff(updated, added, removed)
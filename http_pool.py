@@ -0,0 +1,223 @@
+'''Shared, pooled HTTP access for stream probing.'''
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+from stream_checker import DEFAULT_PER_HOST_LIMIT
+
+# Number of distinct hosts whose connection pools are kept open
+DEFAULT_MAX_HOSTS = 64
+
+DNS_TTL_SECONDS = 300
+# Failed lookups are remembered briefly so every stream on a dead host fails fast
+DNS_NEGATIVE_TTL_SECONDS = 30
+# Lookups kept per pool; the least recently used entry is dropped beyond this
+DNS_CACHE_SIZE = 256
+
+# Error bodies up to this size are read so their connection can go back to the pool
+MAX_DRAIN_BYTES = 64 * 1024
+
+
+class DnsCache:
+    '''Thread-safe, size-capped TTL cache in front of ``socket.getaddrinfo``.'''
+
+    def __init__(
+        self, resolver, ttl=DNS_TTL_SECONDS, negative_ttl=DNS_NEGATIVE_TTL_SECONDS, max_entries=DNS_CACHE_SIZE
+    ):
+        self.resolver = resolver
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                if isinstance(entry[1], Exception):
+                    raise socket.gaierror(*entry[1].args)
+                return list(entry[1])
+            self.misses += 1
+
+        try:
+            result = self.resolver(host, port, *args, **kwargs)
+        except socket.gaierror as exc:
+            self._store(key, now + self.negative_ttl, exc)
+            raise
+        self._store(key, now + self.ttl, tuple(result))
+        return result
+
+    def _store(self, key, expires, value):
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+
+
+class PoolCounters:
+    '''Thread-safe counts of requests sent and TCP connections opened.'''
+
+    def __init__(self):
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.connections += 1
+
+
+def _counting_pool_classes(counters, dns):
+    '''Build urllib3 pool classes whose requests and socket connects update ``counters``.
+
+    Their connections resolve hosts through ``dns`` rather than the process-wide
+    ``socket.getaddrinfo``, so the cache never affects other libraries.
+    '''
+
+    def counting(pool_cls, connection_cls):
+        class CountingConnection(connection_cls):
+            connect_time = 0.0
+
+            def _new_conn(self):
+                host = self._dns_host
+                try:
+                    addresses = dns.getaddrinfo(host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+                except socket.gaierror as exc:
+                    raise NameResolutionError(self.host, self, exc) from exc
+                if not addresses:
+                    raise NewConnectionError(self, "Failed to establish a new connection: no addresses found")
+                # urllib3 connects to _dns_host; handing it a literal address skips its own lookup
+                # while Host headers and TLS keep using self.host
+                error = None
+                try:
+                    for address in addresses:
+                        self._dns_host = address[4][0]
+                        try:
+                            return super()._new_conn()
+                        except (ConnectTimeoutError, NewConnectionError) as exc:
+                            error = exc
+                finally:
+                    self._dns_host = host
+                raise error
+
+            def connect(self):
+                counters.add_connection()
+                started = time.monotonic()
+                try:
+                    return super().connect()
+                finally:
+                    self.connect_time = time.monotonic() - started
+
+        class CountingPool(pool_cls):
+            ConnectionCls = CountingConnection
+
+            def urlopen(self, *args, **kwargs):
+                counters.add_request()
+                return super().urlopen(*args, **kwargs)
+
+        return CountingPool
+
+    return {
+        "http": counting(HTTPConnectionPool, HTTPConnection),
+        "https": counting(HTTPSConnectionPool, HTTPSConnection),
+    }
+
+
+class PooledHttp:
+    '''One requests session shared by every checker thread.
+
+    Connection pools are kept per host (``per_host`` connections each, matching
+    the checker's per-host limit) and cookies are refused so the session holds
+    no shared mutable state besides urllib3's thread-safe pools.
+    '''
+
+    def __init__(self, per_host=DEFAULT_PER_HOST_LIMIT, max_hosts=DEFAULT_MAX_HOSTS):
+        self.dns = DnsCache(socket.getaddrinfo)
+        self.counters = PoolCounters()
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        pool_classes = _counting_pool_classes(self.counters, self.dns)
+        for prefix in ("http://", "https://"):
+            adapter = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max(1, int(per_host)))
+            adapter.poolmanager.pool_classes_by_scheme = pool_classes
+            self.session.mount(prefix, adapter)
+
+    def get(self, url, timeout, **kwargs):
+        '''Start a streaming GET; use the response as a context manager or call ``finish``.'''
+        return self.session.get(url, timeout=timeout, stream=True, **kwargs)
+
+    def take_connect_time(self, response):
+        '''Return the seconds spent opening (and TLS-negotiating) the connection behind ``response``.
+
+        Returns 0.0 when the response reused a pooled connection, and None when
+        the response no longer has a connection to ask.
+        '''
+        connection = getattr(response.raw, "connection", None)
+        if connection is None:
+            return None
+        elapsed = getattr(connection, "connect_time", None)
+        # Reset so a later request that reuses this connection reports no connect cost
+        connection.connect_time = 0.0
+        return elapsed
+
+    def finish(self, response):
+        '''Release a response's connection.
+
+        Small finite bodies (error pages, redirects) are read so the connection
+        can be reused. Anything else is closed outright, which is the only safe
+        option for an endless audio stream that has been partly read.
+        '''
+        try:
+            length = int(response.headers.get("Content-Length", ""))
+        except ValueError:
+            length = None
+        if response.status_code != 200 and length is not None and length <= MAX_DRAIN_BYTES:
+            try:
+                response.content
+            except requests.exceptions.RequestException:
+                pass
+        response.close()
+
+    def stats(self):
+        '''Return request, connection and DNS cache counters as a dict.'''
+        total_requests = self.counters.requests
+        reused = max(0, total_requests - self.counters.connections)
+        lookups = self.dns.hits + self.dns.misses
+        return {
+            "requests": total_requests,
+            "connections": self.counters.connections,
+            "reused": reused,
+            "reuse_rate": reused / total_requests if total_requests else 0.0,
+            "dns_hits": self.dns.hits,
+            "dns_misses": self.dns.misses,
+            "dns_hit_rate": self.dns.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,192 @@
+'''Low-overhead timing histograms and counters for the hot paths, with opt-in cProfile capture.
+
+Importing this module is cheap; cProfile and pstats are only imported when a
+profile is actually captured.
+'''
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Timings of the last GUI session, written on exit so the CLI can read them
+DEFAULT_METRICS_PATH = os.path.join(os.path.expanduser("~"), ".ets2_radio_utility_metrics.json")
+
+# Upper bounds of the histogram buckets in milliseconds; one more bucket holds everything slower
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# Names of the instrumented operations, in the order they are listed
+LOAD_PARSE = "load_parse"
+FILTER = "filter"
+SORT = "sort"
+UPDATE_TREEVIEW = "update_treeview"
+CHECK_STREAM = "check_stream"
+SAVE = "save"
+VLC_START = "vlc_start"
+OPERATIONS = (LOAD_PARSE, FILTER, SORT, UPDATE_TREEVIEW, CHECK_STREAM, SAVE, VLC_START)
+
+
+class Histogram:
+    '''Count, total, extremes and bucketed distribution of one operation's durations.'''
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def add(self, seconds):
+        milliseconds = seconds * 1000
+        self.count += 1
+        self.total += milliseconds
+        self.min = milliseconds if self.min is None else min(self.min, milliseconds)
+        self.max = milliseconds if self.max is None else max(self.max, milliseconds)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, milliseconds)] += 1
+
+    def percentile(self, percent):
+        '''Return the bucket bound at or below which ``percent`` of the durations fall (ms).'''
+        if not self.count:
+            return None
+        needed = percent * self.count / 100
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets):
+            seen += count
+            if seen >= needed:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else None,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "buckets_ms": {
+                **{f"<={bound}": count for bound, count in zip(BUCKET_BOUNDS_MS, self.buckets)},
+                f">{BUCKET_BOUNDS_MS[-1]}": self.buckets[-1],
+            },
+        }
+
+
+class Metrics:
+    '''Timing histograms and counters by name, shared by all threads.
+
+    ``profile_next(operation, path)`` arms a one-shot cProfile capture: the
+    next ``timed(operation)`` block, in whichever thread it runs, is profiled
+    and its stats written to ``path``.
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._profile_requests = {}
+        self.started = time.time()
+        self.last_profile = None
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def timed(self, name):
+        '''Time the enclosed block under ``name`` (and profile it if a capture is armed).'''
+        profile_path = None
+        if self._profile_requests:
+            with self._lock:
+                profile_path = self._profile_requests.pop(name, None)
+        if profile_path is not None:
+            with self._profiled(name, profile_path):
+                started = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    self.record(name, time.perf_counter() - started)
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def profile_next(self, operation, path):
+        '''Profile the next run of ``operation`` and write the cProfile stats to ``path``.'''
+        with self._lock:
+            self._profile_requests[operation] = path
+
+    def pending_profiles(self):
+        with self._lock:
+            return dict(self._profile_requests)
+
+    @contextmanager
+    def _profiled(self, name, path):
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running (Python 3.12+ allows only one at a time)
+            self.last_profile = (name, None)
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            try:
+                profiler.dump_stats(path)
+                self.last_profile = (name, path)
+            except OSError:
+                self.last_profile = (name, None)
+
+    def snapshot(self):
+        '''Return every histogram and counter as a JSON-ready dict.'''
+        with self._lock:
+            timings = {name: histogram.to_dict() for name, histogram in self._histograms.items()}
+            counters = dict(self._counters)
+        return {
+            "started": self.started,
+            "uptime_seconds": time.time() - self.started,
+            "timings": timings,
+            "counters": counters,
+        }
+
+    def write_json(self, path):
+        '''Write ``snapshot()`` to ``path``; raises OSError if it can't be written.'''
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+            self.started = time.time()
+
+
+# The process-wide metrics every instrumented module records into
+metrics = Metrics()
+
+
+def timing_rows(snapshot):
+    '''Flatten the timings of a snapshot into rows, instrumented operations first.'''
+    timings = snapshot.get("timings", {})
+    names = [name for name in OPERATIONS if name in timings] + sorted(set(timings) - set(OPERATIONS))
+    return [
+        {"operation": name, **{key: value for key, value in timings[name].items() if key != "buckets_ms"}}
+        for name in names
+    ]
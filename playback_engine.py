@@ -0,0 +1,254 @@
+'''Long-lived VLC playback: one instance, reused players and optional pre-buffering of neighbours.'''
+
+import logging
+import queue
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# VLC's own default; lower values start stations faster but stutter more on bad connections
+DEFAULT_NETWORK_CACHING_MS = 1000
+
+# At most this many stations are kept buffering silently next to the one playing
+MAX_PREBUFFERED = 2
+
+
+class PlaybackEngine:
+    '''Plays one stream at a time through a single VLC instance.
+
+    The instance is created on the first call and kept until ``release``;
+    switching stations only swaps the media on an existing player. Stations
+    passed to ``prebuffer`` are opened muted on spare players so switching to
+    them is close to instant. Methods may block on the network and should be
+    called from a worker thread; callbacks run on the engine's event thread.
+
+    libvlc delivers player events synchronously from the thread that
+    ``set_media`` and ``stop`` wait for, and its event callbacks must not call
+    back into libvlc. The callbacks therefore only queue the event for the
+    engine's own thread, and ``_lock`` is never held across a libvlc call.
+    Each event carries the player's opening generation, bumped whenever new
+    media is set, so late events from the previous media are ignored.
+    '''
+
+    def __init__(self, vlc_module, network_caching_ms=DEFAULT_NETWORK_CACHING_MS):
+        self.vlc = vlc_module
+        self.network_caching_ms = network_caching_ms
+        self.instance = None
+        self.player = None
+        self.current_url = None
+        self._standby = {}
+        self._spare = []
+        self._watches = {}
+        self._started = set()
+        self._generation = {}
+        # Guards the bookkeeping above, shared with the event thread
+        self._lock = threading.Lock()
+        # Serializes play, prebuffer, stop and release; the event path never takes it
+        self._control = threading.RLock()
+        self._events = queue.Queue()
+        self._event_thread = None
+
+    def play(self, url, started_at=None, on_started=None, on_error=None):
+        '''Switch to ``url``.
+
+        ``on_started(latency)`` is called once the first audio has been decoded,
+        with the seconds elapsed since ``started_at`` (a ``time.perf_counter``
+        value, default now). ``on_error(message)`` is called if VLC gives up.
+        '''
+        started_at = time.perf_counter() if started_at is None else started_at
+        with self._control:
+            self._ensure_instance()
+            with self._lock:
+                previous = self.player
+                player = self._standby.pop(url, None)
+            promoted = player is not None
+            if not promoted:
+                player = previous if previous is not None else self._new_player()
+
+            watch = (started_at, on_started, on_error)
+            with self._lock:
+                self.player = player
+                self.current_url = url
+                fire = promoted and player in self._started
+                if promoted and not fire:
+                    self._watches[player] = watch
+                elif not promoted:
+                    # The watch is attached by _open once the new media is set
+                    self._watches.pop(player, None)
+
+            if promoted:
+                # Already buffering: make it the active player and park the old one
+                if previous is not None:
+                    self._park(previous)
+                self._set_muted(player, False)
+            else:
+                self._open(player, url, watch)
+            if fire:
+                self._fire(watch, started=True)
+
+    def prebuffer(self, urls):
+        '''Keep up to MAX_PREBUFFERED of ``urls`` buffering muted; others are dropped.'''
+        with self._control:
+            if self.instance is None:
+                return
+            with self._lock:
+                wanted = [url for url in dict.fromkeys(urls) if url and url != self.current_url][:MAX_PREBUFFERED]
+                dropped = [self._standby.pop(url) for url in list(self._standby) if url not in wanted]
+                missing = [url for url in wanted if url not in self._standby]
+            for player in dropped:
+                self._park(player)
+            for url in missing:
+                with self._lock:
+                    player = self._spare.pop() if self._spare else None
+                if player is None:
+                    player = self._new_player()
+                self._set_muted(player, True)
+                with self._lock:
+                    self._standby[url] = player
+                self._open(player, url)
+
+    def stop(self):
+        '''Stop playback and pre-buffering but keep the VLC instance for the next play.'''
+        with self._control:
+            with self._lock:
+                players = list(self._standby.values())
+                self._standby = {}
+                if self.player is not None:
+                    players.append(self.player)
+                self.player = None
+                self.current_url = None
+            for player in players:
+                self._park(player)
+
+    def release(self):
+        '''Stop everything and free the VLC instance.'''
+        with self._control:
+            self.stop()
+            # Nothing is playing any more, so no new events can arrive; let the queued ones finish
+            if self._event_thread is not None:
+                self._events.put(None)
+                self._event_thread.join()
+                self._event_thread = None
+            with self._lock:
+                spare, self._spare = self._spare, []
+                instance, self.instance = self.instance, None
+            for player in spare:
+                try:
+                    player.release()
+                except Exception:
+                    pass
+            if instance is not None:
+                try:
+                    instance.release()
+                except Exception:
+                    pass
+
+    def _ensure_instance(self):
+        if self.instance is None:
+            self.instance = self.vlc.Instance("--no-video", "--quiet")
+        if self._event_thread is None:
+            self._event_thread = threading.Thread(target=self._run_events, name="vlc-events", daemon=True)
+            self._event_thread.start()
+
+    def _new_player(self):
+        player = self.instance.media_player_new()
+        events = player.event_manager()
+        events.event_attach(self.vlc.EventType.MediaPlayerTimeChanged, lambda event, p=player: self._on_time(p))
+        events.event_attach(self.vlc.EventType.MediaPlayerEncounteredError, lambda event, p=player: self._on_error(p))
+        return player
+
+    def _open(self, player, url, watch=None):
+        media = self.instance.media_new(url, f":network-caching={int(self.network_caching_ms)}")
+        player.set_media(media)
+        media.release()
+        # set_media has stopped the old media, so anything after this belongs to the new one
+        with self._lock:
+            self._generation[player] = self._generation.get(player, 0) + 1
+            self._started.discard(player)
+            if watch is not None:
+                self._watches[player] = watch
+        player.play()
+
+    def _park(self, player):
+        with self._lock:
+            self._watches.pop(player, None)
+            self._started.discard(player)
+        try:
+            player.stop()
+        except Exception:
+            pass
+        with self._lock:
+            self._spare.append(player)
+
+    def _set_muted(self, player, muted):
+        try:
+            player.audio_set_mute(muted)
+        except Exception:
+            pass
+
+    def _on_time(self, player):
+        # On VLC's event thread: no libvlc calls, and _lock is never held across
+        # one, so taking it here cannot deadlock. Time events come several times
+        # a second, so only the first one per opening is queued.
+        with self._lock:
+            if player in self._started:
+                return
+            self._started.add(player)
+            generation = self._generation.get(player)
+        self._events.put((self._handle_started, player, generation))
+
+    def _on_error(self, player):
+        with self._lock:
+            generation = self._generation.get(player)
+        self._events.put((self._handle_error, player, generation))
+
+    def _run_events(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            handler, player, generation = event
+            try:
+                handler(player, generation)
+            except Exception:
+                log.exception("Playback event handler failed")
+
+    def _handle_started(self, player, generation):
+        with self._lock:
+            if self._generation.get(player) != generation:
+                # Left over from the media this player had before
+                return
+            watch = self._watches.pop(player, None) if player is self.player else None
+            standby = player in self._standby.values()
+        if standby:
+            # VLC resets the mute flag when the audio output opens, so apply it again
+            self._set_muted(player, True)
+            with self._lock:
+                promoted = player is self.player
+            if promoted:
+                # play() switched to it while it was being muted
+                self._set_muted(player, False)
+        if watch is not None:
+            self._fire(watch, started=True)
+
+    def _handle_error(self, player, generation):
+        with self._lock:
+            if self._generation.get(player) != generation:
+                return
+            watch = self._watches.pop(player, None)
+            standby_url = next((url for url, p in self._standby.items() if p is player), None)
+            if standby_url is not None:
+                # A failed player has stopped by itself and can be reused as it is
+                del self._standby[standby_url]
+                self._started.discard(player)
+                self._spare.append(player)
+        if watch is not None:
+            self._fire(watch, started=False)
+
+    def _fire(self, watch, started):
+        started_at, on_started, on_error = watch
+        if started and on_started is not None:
+            on_started(time.perf_counter() - started_at)
+        elif not started and on_error is not None:
+            on_error("VLC could not open the stream.")
@@ -0,0 +1,169 @@
+'''Accent-insensitive substring search over stream fields.'''
+
+import unicodedata
+
+SEARCH_FIELDS = ("name", "genre", "language")
+GRAM_SIZE = 3
+
+
+def fold(text):
+    '''Lowercase ``text`` and strip accents so "Radio Marilù" matches "marilu".'''
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def grams(text):
+    '''Return the set of trigrams in ``text``.'''
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class FieldIndex:
+    '''Index of one field: distinct folded values, their stream ids and a trigram index over the values.
+
+    Indexing distinct values rather than streams keeps low-cardinality fields
+    such as genre and language tiny, and a query only has to verify each
+    distinct candidate value once.
+    '''
+
+    def __init__(self):
+        self.values = {}
+        self.trigrams = {}
+
+    def add(self, stream_id, value):
+        ids = self.values.get(value)
+        if ids is None:
+            ids = self.values[value] = set()
+            for gram in grams(value):
+                self.trigrams.setdefault(gram, set()).add(value)
+        ids.add(stream_id)
+
+    def remove(self, stream_id, value):
+        ids = self.values.get(value)
+        if ids is None:
+            return
+        ids.discard(stream_id)
+        if ids:
+            return
+        del self.values[value]
+        for gram in grams(value):
+            values = self.trigrams.get(gram)
+            if values is not None:
+                values.discard(value)
+                if not values:
+                    del self.trigrams[gram]
+
+    def candidate_values(self, query):
+        '''Return the distinct values that contain ``query``.'''
+        if len(query) < GRAM_SIZE:
+            return [value for value in self.values if query in value]
+
+        postings = []
+        for gram in grams(query):
+            values = self.trigrams.get(gram)
+            if not values:
+                return []
+            postings.append(values)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for values in postings[1:]:
+            candidates &= values
+            if not candidates:
+                return []
+        return [value for value in candidates if query in value]
+
+    def search(self, query):
+        '''Return the set of stream ids whose value contains ``query``.'''
+        result = set()
+        for value in self.candidate_values(query):
+            result |= self.values[value]
+        return result
+
+
+class SearchIndex:
+    '''Pre-folded search keys for every stream, keyed by stream id.
+
+    ``search`` narrows from the previous result when every field query only
+    got longer, so typing one more character never rescans the whole list.
+    '''
+
+    def __init__(self, fields=SEARCH_FIELDS):
+        self.fields = fields
+        self.keys = {}
+        self.indexes = {field: FieldIndex() for field in fields}
+        self._last_query = None
+        self._last_result = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        self.keys = {}
+        self.indexes = {field: FieldIndex() for field in self.fields}
+        self._invalidate()
+
+    def rebuild(self, streams):
+        '''Index ``streams`` from scratch: a StreamStore or mapping by id, or a list indexed by position.'''
+        self.clear()
+        items = streams.items() if hasattr(streams, "items") else enumerate(streams)
+        for stream_id, stream in items:
+            self.add(stream_id, stream)
+
+    def add(self, stream_id, stream):
+        keys = tuple(fold(stream.get(field, "")) for field in self.fields)
+        self.keys[stream_id] = keys
+        for field, key in zip(self.fields, keys):
+            self.indexes[field].add(stream_id, key)
+        self._invalidate()
+
+    def remove(self, stream_id):
+        keys = self.keys.pop(stream_id, None)
+        if keys is None:
+            return
+        for field, key in zip(self.fields, keys):
+            self.indexes[field].remove(stream_id, key)
+        self._invalidate()
+
+    def update(self, stream_id, stream):
+        self.remove(stream_id)
+        self.add(stream_id, stream)
+
+    def normalize_query(self, query):
+        '''Fold a tuple of raw per-field filter strings into a query.'''
+        return tuple(fold(text.strip()) for text in query)
+
+    def matches(self, stream_id, query):
+        '''Check a single stream against a normalized query.'''
+        keys = self.keys.get(stream_id)
+        if keys is None:
+            return False
+        return all(not text or text in key for text, key in zip(query, keys))
+
+    def search(self, query):
+        '''Return the set of stream ids matching a normalized query, or None if it has no terms.'''
+        if not any(query):
+            return None
+
+        previous = self._last_query
+        if previous is not None and all(old in new for old, new in zip(previous, query)):
+            # Every term only got longer, so the answer is a subset of the last one
+            result = {stream_id for stream_id in self._last_result if self.matches(stream_id, query)}
+        else:
+            result = None
+            for field, text in sorted(zip(self.fields, query), key=lambda item: -len(item[1])):
+                if not text:
+                    continue
+                if result is None:
+                    result = self.indexes[field].search(text)
+                else:
+                    position = self.fields.index(field)
+                    result = {stream_id for stream_id in result if text in self.keys[stream_id][position]}
+                if not result:
+                    break
+
+        self._last_query = query
+        self._last_result = result
+        return result
+
+    def _invalidate(self):
+        self._last_query = None
+        self._last_result = None
@@ -0,0 +1,181 @@
+'''Streaming parser and writer helpers for ETS2 live_streams.sii files.'''
+
+import mmap
+import re
+from collections import namedtuple
+
+FIELDS = ("url", "name", "genre", "language", "bitrate", "extra")
+MIN_FIELDS = 5
+DEFAULT_EXTRA = "0"
+
+ERROR = "error"
+WARNING = "warning"
+
+# Lines that aren't valid UTF-8 are read in this encoding: what the Windows builds used to save with
+FALLBACK_ENCODING = "cp1252"
+
+# Characters the game reads as the end of a field or of the value; they can't be escaped
+FIELD_SEPARATORS = '|"'
+
+# Marks characters that could not be decoded in either encoding
+REPLACEMENT_CHAR = "\ufffd"
+
+StreamRecord = namedtuple("StreamRecord", ("line_number", "index") + FIELDS)
+StreamCount = namedtuple("StreamCount", ("line_number", "count"))
+
+
+class Diagnostic(namedtuple("Diagnostic", ("line_number", "severity", "message"))):
+    '''A problem found while parsing, tied to a 1-based line number (0 for whole-file issues).'''
+
+    __slots__ = ()
+
+    def __str__(self):
+        if self.line_number:
+            return f"Line {self.line_number}: {self.message}"
+        return self.message
+
+
+def record_to_stream(record):
+    '''Return the stream dict the GUI works with for a parsed record.'''
+    return {field: getattr(record, field) for field in FIELDS}
+
+
+_COUNT_RE = re.compile(r"^stream_data\s*:\s*(\S+)")
+_ENTRY_RE = re.compile(r"^stream_data\s*\[\s*([^\]]*)\]\s*:\s*(.*)$")
+
+
+def split_quoted_fields(text):
+    '''Split the quoted value of a stream_data line into its ``|`` separated fields.
+
+    ``text`` must start with a double quote. Like the game, every ``|``
+    separates fields and the next ``"`` ends the value; there are no escapes.
+    Returns ``(fields, trailing_text)`` or raises ``ValueError`` if the
+    closing quote is missing.
+    '''
+    if not text.startswith('"'):
+        raise ValueError("value is not a quoted string")
+    end = text.find('"', 1)
+    if end < 0:
+        raise ValueError("missing closing quote")
+    return text[1:end].split("|"), text[end + 1:].strip()
+
+
+def parse_sii_lines(lines):
+    '''Parse an iterable of text lines, yielding records and diagnostics as they are found.
+
+    Yields ``StreamCount`` for the ``stream_data: N`` header, ``StreamRecord``
+    for every usable entry and ``Diagnostic`` for anything skipped or suspicious.
+    Lines are consumed lazily, so large files are never held in memory.
+    '''
+    declared = None
+    found = 0
+    expected_index = 0
+    for line_number, raw_line in enumerate(lines, start=1):
+        line = raw_line.strip()
+        if line_number == 1:
+            line = line.lstrip("\ufeff")
+        if not line.startswith("stream_data"):
+            continue
+
+        match = _ENTRY_RE.match(line)
+        if match is None:
+            count_match = _COUNT_RE.match(line)
+            if count_match is None:
+                yield Diagnostic(line_number, ERROR, "Unrecognised stream_data line")
+                continue
+            try:
+                declared = int(count_match.group(1))
+            except ValueError:
+                yield Diagnostic(line_number, WARNING, f"Invalid stream count '{count_match.group(1)}'")
+                continue
+            yield StreamCount(line_number, declared)
+            continue
+
+        index_text, value = match.groups()
+        try:
+            index = int(index_text)
+        except ValueError:
+            yield Diagnostic(line_number, WARNING, f"Invalid stream index '{index_text}'")
+            index = expected_index
+        if index != expected_index:
+            yield Diagnostic(line_number, WARNING, f"Expected stream_data[{expected_index}], found stream_data[{index}]")
+        expected_index = index + 1
+
+        try:
+            parts, trailing = split_quoted_fields(value.strip())
+        except ValueError as exc:
+            yield Diagnostic(line_number, ERROR, f"Could not parse entry: {exc}")
+            continue
+
+        if len(parts) < MIN_FIELDS:
+            yield Diagnostic(line_number, ERROR, f"Entry has {len(parts)} fields, at least {MIN_FIELDS} are required")
+            continue
+        if len(parts) > len(FIELDS):
+            yield Diagnostic(line_number, WARNING, f"Entry has {len(parts)} fields, extra fields were ignored")
+        if trailing:
+            yield Diagnostic(line_number, WARNING, "Unexpected text after closing quote was ignored")
+
+        if REPLACEMENT_CHAR in value:
+            yield Diagnostic(
+                line_number, WARNING, "Entry has characters that could not be read; they were replaced with \ufffd"
+            )
+
+        found += 1
+        yield StreamRecord(
+            line_number,
+            index,
+            parts[0],
+            parts[1],
+            parts[2],
+            parts[3],
+            parts[4],
+            parts[5] if len(parts) > 5 else DEFAULT_EXTRA,
+        )
+
+    if declared is not None and declared != found:
+        yield Diagnostic(0, WARNING, f"File declares {declared} streams but {found} were read")
+
+
+def decode_line(raw_line, encoding="utf-8"):
+    '''Decode one line, falling back to FALLBACK_ENCODING for lines that aren't valid in ``encoding``.
+
+    Files written by older versions used the Windows code page, so a
+    cp1252 file keeps its accents instead of turning them into U+FFFD.
+    '''
+    try:
+        return raw_line.decode(encoding)
+    except UnicodeDecodeError:
+        return raw_line.decode(FALLBACK_ENCODING, errors="replace")
+
+
+def iter_file_lines(path, use_mmap=True, encoding="utf-8"):
+    '''Yield decoded lines from ``path``, memory-mapping it when possible.'''
+    with open(path, "rb") as f:
+        buffer = None
+        if use_mmap:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # Empty files and some special files can't be mapped
+                buffer = None
+        source = buffer if buffer is not None else f
+        try:
+            for raw_line in iter(source.readline, b""):
+                yield decode_line(raw_line, encoding)
+        finally:
+            if buffer is not None:
+                buffer.close()
+
+
+def parse_sii_file(path, use_mmap=True):
+    '''Stream records and diagnostics from the .sii file at ``path``.'''
+    return parse_sii_lines(iter_file_lines(path, use_mmap=use_mmap))
+
+
+def format_stream_line(index, stream):
+    '''Return the stream_data line for ``stream`` at position ``index``.
+
+    Fields are written as they are; validation keeps FIELD_SEPARATORS out of them.
+    '''
+    value = "|".join(str(stream[field]) for field in FIELDS)
+    return f'stream_data[{index}]: "{value}"\n'
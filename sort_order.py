@@ -0,0 +1,176 @@
+'''Cached, type-aware multi-column ordering of streams.'''
+
+from search_index import fold
+
+NUMERIC_COLUMNS = ("bitrate", "extra", "uptime", "p50", "p95")
+
+# Sort a filtered subset directly when it is this many times smaller than the full list
+SUBSET_SORT_RATIO = 8
+
+
+def numeric_sort_key(text):
+    '''Sort numbers by value and put anything non-numeric after them.'''
+    try:
+        return (0, float(str(text).strip()), "")
+    except ValueError:
+        return (1, 0.0, fold(text))
+
+
+def text_sort_key(text):
+    return fold(text)
+
+
+class SortOrder:
+    '''Multi-column sort state with per-column key caches and a cached full ordering.
+
+    ``value_getter(column, stream_id)`` returns the raw value of a cell and
+    ``ids_getter()`` the ids of all streams in ascending order. Keys are
+    computed once per cell and dropped only when ``invalidate`` is told that
+    cell changed. Ties are broken by id, so the ordering is total and rows
+    can be placed by binary search.
+    '''
+
+    def __init__(self, value_getter, ids_getter):
+        self.value_getter = value_getter
+        self.ids_getter = ids_getter
+        self.columns = []
+        self._keys = {}
+        self._order = None
+
+    def __bool__(self):
+        return bool(self.columns)
+
+    def sorts_on(self, column):
+        return any(col == column for col, _ in self.columns)
+
+    def direction(self, column):
+        '''Return ``(position, reverse)`` for a sorted column, or None.'''
+        for position, (col, reverse) in enumerate(self.columns):
+            if col == column:
+                return position, reverse
+        return None
+
+    def toggle(self, column, add=False):
+        '''Sort by ``column``; with ``add`` keep the current columns and use it as a tie-breaker.
+
+        Choosing a column that is already sorted flips its direction.
+        '''
+        found = self.direction(column)
+        if add:
+            if found is None:
+                self.columns.append((column, False))
+            else:
+                position, reverse = found
+                self.columns[position] = (column, not reverse)
+        elif found is not None and found[0] == 0:
+            self.columns = [(column, not found[1])]
+        else:
+            self.columns = [(column, False)]
+        self._order = None
+
+    def key(self, column, stream_id):
+        cache = self._keys.setdefault(column, {})
+        key = cache.get(stream_id)
+        if key is None:
+            value = self.value_getter(column, stream_id)
+            key = numeric_sort_key(value) if column in NUMERIC_COLUMNS else text_sort_key(value)
+            cache[stream_id] = key
+        return key
+
+    def invalidate(self, stream_id=None, columns=None):
+        '''Forget cached keys, for every stream when ``stream_id`` is None.'''
+        if stream_id is None:
+            self._keys = {}
+            self._order = None
+            return
+        for column in columns if columns is not None else list(self._keys):
+            cache = self._keys.get(column)
+            if cache is not None:
+                cache.pop(stream_id, None)
+            if self._order is not None and self.sorts_on(column):
+                self._order = None
+
+    def add(self, stream_id):
+        '''Place a newly added stream in the cached order.'''
+        if self._order is not None and self.columns:
+            self._order.insert(self.insertion_point(self._order, stream_id), stream_id)
+        elif self._order is not None:
+            self._order.append(stream_id)
+
+    def remove(self, stream_id):
+        '''Forget a deleted stream's keys and drop it from the cached order.'''
+        for cache in self._keys.values():
+            cache.pop(stream_id, None)
+        if self._order is not None:
+            try:
+                self._order.remove(stream_id)
+            except ValueError:
+                self._order = None
+
+    def remove_many(self, stream_ids):
+        '''Like ``remove`` for many streams, in a single pass over the cached order.'''
+        gone = set(stream_ids)
+        for cache in self._keys.values():
+            for stream_id in gone:
+                cache.pop(stream_id, None)
+        if self._order is not None:
+            self._order = [stream_id for stream_id in self._order if stream_id not in gone]
+
+    def reposition(self, stream_id, column):
+        '''Drop the cached key for one changed cell and move its row within the cached order.'''
+        cache = self._keys.get(column)
+        if cache is not None:
+            cache.pop(stream_id, None)
+        if self._order is None or not self.sorts_on(column):
+            return
+        try:
+            self._order.remove(stream_id)
+        except ValueError:
+            # Not in the cached order (e.g. removed by a reload while its result was queued); place it anyway
+            pass
+        self._order.insert(self.insertion_point(self._order, stream_id), stream_id)
+
+    def precedes(self, a, b):
+        '''Return True if stream ``a`` sorts before stream ``b``.'''
+        for column, reverse in self.columns:
+            key_a = self.key(column, a)
+            key_b = self.key(column, b)
+            if key_a != key_b:
+                return key_a > key_b if reverse else key_a < key_b
+        return a < b
+
+    def insertion_point(self, sequence, stream_id, item_id=int):
+        '''Binary search for where ``stream_id`` belongs in an already sorted ``sequence``.
+
+        ``item_id`` converts sequence items (e.g. treeview iids) to stream ids.
+        '''
+        low, high = 0, len(sequence)
+        while low < high:
+            middle = (low + high) // 2
+            if self.precedes(item_id(sequence[middle]), stream_id):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _sort(self, stream_ids):
+        # Stable passes from the least to the most significant column
+        for column, reverse in reversed(self.columns):
+            stream_ids.sort(key=lambda stream_id, column=column: self.key(column, stream_id), reverse=reverse)
+        return stream_ids
+
+    def ordered(self, stream_ids=None):
+        '''Return ``stream_ids`` (all streams when None) in sort order.'''
+        all_ids = self.ids_getter()
+        if not self.columns:
+            return list(all_ids) if stream_ids is None else sorted(stream_ids)
+
+        if stream_ids is not None and len(stream_ids) * SUBSET_SORT_RATIO < len(all_ids):
+            return self._sort(sorted(stream_ids))
+
+        if self._order is None or len(self._order) != len(all_ids):
+            self._order = self._sort(list(all_ids))
+        if stream_ids is None:
+            return list(self._order)
+        members = stream_ids if isinstance(stream_ids, (set, frozenset)) else set(stream_ids)
+        return [stream_id for stream_id in self._order if stream_id in members]
@@ -0,0 +1,240 @@
+'''Concurrent stream checking with a global worker cap, per-host limits and adaptive timeouts.'''
+
+import heapq
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_PER_HOST_LIMIT = 2
+
+# Connect and read timeout for hosts without a latency history, and the upper bound for the others
+DEFAULT_TIMEOUT = 5.0
+MIN_TIMEOUT = 1.0
+
+# Checks that got no answer (or a 5xx) are retried this often, after RETRY_BACKOFF seconds doubling per retry
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 0.5
+
+# After this many attempts in a row without any answer, a host's remaining streams fail without a request
+HOST_FAILURE_LIMIT = 3
+HOST_DOWN_DETAIL = "Host not responding"
+
+# latency is seconds until the first chunk (or the failure); http_status is None if no response arrived
+CheckResult = namedtuple("CheckResult", "is_working latency http_status detail")
+
+
+def host_key(url):
+    '''Return the key used to group URLs that share a server.'''
+    try:
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return ""
+    return (parsed.hostname or "").lower()
+
+
+def is_retryable(result):
+    '''Return True for failures that may be transient: no answer at all, or a server error.'''
+    return not result.is_working and (result.http_status is None or result.http_status >= 500)
+
+
+def retry_delay(attempt, backoff=RETRY_BACKOFF):
+    '''Seconds to wait before retry number ``attempt`` (1 for the first), with random jitter.'''
+    delay = backoff * 2 ** (attempt - 1)
+    return random.uniform(delay / 2, delay)
+
+
+class HostHealth:
+    '''Latency estimates and failure counts per host, shared by the checks of one run.
+
+    The timeout for a host is its smoothed latency plus four times the
+    latency deviation, as TCP does for retransmissions, kept between
+    ``min_timeout`` and ``default_timeout``. Hosts without history get
+    ``default_timeout``.
+    '''
+
+    def __init__(self, default_timeout=DEFAULT_TIMEOUT, min_timeout=MIN_TIMEOUT, failure_limit=HOST_FAILURE_LIMIT):
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.failure_limit = failure_limit
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._failures = {}
+
+    def seed(self, host, latency):
+        '''Add a past latency (e.g. from the check cache) to a host's estimate.'''
+        with self._lock:
+            self._observe_latency(host, latency)
+
+    def record(self, host, result):
+        '''Learn from the result of one attempt; any answer from the server resets its failure count.'''
+        with self._lock:
+            if result.http_status is not None:
+                self._failures[host] = 0
+                if result.latency is not None:
+                    self._observe_latency(host, result.latency)
+            else:
+                self._failures[host] = self._failures.get(host, 0) + 1
+
+    def _observe_latency(self, host, latency):
+        estimate = self._latency.get(host)
+        if estimate is None:
+            self._latency[host] = (latency, latency / 2)
+            return
+        smoothed, deviation = estimate
+        deviation = 0.75 * deviation + 0.25 * abs(smoothed - latency)
+        smoothed = 0.875 * smoothed + 0.125 * latency
+        self._latency[host] = (smoothed, deviation)
+
+    def timeout(self, host, attempt=0):
+        '''Return ``(connect, read)`` timeouts for a check; retries always get the full timeout.'''
+        with self._lock:
+            estimate = self._latency.get(host)
+        if estimate is None or attempt > 0:
+            return (self.default_timeout, self.default_timeout)
+        smoothed, deviation = estimate
+        seconds = min(max(smoothed + 4 * deviation, self.min_timeout), self.default_timeout)
+        return (seconds, seconds)
+
+    def is_down(self, host):
+        with self._lock:
+            return self._failures.get(host, 0) >= self.failure_limit
+
+
+class ConcurrentChecker:
+    '''Run a check function over many URLs using a bounded thread pool.
+
+    At most ``max_workers`` checks run at once, and at most ``per_host_limit``
+    of them target the same host. Jobs for a busy host wait in a per-host
+    queue instead of occupying a worker, so other hosts keep making progress.
+
+    ``check_func(url, timeout)`` gets per-host adaptive timeouts from
+    ``health``. Failures without an answer are retried up to ``retries``
+    times with jittered exponential backoff, and once a host has failed
+    HOST_FAILURE_LIMIT times in a row its remaining jobs fail immediately.
+    '''
+
+    def __init__(
+        self,
+        check_func,
+        max_workers=DEFAULT_MAX_WORKERS,
+        per_host_limit=DEFAULT_PER_HOST_LIMIT,
+        retries=DEFAULT_RETRIES,
+        health=None,
+    ):
+        self.check_func = check_func
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.retries = max(0, int(retries))
+        self.health = health if health is not None else HostHealth()
+        self._cancelled = threading.Event()
+        self._paused = threading.Event()
+        self._condition = threading.Condition()
+
+    def cancel(self):
+        '''Stop scheduling new checks; checks already running finish normally.'''
+        self._cancelled.set()
+        self._wake()
+
+    def pause(self):
+        '''Hold back new checks until ``resume``; checks already running finish normally.'''
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+        self._wake()
+
+    def _wake(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return self._paused.is_set()
+
+    def run(self, jobs, on_result):
+        '''Check every ``(key, url)`` job and block until all are done.
+
+        Jobs start in the order given as far as the per-host limits allow, so
+        list the most important first. ``on_result(key, result, completed)``
+        is called from a worker thread once per job, after its last attempt,
+        with whatever ``check_func`` returned (or a failed CheckResult if it
+        raised). Returns the number of completed checks.
+        '''
+        # Per host, a heap of (order, attempt, key, url); jobs arrive in order, so each list is already a heap
+        pending = {}
+        for order, (key, url) in enumerate(jobs):
+            pending.setdefault(host_key(url), []).append((order, 0, key, url))
+
+        active = dict.fromkeys(pending, 0)
+        # Hosts that may start a job, by the order of their next job; stale entries are skipped when popped
+        ready = [(queue[0][0], host) for host, queue in pending.items()]
+        heapq.heapify(ready)
+        # Retries waiting out their backoff: (due, order, attempt, key, url, host)
+        delayed = []
+        condition = self._condition
+        state = {"in_flight": 0, "completed": 0}
+
+        def make_ready(host):
+            queue = pending[host]
+            if queue and active[host] < self.per_host_limit:
+                heapq.heappush(ready, (queue[0][0], host))
+
+        def worker(host, order, attempt, key, url):
+            retry_at = None
+            if self.health.is_down(host):
+                result = CheckResult(False, None, None, HOST_DOWN_DETAIL)
+            else:
+                try:
+                    result = self.check_func(url, self.health.timeout(host, attempt))
+                except Exception as exc:
+                    result = CheckResult(False, None, None, str(exc))
+                self.health.record(host, result)
+                if is_retryable(result) and attempt < self.retries and not self.cancelled:
+                    retry_at = time.monotonic() + retry_delay(attempt + 1)
+
+            try:
+                if retry_at is None:
+                    with condition:
+                        state["completed"] += 1
+                        completed = state["completed"]
+                    on_result(key, result, completed)
+            finally:
+                with condition:
+                    state["in_flight"] -= 1
+                    active[host] -= 1
+                    if retry_at is not None:
+                        heapq.heappush(delayed, (retry_at, order, attempt + 1, key, url, host))
+                    make_ready(host)
+                    condition.notify()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stream-check") as executor:
+            with condition:
+                while True:
+                    now = time.monotonic()
+                    while delayed and delayed[0][0] <= now:
+                        _, order, attempt, key, url, host = heapq.heappop(delayed)
+                        heapq.heappush(pending[host], (order, attempt, key, url))
+                        make_ready(host)
+                    while ready and state["in_flight"] < self.max_workers and not self.cancelled and not self.paused:
+                        order, host = heapq.heappop(ready)
+                        queue = pending[host]
+                        if not queue or queue[0][0] != order or active[host] >= self.per_host_limit:
+                            continue
+                        order, attempt, key, url = heapq.heappop(queue)
+                        active[host] += 1
+                        state["in_flight"] += 1
+                        executor.submit(worker, host, order, attempt, key, url)
+                        make_ready(host)
+                    if state["in_flight"] == 0 and (self.cancelled or (not ready and not delayed)):
+                        break
+                    condition.wait(delayed[0][0] - now if delayed else None)
+
+        return state["completed"]
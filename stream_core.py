@@ -0,0 +1,201 @@
+'''GUI-free core for loading, validating, checking and writing ETS2 stream lists.
+
+Importing this module never imports tkinter or vlc, and requests is only
+imported once streams are actually checked, so scripts start quickly.
+'''
+
+import os
+import stat
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from instrumentation import CHECK_STREAM, LOAD_PARSE, SAVE, metrics
+from sii_parser import (
+    FIELD_SEPARATORS, FIELDS, Diagnostic, StreamRecord, format_stream_line, parse_sii_file, record_to_stream
+)
+from stream_checker import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT, CheckResult, ConcurrentChecker
+
+CHECK_TIMEOUT = (5, 5)
+
+WORKING = "Working"
+NOT_RESPONDING = "Not Responding"
+
+SII_HEADER = 'SiiNunit\n{{\nlive_stream_def : _nameless.23f.d60f.8a20 {{\n stream_data: {count}\n'
+SII_FOOTER = '}\n}\n'
+
+# Permissions for a newly created file; an existing file keeps its own
+NEW_FILE_MODE = 0o644
+
+
+def is_valid_url(url):
+    '''Basic validation to check if a URL looks valid.'''
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+def validate_stream(stream):
+    '''Validate a stream's required fields and format; return an error message or None.'''
+    if not stream['url'].strip():
+        return "Stream URL is required."
+    if not is_valid_url(stream['url'].strip()):
+        return "Stream URL is not valid."
+    if not stream['name'].strip():
+        return "Stream name is required."
+    if not str(stream['bitrate']).strip():
+        return "Bitrate is required."
+    try:
+        int(stream['bitrate'])
+    except ValueError:
+        return "Bitrate must be a number."
+    for field in FIELDS:
+        # The game splits on these and knows no escapes, so they would shift or cut off the fields
+        if any(char in str(stream[field]) for char in FIELD_SEPARATORS):
+            return f"Stream {field} can't contain | or \"."
+    return None
+
+
+def status_text(result):
+    '''Return the status shown for a CheckResult or ProbeResult.'''
+    return WORKING if result.is_working else NOT_RESPONDING
+
+
+def load_streams(path):
+    '''Parse the .sii file at ``path`` and return ``(streams, diagnostics)``.
+
+    Raises OSError if the file can't be read.
+    '''
+    streams = []
+    diagnostics = []
+    with metrics.timed(LOAD_PARSE):
+        for item in parse_sii_file(path):
+            if isinstance(item, StreamRecord):
+                streams.append(record_to_stream(item))
+            elif isinstance(item, Diagnostic):
+                diagnostics.append(item)
+    return streams, diagnostics
+
+
+def iter_sii_lines(streams):
+    '''Yield the lines of a .sii file containing ``streams``.'''
+    yield SII_HEADER.format(count=len(streams))
+    for i, stream in enumerate(streams):
+        yield format_stream_line(i, stream)
+    yield SII_FOOTER
+
+
+def format_sii(streams):
+    '''Return the full text of a .sii file containing ``streams``.'''
+    return "".join(iter_sii_lines(streams))
+
+
+def write_sii(path, streams):
+    '''Write ``streams`` to ``path`` as a .sii file, atomically.
+
+    The text is built in memory, written to a temporary file beside ``path``,
+    flushed to disk and renamed over ``path``, so a crash or a full disk
+    leaves either the old file or the new one, never a truncated mix.
+    '''
+    with metrics.timed(SAVE):
+        _write_sii(path, streams)
+
+
+def _write_sii(path, streams):
+    text = format_sii(streams)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            os.chmod(temp_path, NEW_FILE_MODE)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+
+def fsync_directory(directory):
+    '''Flush a directory entry to disk after a rename; a no-op where directories can't be opened.'''
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def check_stream(http, url, timeout=CHECK_TIMEOUT):
+    '''Check if the stream URL is functional through a PooledHttp and return a CheckResult.'''
+    with metrics.timed(CHECK_STREAM):
+        result = _check_stream(http, url, timeout)
+    if not result.is_working:
+        metrics.count("check_failed")
+    return result
+
+
+def _check_stream(http, url, timeout):
+    import requests
+
+    started = time.monotonic()
+    try:
+        response = http.get(url, timeout=timeout)
+    except requests.exceptions.RequestException as exc:
+        return CheckResult(False, time.monotonic() - started, None, type(exc).__name__)
+
+    try:
+        if response.status_code != 200:
+            return CheckResult(False, time.monotonic() - started, response.status_code, f"HTTP {response.status_code}")
+
+        try:
+            next(response.iter_content(chunk_size=1024))
+        except StopIteration:
+            return CheckResult(False, time.monotonic() - started, response.status_code, "Empty response")
+
+        return CheckResult(True, time.monotonic() - started, response.status_code, "")
+    except requests.exceptions.RequestException as exc:
+        return CheckResult(False, time.monotonic() - started, response.status_code, type(exc).__name__)
+    finally:
+        http.finish(response)
+
+
+def check_streams(
+    urls,
+    on_result,
+    http=None,
+    max_workers=DEFAULT_MAX_WORKERS,
+    per_host_limit=DEFAULT_PER_HOST_LIMIT,
+    check=check_stream,
+):
+    '''Check ``(key, url)`` pairs concurrently, calling ``on_result(key, result, completed)`` from worker threads.
+
+    A PooledHttp sized for ``per_host_limit`` is created (and closed) when
+    ``http`` is not given. ``check(http, url, timeout)`` checks one stream.
+    Returns the ConcurrentChecker that ran the jobs.
+    '''
+    owns_http = http is None
+    if owns_http:
+        from http_pool import PooledHttp
+
+        http = PooledHttp(per_host=per_host_limit)
+    checker = ConcurrentChecker(
+        lambda url, timeout: check(http, url, timeout), max_workers=max_workers, per_host_limit=per_host_limit
+    )
+    try:
+        checker.run(urls, on_result)
+    finally:
+        if owns_http:
+            http.close()
+    return checker
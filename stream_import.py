@@ -0,0 +1,292 @@
+'''Streaming import of stations from .sii, JSON and CSV files, merged into an existing list.'''
+
+import codecs
+import csv
+import json
+import os
+from collections import namedtuple
+
+from check_cache import normalize_url
+from dedupe import canonical_url, mirror_key
+from sii_parser import DEFAULT_EXTRA, WARNING, Diagnostic, StreamRecord, decode_line, parse_sii_lines, record_to_stream
+from stream_core import WORKING, validate_stream
+
+KEEP_EXISTING = "keep-existing"
+PREFER_NEWEST = "prefer-newest"
+PREFER_WORKING = "prefer-working"
+CONFLICT_RULES = (KEEP_EXISTING, PREFER_NEWEST, PREFER_WORKING)
+
+# Column or key names accepted for each stream field, in order of preference (matched case-insensitively)
+FIELD_ALIASES = {
+    "url": ("url_resolved", "url", "stream_url", "streamurl", "stream"),
+    "name": ("name", "title", "station"),
+    "genre": ("genre", "tags", "category"),
+    "language": ("language", "languagecodes", "lang", "countrycode", "country"),
+    "bitrate": ("bitrate", "br", "kbps"),
+    "extra": ("extra",),
+}
+
+SII_EXTENSIONS = (".sii",)
+JSON_EXTENSIONS = (".json", ".jsonl", ".ndjson")
+CSV_EXTENSIONS = (".csv", ".tsv")
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# The game splits entries on | and ", so they are swapped for look-alikes in imported names
+TEXT_REPLACEMENTS = str.maketrans({"|": "/", '"': "'"})
+
+# A merge decision: ``target`` is None for a new stream, else the key of the stream it replaces
+MergeAction = namedtuple("MergeAction", "target stream")
+
+
+def source_kind(path):
+    '''Return "sii", "json" or "csv" for a file name, or None if it isn't a supported source.'''
+    extension = os.path.splitext(path)[1].lower()
+    if extension in SII_EXTENSIONS:
+        return "sii"
+    if extension in JSON_EXTENSIONS:
+        return "json"
+    if extension in CSV_EXTENSIONS:
+        return "csv"
+    return None
+
+
+def iter_raw_lines(path, on_bytes=None):
+    '''Yield decoded lines from ``path`` (a leading BOM is dropped), reporting bytes read to ``on_bytes``.'''
+    with open(path, "rb") as f:
+        first = True
+        for raw_line in f:
+            if on_bytes is not None:
+                on_bytes(len(raw_line))
+            line = decode_line(raw_line)
+            if first:
+                line = line.lstrip("\ufeff")
+                first = False
+            yield line
+
+
+def iter_raw_chunks(path, on_bytes=None):
+    '''Yield decoded text chunks from ``path``, reporting bytes read to ``on_bytes``.'''
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if on_bytes is not None:
+                on_bytes(len(chunk))
+            if not chunk:
+                yield decoder.decode(b"", final=True)
+                return
+            yield decoder.decode(chunk)
+
+
+def iter_json_values(chunks):
+    '''Yield the objects of a JSON array, a JSON Lines file or an object wrapping a list, one at a time.
+
+    Only one array element is held in memory at a time for arrays and JSON
+    Lines; an object wrapping the list has to be read whole.
+    '''
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    in_array = False
+    finished = False
+    chunks = iter(chunks)
+
+    while True:
+        while position < len(buffer) and (buffer[position].isspace() or (in_array and buffer[position] == ",")):
+            position += 1
+        if position >= len(buffer):
+            if finished:
+                return
+            buffer = buffer[position:] + next(chunks, "")
+            position = 0
+            if not buffer:
+                finished = True
+            continue
+        if buffer[position] == "[" and not in_array:
+            in_array = True
+            position += 1
+            continue
+        if buffer[position] == "]" and in_array:
+            in_array = False
+            position += 1
+            continue
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            more = next(chunks, None)
+            if more is None:
+                raise
+            buffer = buffer[position:] + more
+            position = 0
+            continue
+        position = end
+        wrapped = None
+        if isinstance(value, dict) and not in_array and not _field(value, "url"):
+            # A wrapper such as {"stations": [...]}: use the first list of objects in it
+            wrapped = next(
+                (item for item in value.values() if isinstance(item, list) and item and isinstance(item[0], dict)), None
+            )
+        if wrapped is not None:
+            yield from wrapped
+        elif isinstance(value, list):
+            yield from value
+        else:
+            yield value
+
+
+def _field(mapping, field):
+    lowered = {str(key).strip().lower(): value for key, value in mapping.items()}
+    for alias in FIELD_ALIASES[field]:
+        value = lowered.get(alias)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            value = ",".join(str(item) for item in value)
+        value = str(value).strip()
+        if value:
+            return value
+    return ""
+
+
+def mapping_to_stream(mapping):
+    '''Convert a JSON object or CSV row to a stream dict, or return None if it has no URL.'''
+    url = _field(mapping, "url")
+    if not url:
+        return None
+    bitrate = _field(mapping, "bitrate")
+    try:
+        bitrate = str(int(float(bitrate)))
+    except ValueError:
+        bitrate = "0"
+    return {
+        "url": url,
+        "name": (_field(mapping, "name") or url).translate(TEXT_REPLACEMENTS),
+        # Station dumps often list several comma-separated tags; the first is the main genre
+        "genre": _field(mapping, "genre").split(",")[0].strip().translate(TEXT_REPLACEMENTS),
+        "language": _field(mapping, "language").split(",")[0].strip().translate(TEXT_REPLACEMENTS),
+        "bitrate": bitrate,
+        "extra": _field(mapping, "extra") or DEFAULT_EXTRA,
+    }
+
+
+def iter_source(path, on_bytes=None):
+    '''Yield stream dicts and Diagnostics from a .sii, JSON or CSV file without reading it whole.
+
+    Raises OSError if the file can't be read and ValueError for an unsupported
+    file type or malformed JSON.
+    '''
+    kind = source_kind(path)
+    if kind == "sii":
+        for item in parse_sii_lines(iter_raw_lines(path, on_bytes)):
+            if isinstance(item, StreamRecord):
+                yield record_to_stream(item)
+            elif isinstance(item, Diagnostic):
+                yield item
+        return
+
+    if kind == "json":
+        values = iter_json_values(iter_raw_chunks(path, on_bytes))
+    elif kind == "csv":
+        lines = iter_raw_lines(path, on_bytes)
+        dialect = "excel-tab" if path.lower().endswith(".tsv") else "excel"
+        values = csv.DictReader(lines, dialect=dialect)
+    else:
+        raise ValueError(f"Unsupported file type: {os.path.basename(path)}")
+
+    for number, value in enumerate(values, start=1):
+        stream = mapping_to_stream(value) if isinstance(value, dict) else None
+        if stream is None:
+            yield Diagnostic(0, WARNING, f"Entry {number} has no stream URL and was skipped")
+        else:
+            yield stream
+
+
+class StreamMerger:
+    '''Decides, stream by stream, how imported streams merge into a list.
+
+    Streams are matched on ``normalize_url``, so an import never adds a second
+    copy of a stream already in the list or earlier in the import. When one
+    does match, ``rule`` picks the winner:
+
+    - KEEP_EXISTING keeps the stream already in the list.
+    - PREFER_NEWEST takes the copy from the most recently modified source.
+    - PREFER_WORKING takes the imported copy if its last check worked and the
+      current one's didn't.
+
+    Streams that only look alike (same ``canonical_url`` or ``mirror_key``)
+    may be different stations, so they are added and listed in ``possible``
+    as ``(imported url, url already known)`` pairs for the user to review.
+    Streams that fail ``validate_stream`` are never merged; they are listed
+    in ``rejected`` as ``(imported url, error)`` pairs.
+    '''
+
+    def __init__(self, rule=KEEP_EXISTING):
+        if rule not in CONFLICT_RULES:
+            raise ValueError(f"Unknown conflict rule: {rule}")
+        self.rule = rule
+        self.added = 0
+        self.replaced = 0
+        self.skipped = 0
+        self.possible = []
+        self.rejected = []
+        self._known = {}
+        self._similar = {}
+
+    def add_existing(self, key, url, status="", modified=0.0):
+        '''Register a stream already in the list under the caller's ``key`` (e.g. its id).'''
+        self._known.setdefault(normalize_url(url), (key, modified, status))
+        self._remember_similar(url)
+
+    def _remember_similar(self, url):
+        for similar_key in (canonical_url(url), mirror_key(url)):
+            if similar_key is not None:
+                self._similar.setdefault(similar_key, url)
+
+    def _find_similar(self, url):
+        for similar_key in (canonical_url(url), mirror_key(url)):
+            if similar_key is not None and similar_key in self._similar:
+                return self._similar[similar_key]
+        return None
+
+    def merge(self, stream, modified=0.0, status="", new_key=None):
+        '''Return a MergeAction for an imported stream, or None to skip it.
+
+        ``new_key`` is the key the stream will be known by if it is added.
+        '''
+        error = validate_stream(stream)
+        if error:
+            self.rejected.append((stream["url"], error))
+            return None
+        url_key = normalize_url(stream["url"])
+        known = self._known.get(url_key)
+        if known is None:
+            similar = self._find_similar(stream["url"])
+            if similar is not None:
+                self.possible.append((stream["url"], similar))
+            self._known[url_key] = (new_key, modified, status)
+            self._remember_similar(stream["url"])
+            self.added += 1
+            return MergeAction(None, stream)
+
+        key, known_modified, known_status = known
+        if self.rule == PREFER_NEWEST:
+            wins = modified > known_modified
+        elif self.rule == PREFER_WORKING:
+            wins = status == WORKING and known_status != WORKING
+        else:
+            wins = False
+        if not wins:
+            self.skipped += 1
+            return None
+        self._known[url_key] = (key, modified, status)
+        self.replaced += 1
+        return MergeAction(key, stream)
+
+    def summary(self):
+        text = f"{self.added} added, {self.replaced} replaced, {self.skipped} duplicates skipped"
+        if self.rejected:
+            text += f", {len(self.rejected)} invalid rejected"
+        if self.possible:
+            text += f", {len(self.possible)} added that may duplicate another stream"
+        return text
@@ -1,40 +1,257 @@
 
+import time
+
+# Taken before the other imports so the startup report includes them
+STARTUP_STARTED = time.perf_counter()
+
 import importlib
+import bisect
 import json
+import logging
 import os
+import queue
 import shutil
 import tkinter as tk
 from datetime import datetime
 from tkinter import filedialog, messagebox, ttk
-import requests
+import sys
 import threading
-import vlc
-from urllib.parse import urlparse
+import multiprocessing
+
+from check_cache import DEFAULT_CACHE_PATH, DEFAULT_TTL_HOURS, CheckCache, is_fresh, normalize_url
+from deep_verify import DEFAULT_DECODE_SECONDS, DEFAULT_DECODE_WORKERS, DecoderPool, describe_verify, verify_stream
+from dedupe import MIRROR_DUPLICATE, URL_DUPLICATE, find_duplicates
+from edit_journal import ADD, DEFAULT_JOURNAL_PATH, DELETE, EDIT, EditJournal, file_signature, read_journal, values_stream
+from file_watcher import FileWatcher, diff_streams
+from instrumentation import (
+    DEFAULT_METRICS_PATH, FILTER, LOAD_PARSE, OPERATIONS, SORT, UPDATE_TREEVIEW, VLC_START, metrics, timing_rows
+)
+from playback_engine import DEFAULT_NETWORK_CACHING_MS, PlaybackEngine
+from search_index import SearchIndex
+from sii_parser import FIELDS, REPLACEMENT_CHAR, StreamCount, StreamRecord, parse_sii_file, record_to_stream
+from sort_order import SortOrder
+from stream_checker import DEFAULT_MAX_WORKERS, DEFAULT_PER_HOST_LIMIT, ConcurrentChecker, host_key
+from stream_core import (
+    CHECK_TIMEOUT, WORKING, check_stream, is_valid_url, load_streams, status_text, validate_stream, write_sii
+)
+from stream_import import CONFLICT_RULES, KEEP_EXISTING, PREFER_NEWEST, PREFER_WORKING, StreamMerger, iter_source
+from stream_probe import describe_probe, probe_stream, suggest_corrections
+from stream_store import StreamStore
+from uptime_monitor import (
+    DEFAULT_CHECKS_PER_MINUTE, DEFAULT_HISTORY_PATH, DEFAULT_INTERVAL_MINUTES, UptimeMonitor, UptimeStore
+)
+
+IMPORTS_FINISHED = time.perf_counter()
+
+# How often queued worker results are applied to the UI
+UI_PUMP_INTERVAL_MS = 75
+
+# Filtering waits this long after the last keystroke before refreshing the list
+FILTER_DEBOUNCE_MS = 150
+
+# Parsed streams are handed to the UI in batches of this size while a file loads
+LOAD_BATCH_SIZE = 500
+
+# A change to the open file noticed during a load, import or save is looked at again after this long
+WATCH_RETRY_MS = 1000
+
+# Closing waits at most this long for checks still running before closing the cache and connections
+CLOSE_WAIT_SECONDS = 5.0
+
+# At most this many parse problems are listed after loading a file
+MAX_REPORTED_DIAGNOSTICS = 20
+
+# Files that can be merged into the current list
+IMPORT_FILETYPES = [
+    ("Station lists", "*.sii *.json *.jsonl *.ndjson *.csv *.tsv"),
+    ("SII Files", "*.sii"),
+    ("JSON Files", "*.json *.jsonl *.ndjson"),
+    ("CSV Files", "*.csv *.tsv"),
+]
+
+# Operations that can be captured with cProfile; VLC start-up is timed by callbacks, not a timed block
+PROFILED_OPERATIONS = tuple(operation for operation in OPERATIONS if operation != VLC_START)
+
+# Labels for the import conflict rules, in the order they are offered
+CONFLICT_RULE_LABELS = (
+    (KEEP_EXISTING, "Keep the stream already in the list"),
+    (PREFER_NEWEST, "Take the copy from the most recently modified file"),
+    (PREFER_WORKING, "Take the imported copy if it works and the current one doesn't"),
+)
+
+# Rows kept as real treeview items above and below the visible page
+VIRTUAL_OVERSCAN = 50
+
+# Assumed number of visible rows until the treeview reports its real page size
+DEFAULT_PAGE_SIZE = 40
+
+# Above this many out-of-place rows it's cheaper to move every row than to compute targeted moves
+MAX_TARGETED_MOVES = 64
+
+# Columns filled in by the uptime monitor, and headings that aren't just the column name
+MONITOR_COLUMNS = ("uptime", "p50", "p95", "last_failure")
+COLUMN_TITLES = {"uptime": "Uptime %", "p50": "P50 ms", "p95": "P95 ms", "last_failure": "Last Failure"}
+
+# Monitor results are shown in batches at most this often
+MONITOR_REFRESH_MS = 2000
+
+# Timings of the last start, by phase, so cold-start regressions can be compared
+STARTUP_REPORT_PATH = os.path.join(os.path.expanduser("~"), ".ets2_radio_utility_startup.json")
+
+# Unexpected errors go here; the packaged app has no console to print them to
+ERROR_LOG_PATH = os.path.join(os.path.expanduser("~"), ".ets2_radio_utility_errors.log")
+
+log = logging.getLogger("ets2_radio_utility")
+
+
+def stable_items(sequence):
+    '''Return the items of a longest increasing subsequence of ``sequence`` as a set.'''
+    tails = []
+    tail_positions = []
+    previous = [-1] * len(sequence)
+    for i, value in enumerate(sequence):
+        j = bisect.bisect_left(tails, value)
+        if j == len(tails):
+            tails.append(value)
+            tail_positions.append(i)
+        else:
+            tails[j] = value
+            tail_positions[j] = i
+        previous[i] = tail_positions[j - 1] if j else -1
+
+    result = set()
+    k = tail_positions[-1] if tail_positions else -1
+    while k != -1:
+        result.add(sequence[k])
+        k = previous[k]
+    return result
 
 class StreamManagerApp:
-    def __init__(self, root):
+    def __init__(self, root, exit_after_startup=False):
+        self.startup_timings = [("imports", IMPORTS_FINISHED - STARTUP_STARTED)]
+        self.startup_phase_started = IMPORTS_FINISHED
+        self.startup_pending = True
+        self.exit_after_startup = exit_after_startup
+        self.mark_startup_phase("tk init")
         self.root = root
         self.root.title("Stream Manager")
-        self.streams = []
+        self.streams = StreamStore()
+        self.search_index = SearchIndex()
+        self.filter_job = None
         self.file_path = ""
+        self.file_signature = None
+        self.unsaved_changes = False
+        self.watch_file = True
+        self.watcher = FileWatcher(self.on_file_changed)
         self.statuses = {}
-        self.sort_by = None
-        self.sort_reverse = False
+        self.displayed_rows = {}
+        self.displayed_order = []
+        self.visible_ids = []
+        self.view_top = 0
+        self.window_start = 0
+        self.page_size = DEFAULT_PAGE_SIZE
+        self.render_job = None
+        self.selected_id = None
+        self.sort_order = SortOrder(self.cell_value, self.streams.ids)
         self.is_testing_all = False
+        self.is_loading = False
+        self.is_saving = False
+        self.load_generation = 0
+        self.import_ids = []
+        self.import_rule = KEEP_EXISTING
+        self.checker = None
+        self.test_all_worker = None
+        self.check_workers = DEFAULT_MAX_WORKERS
+        self.check_per_host = DEFAULT_PER_HOST_LIMIT
+        self.check_ttl_hours = DEFAULT_TTL_HOURS
+        self.deep_verify = False
+        self.deep_verify_seconds = DEFAULT_DECODE_SECONDS
+        self.deep_verify_workers = DEFAULT_DECODE_WORKERS
+        self.decoder_pool = None
         self.settings_path = os.path.join(os.path.expanduser("~"), ".ets2_radio_utility_config.json")
+        self.check_cache = CheckCache(DEFAULT_CACHE_PATH)
+        self.journal = EditJournal(DEFAULT_JOURNAL_PATH)
         self.vlc_module = None
-        self.vlc_instance = None
-        self.player = None
+        self.playback_engine = None
+        self.playback_lock = threading.Lock()
         self.playback_thread = None
-        self.currently_playing_index = None
+        self.currently_playing_id = None
         self.playback_generation = 0
+        self.network_caching_ms = DEFAULT_NETWORK_CACHING_MS
+        self.prebuffer_enabled = False
+        self.last_switch_latency = None
+        self.reopen_last_file = True
+        self.uptime_store = None
+        self.monitor = None
+        self.stopping_monitors = []
+        self.monitor_enabled = False
+        self.monitor_interval_minutes = DEFAULT_INTERVAL_MINUTES
+        self.monitor_checks_per_minute = DEFAULT_CHECKS_PER_MINUTE
+        self.monitor_changed_urls = set()
+        self.monitor_refresh_job = None
+        self.ui_queue = queue.Queue()
+        # Created on the first check so requests isn't imported before the window appears
+        self.http = None
+        self.http_lock = threading.Lock()
 
         self.load_settings()
+        self.mark_startup_phase("settings load")
 
         # Create GUI elements
         self.create_widgets()
+        self.mark_startup_phase("widget creation")
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(UI_PUMP_INTERVAL_MS, self.pump_ui_queue)
+        self.root.after_idle(self.on_window_shown)
+
+    def mark_startup_phase(self, name):
+        '''Record how long the startup phase that just ended took'''
+        now = time.perf_counter()
+        self.startup_timings.append((name, now - self.startup_phase_started))
+        self.startup_phase_started = now
+
+    def on_window_shown(self):
+        '''Start optional work only once the window is on screen'''
+        self.mark_startup_phase("window shown")
+        if self.monitor_enabled:
+            self.start_monitor()
+        if self.reopen_last_file and self.file_path and os.path.isfile(self.file_path):
+            self.open_file(self.file_path)
+        else:
+            self.finish_startup()
+
+    def finish_startup(self, last_phase=None):
+        '''Write the startup timing report once the window and last file are ready'''
+        if not self.startup_pending:
+            return
+        self.startup_pending = False
+        if last_phase:
+            self.mark_startup_phase(last_phase)
+        total = time.perf_counter() - STARTUP_STARTED
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "total": total,
+            "phases": dict(self.startup_timings),
+            "streams": len(self.streams),
+        }
+        try:
+            with open(STARTUP_REPORT_PATH, "w") as f:
+                json.dump(report, f, indent=2)
+        except OSError:
+            pass
+        if self.exit_after_startup:
+            print(json.dumps(report, indent=2))
+            self.on_close()
+
+    def get_http(self):
+        '''Return the shared HTTP session, importing requests on first use'''
+        with self.http_lock:
+            if self.http is None:
+                from http_pool import PooledHttp
+
+                self.http = PooledHttp(per_host=self.check_per_host)
+            return self.http
 
     def create_widgets(self):
         '''Setup the layout and widgets'''
@@ -42,7 +259,14 @@ class StreamManagerApp:
         top_frame.pack(fill=tk.X, pady=5)
 
         tk.Button(top_frame, text="Load .sii File", command=self.load_file).pack(side=tk.LEFT, padx=5)
+        tk.Button(top_frame, text="Import / Merge...", command=self.import_files).pack(side=tk.LEFT, padx=5)
         tk.Button(top_frame, text="Save Changes", command=self.save_file).pack(side=tk.LEFT, padx=5)
+        tk.Button(top_frame, text="Find Duplicates", command=self.find_duplicate_streams).pack(side=tk.LEFT, padx=5)
+        self.watch_var = tk.BooleanVar(value=self.watch_file)
+        tk.Checkbutton(
+            top_frame, text="Reload when changed on disk", variable=self.watch_var, command=self.toggle_watch
+        ).pack(side=tk.LEFT, padx=5)
+        tk.Button(top_frame, text="Diagnostics", command=self.show_diagnostics).pack(side=tk.RIGHT, padx=5)
 
         filter_frame = tk.LabelFrame(self.root, text="Filter Streams")
         filter_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -57,24 +281,31 @@ class StreamManagerApp:
         tk.Entry(filter_frame, textvariable=self.genre_filter, width=20).grid(row=0, column=3, padx=5, pady=2)
         tk.Label(filter_frame, text="Language:").grid(row=0, column=4, padx=5, pady=2, sticky="e")
         tk.Entry(filter_frame, textvariable=self.language_filter, width=20).grid(row=0, column=5, padx=5, pady=2)
-        tk.Button(filter_frame, text="Apply", command=self.update_treeview).grid(row=0, column=6, padx=5, pady=2)
+        tk.Button(filter_frame, text="Apply", command=self.apply_filters).grid(row=0, column=6, padx=5, pady=2)
+        for variable in (self.name_filter, self.genre_filter, self.language_filter):
+            variable.trace_add("write", self.schedule_filter)
 
         tree_frame = tk.Frame(self.root)
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-        columns = ("name", "url", "genre", "language", "bitrate", "extra", "status")
+        columns = ("name", "url", "genre", "language", "bitrate", "extra", "status") + MONITOR_COLUMNS
         self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="browse")
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
         for col in columns:
-            self.tree.heading(col, text=col.title(), command=lambda c=col: self.sort_by_column(c))
+            self.tree.heading(col, text=COLUMN_TITLES.get(col, col.title()), command=lambda c=col: self.sort_by_column(c))
             self.tree.column(col, width=120, anchor="w")
         self.tree.column("url", width=220)
         self.tree.column("status", width=120)
+        for col in ("uptime", "p50", "p95"):
+            self.tree.column(col, width=70, anchor="e")
+        self.tree.bind("<Shift-Button-1>", self.on_shift_click_heading)
 
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # The scrollbar spans the whole filtered list; the treeview only holds the rows around the view
+        self.scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.on_scrollbar)
+        self.tree.configure(yscrollcommand=self.on_tree_scroll)
+        self.tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         button_frame = tk.Frame(self.root)
         button_frame.pack(fill=tk.X, pady=5)
@@ -83,6 +314,20 @@ class StreamManagerApp:
         tk.Button(button_frame, text="Play", command=self.play_selected_stream).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Stop", command=self.stop_playback).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Test All", command=self.test_all_streams).pack(side=tk.LEFT, padx=5)
+        self.pause_button = tk.Button(button_frame, text="Pause", command=self.toggle_pause_testing, state=tk.DISABLED)
+        self.pause_button.pack(side=tk.LEFT)
+        self.cancel_button = tk.Button(button_frame, text="Cancel", command=self.cancel_testing, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.prebuffer = tk.BooleanVar(value=self.prebuffer_enabled)
+        tk.Checkbutton(button_frame, text="Pre-buffer neighbours", variable=self.prebuffer).pack(side=tk.LEFT)
+        self.only_stale = tk.BooleanVar(value=False)
+        tk.Checkbutton(button_frame, text="Only stale", variable=self.only_stale).pack(side=tk.LEFT)
+        self.deep_verify_var = tk.BooleanVar(value=self.deep_verify)
+        tk.Checkbutton(button_frame, text="Deep verify", variable=self.deep_verify_var).pack(side=tk.LEFT)
+        self.monitor_var = tk.BooleanVar(value=self.monitor_enabled)
+        tk.Checkbutton(button_frame, text="Monitor uptime", variable=self.monitor_var, command=self.toggle_monitor).pack(
+            side=tk.LEFT
+        )
         tk.Button(button_frame, text="Add New Stream", command=self.add_stream).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Edit Selected Stream", command=self.edit_stream).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Delete Selected Stream", command=self.delete_stream).pack(side=tk.LEFT, padx=5)
@@ -131,13 +376,13 @@ class StreamManagerApp:
 
     def play_selected_stream(self):
         '''Start playback for the selected stream using VLC'''
-        selected = self.tree.selection()
-        if not selected:
+        clicked_at = time.perf_counter()
+        stream_id = self.selected_stream_id()
+        if stream_id is None:
             messagebox.showwarning("No Selection", "Please select a stream to play.")
             return
 
-        index = int(selected[0])
-        url = self.streams[index]['url']
+        url = self.streams[stream_id]['url']
 
         if not url.strip():
             messagebox.showwarning("Missing URL", "The selected stream does not have a URL to play.")
@@ -145,99 +390,114 @@ class StreamManagerApp:
 
         if not self.ensure_vlc_available():
             return
-
-        # Stop any existing playback before starting a new stream
-        self.stop_playback()
+        if self.playback_engine is None:
+            self.playback_engine = PlaybackEngine(self.vlc_module, self.network_caching_ms)
+
+        # The engine swaps media on its existing player, so the old station isn't stopped first
+        previous = self.currently_playing_id
+        if previous is not None and previous != stream_id:
+            self.set_status(previous, "Stopped")
+        self.currently_playing_id = stream_id
         self.playback_generation += 1
         generation = self.playback_generation
-        self.status_label.config(text="Starting playback...")
+        self.status_label.config(text=f"Starting playback: {self.streams[stream_id]['name']}")
 
+        neighbours = self.neighbour_urls(stream_id) if self.prebuffer.get() else []
         self.playback_thread = threading.Thread(
-            target=self._start_playback, args=(index, url, generation), daemon=True
+            target=self._start_playback, args=(stream_id, url, generation, clicked_at, neighbours), daemon=True
         )
         self.playback_thread.start()
 
-    def _start_playback(self, index, url, generation):
+    def neighbour_urls(self, stream_id):
+        '''URLs of the streams just below and above ``stream_id`` in the current view'''
         try:
-            instance = self.vlc_module.Instance()
-            player = instance.media_player_new()
-            media = instance.media_new(url)
-            player.set_media(media)
-            player.play()
-        except Exception as exc:
-            self.root.after(0, lambda: messagebox.showerror("Playback Error", f"Could not start playback:\n{exc}"))
-            return
-
-        def update_state():
+            position = self.visible_ids.index(stream_id)
+        except ValueError:
+            return []
+        urls = []
+        for offset in (1, -1):
+            if 0 <= position + offset < len(self.visible_ids):
+                urls.append(self.streams[self.visible_ids[position + offset]]['url'])
+        return urls
+
+    def _start_playback(self, stream_id, url, generation, clicked_at, neighbours):
+        def started(latency):
+            self.post_ui(lambda: self.on_playback_started(stream_id, generation, latency))
+
+        def failed(message):
+            self.post_ui(lambda: self.on_playback_failed(stream_id, generation, message))
+
+        with self.playback_lock:
+            # A newer Play or Stop click has already superseded this one
             if generation != self.playback_generation:
-                try:
-                    player.stop()
-                except Exception:
-                    pass
-                try:
-                    instance.release()
-                except Exception:
-                    pass
                 return
+            try:
+                self.playback_engine.play(url, clicked_at, started, failed)
+                self.playback_engine.prebuffer(neighbours)
+            except Exception as exc:
+                self.post_ui(lambda error=exc: self.on_playback_failed(stream_id, generation, str(error)))
 
-            self.vlc_instance = instance
-            self.player = player
-            self.currently_playing_index = index
-            self.statuses[index] = "Playing"
-            self.status_label.config(text=f"Playing: {self.streams[index]['name']}")
-            self.update_treeview()
+    def on_playback_started(self, stream_id, generation, latency):
+        if generation != self.playback_generation or stream_id not in self.streams:
+            return
+        self.last_switch_latency = latency
+        metrics.record(VLC_START, latency)
+        self.status_label.config(text=f"Playing: {self.streams[stream_id]['name']} (started in {latency:.2f} s)")
+        self.set_status(stream_id, "Playing")
 
-        self.root.after(0, update_state)
+    def on_playback_failed(self, stream_id, generation, message):
+        if generation != self.playback_generation:
+            return
+        self.currently_playing_id = None
+        self.status_label.config(text="Playback failed")
+        self.set_status(stream_id, "Playback Error")
+        messagebox.showerror("Playback Error", f"Could not start playback:\n{message}")
 
     def stop_playback(self, update_status=True, increment_generation=True):
-        '''Stop current playback and release VLC resources'''
+        '''Stop current playback; the VLC instance is kept for the next Play'''
         if increment_generation:
             self.playback_generation += 1
+        generation = self.playback_generation
 
-        if self.player:
-            try:
-                self.player.stop()
-            except Exception:
-                pass
-        if self.vlc_instance:
-            try:
-                self.vlc_instance.release()
-            except Exception:
-                pass
+        if self.playback_engine is not None:
+            threading.Thread(target=self._stop_playback, args=(generation,), daemon=True).start()
 
-        if update_status and self.currently_playing_index is not None:
-            self.statuses[self.currently_playing_index] = "Stopped"
-        self.currently_playing_index = None
-        self.player = None
-        self.vlc_instance = None
+        stopped_id = self.currently_playing_id
+        self.currently_playing_id = None
 
         if update_status:
             self.status_label.config(text="Playback stopped")
-            self.update_treeview()
+            if stopped_id is not None:
+                self.set_status(stopped_id, "Stopped")
+
+    def _stop_playback(self, generation):
+        with self.playback_lock:
+            # Skip if Play was pressed again in the meantime; the engine switches by itself
+            if generation == self.playback_generation:
+                self.playback_engine.stop()
 
     def is_valid_url(self, url):
         '''Basic validation to check if a URL looks valid.'''
-        parsed = urlparse(url)
-        return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+        return is_valid_url(url)
 
     def validate_stream(self, stream):
         '''Validate a stream's required fields and format.'''
-        if not stream['url'].strip():
-            return "Stream URL is required."
-        if not self.is_valid_url(stream['url'].strip()):
-            return "Stream URL is not valid."
-        if not stream['name'].strip():
-            return "Stream name is required."
-        if not str(stream['bitrate']).strip():
-            return "Bitrate is required."
-        try:
-            int(stream['bitrate'])
-        except ValueError:
-            return "Bitrate must be a number."
-        return None
+        return validate_stream(stream)
+
+    def is_busy(self, parent=None):
+        '''Warn and return True while a load, import or save is changing or reading the list'''
+        if self.is_loading:
+            messagebox.showwarning("Loading", "Please wait until the file has finished loading.", parent=parent)
+        elif self.is_saving:
+            messagebox.showwarning("Saving", "Please wait until the file has been saved.", parent=parent)
+        else:
+            return False
+        return True
 
     def load_file(self):
         '''Load .sii file and display streams in the listbox'''
+        if self.is_busy():
+            return
         initial_dir = os.path.dirname(self.file_path) if self.file_path else None
         dialog_options = {"filetypes": [("SII Files", "*.sii")]}
         if initial_dir:
@@ -245,147 +505,857 @@ class StreamManagerApp:
         self.file_path = filedialog.askopenfilename(**dialog_options)
         if not self.file_path:
             return
-        
+        self.open_file(self.file_path)
+
+    def open_file(self, path):
+        '''Start loading ``path`` in the background, replacing the current list'''
+        self.file_path = path
         try:
-            with open(self.file_path, 'r') as f:
-                lines = f.readlines()
+            with open(self.file_path, 'rb'):
+                pass
         except OSError as exc:
             messagebox.showerror("File Error", f"Could not read file:\n{exc}")
             self.file_path = ""
+            self.finish_startup("last-file load")
             return
 
-        self.streams = []
-        for line in lines:
-            if 'stream_data[' in line:  # Check if the line contains stream data
-                try:
-                    parts = line.split('"')[1].split('|')
-                    # Ensure that we have all the expected parts before adding the stream
-                    if len(parts) >= 5:
-                        self.streams.append({
-                            'url': parts[0],
-                            'name': parts[1],
-                            'genre': parts[2],
-                            'language': parts[3],
-                            'bitrate': parts[4],
-                            'extra': parts[5] if len(parts) > 5 else "0"  # Default 'extra' to 0 if missing
-                        })
-                    else:
-                        print(f"Warning: Line does not have enough parts - {line}")
-                except IndexError:
-                    print(f"Error parsing line: {line}")
-        
+        try:
+            self.file_signature = file_signature(self.file_path)
+        except OSError:
+            self.file_signature = None
+        if self.watch_file:
+            self.watcher.watch(self.file_path, self.file_signature)
+
+        self.load_generation += 1
+        self.is_loading = True
+        self.unsaved_changes = False
+        self.streams.clear()
         self.statuses = {}
+        self.search_index.clear()
+        self.sort_order.invalidate()
+        self.clear_treeview()
+        self.progress.config(maximum=1, value=0)
+        self.status_label.config(text="Loading streams...")
+        threading.Thread(
+            target=self.load_file_thread, args=(self.file_path, self.load_generation), daemon=True
+        ).start()
+
+    def load_file_thread(self, path, generation):
+        '''Parse the file in the background and hand streams to the UI in batches'''
+        batch = []
+        diagnostics = []
+        try:
+            with metrics.timed(LOAD_PARSE):
+                for item in parse_sii_file(path):
+                    if generation != self.load_generation:
+                        return
+                    if isinstance(item, StreamRecord):
+                        batch.append(record_to_stream(item))
+                        if len(batch) >= LOAD_BATCH_SIZE:
+                            self.post_loaded_batch(generation, batch)
+                            batch = []
+                    elif isinstance(item, StreamCount):
+                        self.post_ui(lambda count=item.count: self.set_load_total(generation, count))
+                    else:
+                        diagnostics.append(item)
+        except OSError as exc:
+            self.post_ui(lambda error=exc: self.finish_loading(generation, diagnostics, error))
+            return
+
+        if batch:
+            self.post_loaded_batch(generation, batch)
+        self.post_ui(lambda: self.finish_loading(generation, diagnostics))
+
+    def post_loaded_batch(self, generation, streams):
+        '''Look up cached check results for a parsed batch and queue it for the UI'''
+        cached = self.check_cache.get_many(stream['url'] for stream in streams)
+        self.post_ui(lambda: self.append_loaded_streams(generation, streams, cached))
+
+    def set_load_total(self, generation, count):
+        '''Size the progress bar from the stream count declared in the file'''
+        if generation == self.load_generation:
+            self.progress.config(maximum=max(count, 1))
+
+    def append_loaded_streams(self, generation, streams, cached=None):
+        '''Add a batch of parsed streams and show the ones matching the filters'''
+        if generation != self.load_generation:
+            return
+
+        added = self.streams.extend(streams)
+        for stream_id in added:
+            stream = self.streams[stream_id]
+            self.search_index.add(stream_id, stream)
+            entry = cached.get(normalize_url(stream['url'])) if cached else None
+            if entry is not None:
+                self.statuses[stream_id] = entry.status
+        filters = self.current_filters()
+        # Rows are appended in file order; finish_loading applies the sort once
+        self.visible_ids.extend(stream_id for stream_id in added if self.matches_filters(stream_id, filters))
+        self.render_window()
+
+        self.progress.config(value=len(self.streams))
+        self.status_label.config(text=f"Loading streams... {len(self.streams)} loaded")
+
+    def finish_loading(self, generation, diagnostics, error=None):
+        '''Finalize a background load and report any parse problems'''
+        if generation != self.load_generation:
+            return
+
+        self.is_loading = False
+        if error is not None:
+            messagebox.showerror("File Error", f"Could not read file:\n{error}")
+            self.file_path = ""
+            self.status_label.config(text="Ready")
+            self.finish_startup("last-file load")
+            return
+
         self.update_treeview()
+        self.progress.config(maximum=max(len(self.streams), 1), value=len(self.streams))
+        self.status_label.config(text=f"Loaded {len(self.streams)} streams")
+        self.save_settings()
+        self.start_journal()
+        self.update_monitor_urls()
+        self.finish_startup("last-file load")
+
+        if diagnostics:
+            details = "\n".join(str(d) for d in diagnostics[:MAX_REPORTED_DIAGNOSTICS])
+            if len(diagnostics) > MAX_REPORTED_DIAGNOSTICS:
+                details += f"\n... and {len(diagnostics) - MAX_REPORTED_DIAGNOSTICS} more"
+            messagebox.showwarning("File Warnings", f"Some lines could not be read cleanly:\n{details}")
+
+    def toggle_watch(self):
+        '''Start or stop watching the open file for changes made by other programs'''
+        self.watch_file = self.watch_var.get()
+        if not self.watch_file:
+            self.watcher.stop()
+        elif self.file_path:
+            # Compared with the version the list shows, so a change made while unwatched is picked up
+            self.watcher.watch(self.file_path, self.file_signature)
         self.save_settings()
 
-    def filtered_streams(self):
-        '''Apply filters to streams'''
-        name_filter = self.name_filter.get().lower()
-        genre_filter = self.genre_filter.get().lower()
-        language_filter = self.language_filter.get().lower()
+    def on_file_changed(self, path):
+        '''Forward a change noticed by the watcher thread to the UI thread'''
+        self.post_ui(lambda: self.check_file_changed(path))
 
-        results = []
-        for idx, stream in enumerate(self.streams):
-            if name_filter and name_filter not in stream['name'].lower():
-                continue
-            if genre_filter and genre_filter not in stream['genre'].lower():
-                continue
-            if language_filter and language_filter not in stream['language'].lower():
+    def check_file_changed(self, path):
+        '''Reload the open file if it no longer matches the version the list was loaded from or saved as'''
+        if not self.watch_file or path != self.file_path:
+            return
+        if self.is_loading or self.is_saving:
+            self.root.after(WATCH_RETRY_MS, lambda: self.check_file_changed(path))
+            return
+        try:
+            signature = file_signature(path)
+        except OSError:
+            return
+        if signature == self.file_signature:
+            return
+        if self.unsaved_changes and not messagebox.askyesno(
+            "File Changed",
+            f"{os.path.basename(path)} was changed by another program.\n"
+            "Reload it? Your unsaved changes will be lost.",
+        ):
+            # Don't ask again for this version; saving will overwrite it
+            self.file_signature = signature
+            return
+
+        self.load_generation += 1
+        self.is_loading = True
+        self.status_label.config(text="File changed on disk, reloading...")
+        threading.Thread(
+            target=self.reload_thread, args=(path, list(self.streams.items()), self.load_generation), daemon=True
+        ).start()
+
+    def reload_thread(self, path, current, generation):
+        '''Re-read the file and diff it against the list in the background'''
+        try:
+            signature = file_signature(path)
+            streams, diagnostics = load_streams(path)
+        except OSError as exc:
+            self.post_ui(lambda error=exc: self.finish_reload(generation, path, error=error))
+            return
+        diff = diff_streams(current, streams)
+        cached = self.check_cache.get_many(
+            [stream['url'] for stream in diff.added] + [stream['url'] for _, stream in diff.updated]
+        )
+        self.post_ui(lambda: self.finish_reload(generation, path, signature, diff, cached, len(diagnostics)))
+
+    def finish_reload(self, generation, path, signature=None, diff=None, cached=None, warnings=0, error=None):
+        '''Apply a reload diff, keeping statuses, selection and rows of the streams that didn't change'''
+        if generation != self.load_generation:
+            return
+
+        self.is_loading = False
+        if error is not None:
+            self.status_label.config(text=f"Could not reload {os.path.basename(path)}: {error}")
+            return
+
+        # Streams that were moved in the file come back as new ids; carry their state over by URL
+        carried = {}
+        for stream_id in diff.removed:
+            carried.setdefault(self.streams[stream_id].url, (stream_id, self.statuses.get(stream_id)))
+            self.streams.remove(stream_id)
+            self.search_index.remove(stream_id)
+            self.statuses.pop(stream_id, None)
+        self.sort_order.remove_many(diff.removed)
+
+        def cached_status(url):
+            entry = cached.get(normalize_url(url))
+            return entry.status if entry is not None else None
+
+        for stream_id, stream in diff.updated:
+            url_changed = self.streams[stream_id].url != stream['url']
+            self.streams.update(stream_id, stream)
+            self.search_index.update(stream_id, stream)
+            self.sort_order.invalidate(stream_id)
+            if url_changed:
+                status = cached_status(stream['url'])
+                if status is None:
+                    self.statuses.pop(stream_id, None)
+                else:
+                    self.statuses[stream_id] = status
+
+        for stream_id in self.streams.extend(diff.added):
+            stream = self.streams[stream_id]
+            self.search_index.add(stream_id, stream)
+            self.sort_order.add(stream_id)
+            old_id, status = carried.pop(stream.url, (None, None))
+            status = status or cached_status(stream.url)
+            if status is not None:
+                self.statuses[stream_id] = status
+            if old_id is not None and old_id == self.selected_id:
+                self.selected_id = stream_id
+            if old_id is not None and old_id == self.currently_playing_id:
+                self.currently_playing_id = stream_id
+        if self.selected_id is not None and self.selected_id not in self.streams:
+            self.selected_id = None
+
+        self.file_signature = signature
+        self.unsaved_changes = False
+        self.journal.start(path, list(self.streams.ids()), self.streams.next_id)
+        self.update_treeview()
+        self.update_monitor_urls()
+        summary = (
+            f"Reloaded {os.path.basename(path)}: {len(diff.updated)} changed, "
+            f"{len(diff.added)} added, {len(diff.removed)} removed"
+        )
+        if warnings:
+            summary += f", {warnings} lines unreadable"
+        self.status_label.config(text=summary)
+
+    def import_files(self):
+        '''Pick .sii, JSON or CSV files to merge into the current list'''
+        if self.is_busy():
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Import / Merge")
+        tk.Label(dialog, text="Files to import, in order:").pack(anchor="w", padx=5, pady=(5, 0))
+        sources = tk.Listbox(dialog, width=80, height=8, selectmode=tk.EXTENDED)
+        sources.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        def add_files():
+            options = {"parent": dialog, "filetypes": IMPORT_FILETYPES}
+            if self.file_path:
+                options["initialdir"] = os.path.dirname(self.file_path)
+            listed = set(sources.get(0, tk.END))
+            for path in filedialog.askopenfilenames(**options):
+                if path not in listed:
+                    sources.insert(tk.END, path)
+                    listed.add(path)
+
+        def remove_selected():
+            for index in reversed(sources.curselection()):
+                sources.delete(index)
+
+        file_frame = tk.Frame(dialog)
+        file_frame.pack(fill=tk.X, padx=5)
+        tk.Button(file_frame, text="Add Files...", command=add_files).pack(side=tk.LEFT, padx=5)
+        tk.Button(file_frame, text="Remove", command=remove_selected).pack(side=tk.LEFT, padx=5)
+
+        rule = tk.StringVar(value=self.import_rule)
+        rule_frame = tk.LabelFrame(dialog, text="When a stream is already in the list")
+        rule_frame.pack(fill=tk.X, padx=5, pady=5)
+        for value, label in CONFLICT_RULE_LABELS:
+            tk.Radiobutton(rule_frame, text=label, variable=rule, value=value).pack(anchor="w")
+
+        def start():
+            paths = list(sources.get(0, tk.END))
+            if not paths:
+                messagebox.showwarning("No Files", "Add at least one file to import.", parent=dialog)
+                return
+            self.import_rule = rule.get()
+            dialog.destroy()
+            self.start_import(paths, self.import_rule)
+
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(fill=tk.X, pady=5)
+        tk.Button(button_frame, text="Import", command=start).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+
+    def start_import(self, paths, rule):
+        '''Merge streams from ``paths`` into the list in the background'''
+        if self.is_busy():
+            return
+        total = 0
+        for path in paths:
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        try:
+            list_modified = os.path.getmtime(self.file_path) if self.file_path else 0.0
+        except OSError:
+            list_modified = 0.0
+        existing = [(stream_id, stream.url, self.statuses.get(stream_id, "")) for stream_id, stream in self.streams.items()]
+
+        self.load_generation += 1
+        self.is_loading = True
+        self.import_ids = []
+        self.progress.config(maximum=max(total, 1), value=0)
+        self.status_label.config(text="Importing streams...")
+        threading.Thread(
+            target=self.import_thread,
+            args=(paths, rule, existing, list_modified, self.load_generation),
+            daemon=True,
+        ).start()
+
+    def import_thread(self, paths, rule, existing, list_modified, generation):
+        '''Read import sources one at a time and hand merge decisions to the UI in batches'''
+        merger = StreamMerger(rule)
+        for stream_id, url, status in existing:
+            merger.add_existing(("list", stream_id), url, status, list_modified)
+        bytes_read = [0]
+        added = [0]
+        diagnostics = []
+
+        def on_bytes(count):
+            bytes_read[0] += count
+
+        def flush(batch, modified):
+            # Cached results are needed both to pick working copies and to show statuses
+            cached = self.check_cache.get_many(stream['url'] for stream in batch)
+            additions = []
+            replacements = []
+            for stream in batch:
+                entry = cached.get(normalize_url(stream['url']))
+                # Added streams are numbered in order; the UI maps the numbers to their ids
+                action = merger.merge(stream, modified, entry.status if entry else "", ("new", added[0]))
+                if action is None:
+                    continue
+                if action.target is None:
+                    additions.append(stream)
+                    added[0] += 1
+                else:
+                    replacements.append(action)
+            done = bytes_read[0]
+            self.post_ui(lambda: self.apply_import_batch(generation, additions, replacements, cached, done))
+
+        for path in paths:
+            name = os.path.basename(path)
+            try:
+                modified = os.path.getmtime(path)
+                batch = []
+                for item in iter_source(path, on_bytes):
+                    if generation != self.load_generation:
+                        return
+                    if isinstance(item, dict):
+                        batch.append(item)
+                        if len(batch) >= LOAD_BATCH_SIZE:
+                            flush(batch, modified)
+                            batch = []
+                    else:
+                        diagnostics.append(f"{name}: {item}")
+                if batch:
+                    flush(batch, modified)
+            except (OSError, ValueError) as exc:
+                diagnostics.append(f"{name}: could not be read ({exc})")
+
+        diagnostics.extend(f"{url}: {error}" for url, error in merger.rejected)
+        self.post_ui(lambda: self.finish_import(generation, merger.summary(), diagnostics, merger.possible))
+
+    def apply_import_batch(self, generation, additions, replacements, cached, bytes_read):
+        '''Add and replace one batch of imported streams'''
+        if generation != self.load_generation:
+            return
+
+        added = self.streams.extend(additions)
+        self.import_ids.extend(added)
+        self.journal.record_add(added, additions)
+        self.unsaved_changes = self.unsaved_changes or bool(added or replacements)
+        for stream_id in added:
+            stream = self.streams[stream_id]
+            self.search_index.add(stream_id, stream)
+            self.sort_order.add(stream_id)
+            entry = cached.get(normalize_url(stream['url']))
+            if entry is not None:
+                self.statuses[stream_id] = entry.status
+
+        for (kind, key), stream in replacements:
+            stream_id = key if kind == "list" else self.import_ids[key]
+            if stream_id not in self.streams:
                 continue
-            results.append((idx, stream))
-        return results
+            self.streams.update(stream_id, stream)
+            self.journal.record_edit(stream_id, stream)
+            self.search_index.update(stream_id, stream)
+            self.sort_order.invalidate(stream_id)
+            entry = cached.get(normalize_url(stream['url']))
+            if entry is not None:
+                self.statuses[stream_id] = entry.status
+            else:
+                self.statuses.pop(stream_id, None)
+            self.refresh_row(stream_id)
+
+        # New rows go at the end for now; finish_import sorts and re-filters once
+        filters = self.current_filters()
+        self.visible_ids.extend(stream_id for stream_id in added if self.matches_filters(stream_id, filters))
+        self.render_window()
+        self.progress.config(value=bytes_read)
+        self.status_label.config(text=f"Importing streams... {len(self.streams)} in list")
+
+    def finish_import(self, generation, summary, diagnostics, possible=()):
+        '''Re-sort the list after an import and report what changed'''
+        if generation != self.load_generation:
+            return
 
-    def sort_by_column(self, column):
-        '''Toggle sorting for a column'''
-        if self.sort_by == column:
-            self.sort_reverse = not self.sort_reverse
-        else:
-            self.sort_by = column
-            self.sort_reverse = False
+        self.is_loading = False
+        self.import_ids = []
         self.update_treeview()
+        self.update_monitor_urls()
+        self.progress.config(value=self.progress.cget("maximum"))
+        self.status_label.config(text=f"Import finished: {summary}")
+        self.save_settings()
 
-    def update_treeview(self):
-        '''Refresh the treeview with the current streams'''
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        streams = self.filtered_streams()
-        if self.sort_by:
-            key_func = lambda s: s[1].get(self.sort_by, "").lower()
-            streams.sort(key=key_func, reverse=self.sort_reverse)
-
-        for idx, stream in streams:
-            status_text = self.statuses.get(idx, "")
-            values = (
-                stream['name'],
-                stream['url'],
-                stream['genre'],
-                stream['language'],
-                stream['bitrate'],
-                stream['extra'],
-                status_text,
+        if diagnostics:
+            details = "\n".join(diagnostics[:MAX_REPORTED_DIAGNOSTICS])
+            if len(diagnostics) > MAX_REPORTED_DIAGNOSTICS:
+                details += f"\n... and {len(diagnostics) - MAX_REPORTED_DIAGNOSTICS} more"
+            messagebox.showwarning("Import Warnings", f"{summary}.\nSome entries could not be imported:\n{details}")
+        if possible:
+            details = "\n".join(f"{url}\n    looks like {other}" for url, other in possible[:MAX_REPORTED_DIAGNOSTICS])
+            if len(possible) > MAX_REPORTED_DIAGNOSTICS:
+                details += f"\n... and {len(possible) - MAX_REPORTED_DIAGNOSTICS} more"
+            messagebox.showinfo(
+                "Possible Duplicates",
+                f"{summary}.\nThese imported streams were added but look like streams already in the list "
+                f"(use Find Duplicates to review them):\n{details}",
             )
-            self.tree.insert("", tk.END, iid=str(idx), values=values)
+
+    def start_journal(self):
+        '''Offer to restore edits journaled against the file just loaded, then journal new ones'''
+        file_ids = list(self.streams.ids())
+        next_id = self.streams.next_id
+        operations = read_journal(self.journal.path, self.file_path)
+        if not operations or not messagebox.askyesno(
+            "Restore Unsaved Changes?",
+            f"{len(operations)} unsaved changes to this file were kept from an earlier session.\n"
+            "Do you want to restore them?",
+        ):
+            self.journal.start(self.file_path, file_ids, next_id)
+            return
+
+        restored = self.replay_journal(operations, next_id - len(file_ids))
+        self.unsaved_changes = restored > 0
+        # A journal that didn't replay cleanly can't be appended to; start over from the file
+        self.journal.start(self.file_path, file_ids, next_id, resume=restored == len(operations))
+        self.status_label.config(text=f"Loaded {len(self.streams)} streams, restored {restored} unsaved changes")
+
+    def replay_journal(self, operations, first_id):
+        '''Apply journaled operations to the freshly loaded list and return how many applied'''
+        applied = 0
+        added = []
+        for operation in operations:
+            kind = operation.get("op")
+            try:
+                if kind == ADD:
+                    if first_id + operation["id"] != self.streams.next_id:
+                        break
+                    for values in operation["streams"]:
+                        stream = self.streams.add(values_stream(values))
+                        self.search_index.add(stream.id, stream)
+                        added.append(stream.id)
+                elif kind == EDIT:
+                    stream_id = first_id + operation["id"]
+                    if stream_id in self.streams:
+                        stream = self.streams.update(stream_id, values_stream(operation["stream"]))
+                        self.search_index.update(stream_id, stream)
+                        self.statuses.pop(stream_id, None)
+                elif kind == DELETE:
+                    for stream_id in (first_id + ref for ref in operation["ids"]):
+                        if stream_id in self.streams:
+                            self.streams.remove(stream_id)
+                            self.search_index.remove(stream_id)
+                            self.statuses.pop(stream_id, None)
+                else:
+                    break
+            except (KeyError, TypeError, ValueError):
+                break
+            applied += 1
+
+        added = [stream_id for stream_id in added if stream_id in self.streams]
+        cached = self.check_cache.get_many(self.streams[stream_id]['url'] for stream_id in added)
+        for stream_id in added:
+            entry = cached.get(normalize_url(self.streams[stream_id]['url']))
+            if entry is not None:
+                self.statuses[stream_id] = entry.status
+        self.sort_order.invalidate()
+        self.update_treeview()
+        return applied
+
+    def current_filters(self):
+        '''Return the folded name, genre and language filters'''
+        return self.search_index.normalize_query(
+            (self.name_filter.get(), self.genre_filter.get(), self.language_filter.get())
+        )
+
+    def matches_filters(self, stream_id, filters):
+        '''Check an indexed stream against filters from current_filters'''
+        return not any(filters) or self.search_index.matches(stream_id, filters)
+
+    def filtered_streams(self):
+        '''Apply filters to streams'''
+        with metrics.timed(FILTER):
+            matches = self.search_index.search(self.current_filters())
+        if matches is None:
+            return list(self.streams.items())
+        return [(stream_id, self.streams[stream_id]) for stream_id in sorted(matches)]
+
+    def schedule_filter(self, *_):
+        '''Refresh the list shortly after the user stops typing in a filter'''
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(FILTER_DEBOUNCE_MS, self.apply_filters)
+
+    def apply_filters(self):
+        '''Refresh the list for the current filters right away'''
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+            self.filter_job = None
+        self.update_treeview()
+
+    def cell_value(self, column, stream_id):
+        '''Return the raw value shown in a column for a stream'''
+        if column == "status":
+            return self.statuses.get(stream_id, "")
+        if column in MONITOR_COLUMNS:
+            return self.monitor_values(self.streams[stream_id]['url'])[MONITOR_COLUMNS.index(column)]
+        return self.streams[stream_id].get(column, "")
+
+    def sort_by_column(self, column, add=False):
+        '''Toggle sorting for a column, or add it as a secondary sort'''
+        self.sort_order.toggle(column, add=add)
+        self.update_sort_headings()
+        self.update_treeview()
+
+    def on_shift_click_heading(self, event):
+        '''Shift-click on a heading adds that column as a secondary sort'''
+        if self.tree.identify_region(event.x, event.y) != "heading":
+            return None
+        column_id = self.tree.identify_column(event.x)
+        columns = self.tree["columns"]
+        try:
+            column = columns[int(column_id.lstrip("#")) - 1]
+        except (ValueError, IndexError):
+            return None
+        self.sort_by_column(column, add=True)
+        return "break"
+
+    def update_sort_headings(self):
+        '''Show the sort direction and precedence on the column headings'''
+        for column in self.tree["columns"]:
+            text = COLUMN_TITLES.get(column, column.title())
+            found = self.sort_order.direction(column)
+            if found is not None:
+                position, reverse = found
+                text += " \u25bc" if reverse else " \u25b2"
+                if len(self.sort_order.columns) > 1:
+                    text += str(position + 1)
+            self.tree.heading(column, text=text)
+
+    def row_values(self, stream_id, stream):
+        '''Return the treeview values for a stream'''
+        return (
+            stream['name'],
+            stream['url'],
+            stream['genre'],
+            stream['language'],
+            stream['bitrate'],
+            stream['extra'],
+            self.statuses.get(stream_id, ""),
+        ) + self.monitor_values(stream['url'])
+
+    def monitor_values(self, url):
+        '''Return the uptime, p50, p95 and last failure cells for a stream URL'''
+        stats = self.uptime_store.stats(url) if self.uptime_store is not None else None
+        if stats is None:
+            return ("", "", "", "")
+        return (
+            f"{stats.uptime * 100:.1f}",
+            "" if stats.p50 is None else str(stats.p50),
+            "" if stats.p95 is None else str(stats.p95),
+            datetime.fromtimestamp(stats.last_failure).strftime("%Y-%m-%d %H:%M") if stats.last_failure else "",
+        )
+
+    def clear_treeview(self):
+        '''Remove every row from the treeview'''
+        if self.displayed_order:
+            self.tree.delete(*self.displayed_order)
+        self.displayed_rows = {}
+        self.displayed_order = []
+        self.visible_ids = []
+        self.view_top = 0
+        self.window_start = 0
+        self.selected_id = None
+        self.update_scrollbar()
+
+    def refresh_row(self, stream_id):
+        '''Update a single row in place if it is currently displayed'''
+        iid = str(stream_id)
+        if iid not in self.displayed_rows:
+            return
+        values = self.row_values(stream_id, self.streams[stream_id])
+        if self.displayed_rows[iid] != values:
+            self.tree.item(iid, values=values)
+            self.displayed_rows[iid] = values
+
+    def update_treeview(self):
+        '''Recompute the filtered, sorted rows and redraw the visible window'''
+        with metrics.timed(UPDATE_TREEVIEW):
+            with metrics.timed(FILTER):
+                matches = self.search_index.search(self.current_filters())
+            with metrics.timed(SORT):
+                self.visible_ids = self.sort_order.ordered(matches)
+            if self.selected_id is not None and matches is not None and self.selected_id not in matches:
+                self.selected_id = None
+            self.render_window()
+
+    def render_window(self):
+        '''Materialize only the rows around the current view, touching only rows that changed'''
+        if self.render_job is not None:
+            self.root.after_cancel(self.render_job)
+            self.render_job = None
+
+        total = len(self.visible_ids)
+        self.view_top = max(0, min(self.view_top, total - self.page_size))
+        start = max(0, self.view_top - VIRTUAL_OVERSCAN)
+        end = min(total, self.view_top + self.page_size + VIRTUAL_OVERSCAN)
+        window = self.visible_ids[start:end]
+        self.window_start = start
+
+        order = [str(stream_id) for stream_id in window]
+        wanted = set(order)
+        removed = [iid for iid in self.displayed_order if iid not in wanted]
+        if removed:
+            self.tree.delete(*removed)
+            for iid in removed:
+                del self.displayed_rows[iid]
+            self.displayed_order = [iid for iid in self.displayed_order if iid in self.displayed_rows]
+
+        # When the rows we keep are already in order, new rows can go straight to their final position
+        in_place = [iid for iid in order if iid in self.displayed_rows] == self.displayed_order
+        for pos, (iid, stream_id) in enumerate(zip(order, window)):
+            values = self.row_values(stream_id, self.streams[stream_id])
+            current = self.displayed_rows.get(iid)
+            if current is None:
+                self.tree.insert("", pos if in_place else tk.END, iid=iid, values=values)
+                self.displayed_order.append(iid)
+            elif current != values:
+                self.tree.item(iid, values=values)
+            self.displayed_rows[iid] = values
+
+        if in_place:
+            self.displayed_order = order
+        elif self.displayed_order != order:
+            self.reorder_rows(order)
+
+        if order:
+            self.tree.yview_moveto((self.view_top - start) / len(order))
+        selected_iid = str(self.selected_id) if self.selected_id is not None else None
+        if selected_iid in self.displayed_rows and self.tree.selection() != (selected_iid,):
+            self.tree.selection_set(selected_iid)
+        self.update_scrollbar()
+
+    def reorder_rows(self, order):
+        '''Move displayed rows into ``order`` with as few treeview moves as possible'''
+        position = {iid: pos for pos, iid in enumerate(order)}
+        current = self.displayed_order
+        keep = stable_items([position[iid] for iid in current])
+        if len(order) - len(keep) > MAX_TARGETED_MOVES:
+            for pos, iid in enumerate(order):
+                self.tree.move(iid, "", pos)
+        else:
+            # Only move rows outside the longest already-sorted run, each right after its new predecessor
+            for pos, iid in enumerate(order):
+                if pos in keep:
+                    continue
+                current.remove(iid)
+                target = current.index(order[pos - 1]) + 1 if pos else 0
+                current.insert(target, iid)
+                self.tree.move(iid, "", target)
+        self.displayed_order = list(order)
+
+    def update_scrollbar(self):
+        '''Show the view's position within the whole filtered list on the scrollbar'''
+        total = len(self.visible_ids)
+        if not total:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self.view_top / total, min(1.0, (self.view_top + self.page_size) / total))
+
+    def on_scrollbar(self, action, amount, unit=None):
+        '''Scroll the virtual list from the scrollbar'''
+        total = len(self.visible_ids)
+        if action == "moveto":
+            self.view_top = int(float(amount) * total)
+        elif action == "scroll":
+            step = self.page_size if unit == "pages" else 1
+            self.view_top += int(amount) * step
+        self.render_window()
+
+    def on_tree_scroll(self, first, last):
+        '''Follow scrolling inside the treeview (mouse wheel, keyboard) and slide the window when needed'''
+        rows = len(self.displayed_order)
+        first, last = float(first), float(last)
+        if not rows:
+            self.update_scrollbar()
+            return
+        if last - first < 1.0:
+            self.page_size = max(1, round((last - first) * rows))
+        self.view_top = self.window_start + round(first * rows)
+
+        window_end = self.window_start + rows
+        margin = VIRTUAL_OVERSCAN // 2
+        near_start = self.window_start > 0 and self.view_top - self.window_start < margin
+        near_end = window_end < len(self.visible_ids) and window_end - (self.view_top + self.page_size) < margin
+        if (near_start or near_end) and self.render_job is None:
+            self.render_job = self.root.after_idle(self.render_window)
+        self.update_scrollbar()
+
+    def on_tree_select(self, _event=None):
+        '''Remember the selected stream so it survives rows leaving the rendered window'''
+        selected = self.tree.selection()
+        if selected:
+            self.selected_id = int(selected[0])
+
+    def selected_stream_id(self):
+        '''Return the id of the selected stream, or None'''
+        if self.selected_id is None or self.selected_id not in self.streams:
+            return None
+        return self.selected_id
 
     def check_selected_stream(self):
         '''Check if the selected stream URL is functional'''
-        selected = self.tree.selection()
-        if not selected:
+        stream_id = self.selected_stream_id()
+        if stream_id is None:
             messagebox.showwarning("No Selection", "Please select a stream to check.")
             return
 
-        index = int(selected[0])
-        url = self.streams[index]['url']
+        url = self.streams[stream_id]['url']
+
+        if self.deep_verify_var.get():
+            if not self.ensure_vlc_available():
+                return
+            self.status_label.config(text=f"Verifying {self.streams[stream_id]['name']}...")
+            threading.Thread(target=self.verify_stream_thread, args=(stream_id, url), daemon=True).start()
+            return
 
         # Use threading to avoid blocking the UI
-        threading.Thread(target=self.check_stream_thread, args=(index, url), daemon=True).start()
+        threading.Thread(target=self.check_stream_thread, args=(stream_id, url), daemon=True).start()
+
+    def check_stream_thread(self, stream_id, url):
+        '''Threaded function to probe the stream URL in detail'''
+        result = probe_stream(self.get_http(), url)
+        self.record_check(url, result)
+        self.check_cache.flush()
+        self.post_ui(lambda: self.show_stream_check_result(stream_id, url, result))
+
+    def show_stream_check_result(self, stream_id, url, result):
+        '''Display the result of a stream probe on the main UI thread and offer corrections.'''
+        # The list may have changed while the probe ran
+        current = stream_id in self.streams and self.streams[stream_id]['url'] == url
+        if current:
+            self.set_status(stream_id, status_text(result))
+        summary = describe_probe(result)
+        if not result.is_working:
+            messagebox.showwarning("Stream Check", f"The stream is not responding.\n\n{summary}")
+            return
 
-    def check_stream_thread(self, index, url):
-        '''Threaded function to check if the stream URL is functional'''
-        is_working = self.check_stream(url)
-        self.root.after(0, lambda: self.show_stream_check_result(index, is_working))
+        if not current:
+            messagebox.showinfo("Stream Check", f"The stream is working!\n\n{summary}")
+            return
 
-    def show_stream_check_result(self, index, is_working):
-        '''Display the result of a stream check on the main UI thread.'''
-        self.statuses[index] = "Working" if is_working else "Not Responding"
-        self.update_treeview()
-        if is_working:
-            messagebox.showinfo("Stream Check", "The stream is working!")
+        stream = self.streams[stream_id]
+        suggestions = suggest_corrections(stream, result)
+        if not suggestions:
+            messagebox.showinfo("Stream Check", f"The stream is working!\n\n{summary}")
+            return
+
+        changes = "\n".join(f"{field}: {stream[field]} \u2192 {value}" for field, value in suggestions.items())
+        if messagebox.askyesno(
+            "Stream Check",
+            f"The stream is working!\n\n{summary}\n\nSuggested corrections:\n{changes}\n\nApply them?",
+        ) and not self.is_busy():
+            self.update_stream(stream_id, dict(stream, **suggestions))
+
+    def verify_stream_thread(self, stream_id, url):
+        '''Resolve and decode one stream in the background and show what was found'''
+        result = self.verify_stream(url)
+        self.record_check(url, result)
+        self.check_cache.flush()
+        self.post_ui(lambda: self.show_verify_result(stream_id, url, result))
+
+    def show_verify_result(self, stream_id, url, result):
+        '''Show a deep verification result unless the stream was changed or removed meanwhile'''
+        if stream_id not in self.streams or self.streams[stream_id]['url'] != url:
+            self.status_label.config(text=f"Deep Verify of {url} finished after the stream was changed; result not shown")
+            return
+        self.set_status(stream_id, status_text(result))
+        summary = describe_verify(result)
+        if result.is_working:
+            messagebox.showinfo("Deep Verify", f"The stream plays.\n\n{summary}")
         else:
-            messagebox.showwarning("Stream Check", "The stream is not responding.")
+            messagebox.showwarning("Deep Verify", f"The stream does not play.\n\n{summary}")
 
-    def check_stream(self, url):
-        '''Check if the stream URL is functional'''
-        try:
-            with requests.get(url, timeout=(5, 5), stream=True) as response:
-                if response.status_code != 200:
-                    return False
+    def get_decoder_pool(self):
+        '''Return the pool of VLC decoder processes, creating it on first use'''
+        with self.http_lock:
+            if self.decoder_pool is None:
+                self.decoder_pool = DecoderPool(self.deep_verify_workers, self.deep_verify_seconds, self.network_caching_ms)
+            return self.decoder_pool
 
-                try:
-                    next(response.iter_content(chunk_size=1024))
-                except StopIteration:
-                    return False
+    def verify_stream(self, url, timeout=CHECK_TIMEOUT):
+        '''Resolve playlists and decode a few seconds of audio; returns a VerifyResult'''
+        return verify_stream(self.get_http(), self.get_decoder_pool(), url, timeout)
 
-                return True
-        except requests.exceptions.RequestException:
-            return False
+    def record_check(self, url, result):
+        '''Store a check result in the persistent cache and return its status text'''
+        status = status_text(result)
+        self.check_cache.record(url, status, result.latency, result.http_status, result.detail)
+        return status
+
+    def check_stream(self, url, timeout=CHECK_TIMEOUT):
+        '''Check if the stream URL is functional and return a CheckResult'''
+        return check_stream(self.get_http(), url, timeout)
 
     def add_stream(self):
         '''Open a dialog to add a new stream'''
+        if self.is_busy():
+            return
         self.open_stream_dialog("Add New Stream")
 
     def edit_stream(self):
         '''Open a dialog to edit the selected stream'''
-        selected = self.tree.selection()
-        if not selected:
+        if self.is_busy():
+            return
+        stream_id = self.selected_stream_id()
+        if stream_id is None:
             messagebox.showwarning("No Selection", "Please select a stream to edit.")
             return
 
-        index = int(selected[0])
-        stream = self.streams[index]
-        self.open_stream_dialog("Edit Stream", stream, index)
+        stream = self.streams[stream_id]
+        self.open_stream_dialog("Edit Stream", stream, stream_id)
 
-    def open_stream_dialog(self, title, stream=None, index=None):
+    def open_stream_dialog(self, title, stream=None, stream_id=None):
         '''Open a dialog to add or edit a stream'''
         dialog = tk.Toplevel(self.root)
         dialog.title(title)
@@ -440,40 +1410,286 @@ class StreamManagerApp:
             if error:
                 messagebox.showerror("Invalid Input", error)
                 return
-            if index is not None:
-                self.streams[index] = new_stream  # Update existing stream
+            if self.is_busy(parent=dialog):
+                return
+            if stream_id is not None:
+                self.update_stream(stream_id, new_stream)  # Update existing stream
             else:
-                self.streams.append(new_stream)  # Add new stream
-
-            self.update_treeview()
+                self.insert_stream(new_stream)  # Add new stream
             dialog.destroy()
 
         tk.Button(dialog, text="Save", command=save_stream).pack(pady=10)
 
+    def insert_stream(self, stream):
+        '''Add a stream to the list and show it if it matches the filters'''
+        stream_id = self.streams.add(stream).id
+        self.journal.record_add([stream_id], [stream])
+        self.unsaved_changes = True
+        self.search_index.add(stream_id, stream)
+        self.sort_order.add(stream_id)
+        self.update_treeview()
+        self.update_monitor_urls()
+
+    def update_stream(self, stream_id, stream):
+        '''Replace the fields of a stream and refresh everything derived from it'''
+        if stream_id not in self.streams:
+            return
+        self.streams.update(stream_id, stream)
+        self.journal.record_edit(stream_id, stream)
+        self.unsaved_changes = True
+        self.search_index.update(stream_id, stream)
+        self.sort_order.invalidate(stream_id)
+        self.update_treeview()
+        self.update_monitor_urls()
+
     def delete_stream(self):
         '''Delete the selected stream'''
-        selected = self.tree.selection()
-        if not selected:
+        if self.is_busy():
+            return
+        stream_id = self.selected_stream_id()
+        if stream_id is None:
             messagebox.showwarning("No Selection", "Please select a stream to delete.")
             return
 
-        index = int(selected[0])
-        del self.streams[index]
-        self.statuses.pop(index, None)
-        self.statuses = {i if i < index else i - 1: status for i, status in self.statuses.items() if i != index}
+        self.delete_streams([stream_id])
+
+    def delete_streams(self, stream_ids):
+        '''Delete several streams by id and refresh the list once'''
+        stream_ids = [stream_id for stream_id in stream_ids if stream_id in self.streams]
+        self.journal.record_delete(stream_ids)
+        self.unsaved_changes = self.unsaved_changes or bool(stream_ids)
+        for stream_id in stream_ids:
+            self.streams.remove(stream_id)
+            self.search_index.remove(stream_id)
+            self.statuses.pop(stream_id, None)
+        if len(stream_ids) == 1:
+            self.sort_order.remove(stream_ids[0])
+        else:
+            self.sort_order.remove_many(stream_ids)
+        if self.selected_id in stream_ids:
+            self.selected_id = None
         self.update_treeview()
+        self.update_monitor_urls()
+
+    def show_stream(self, stream_id):
+        '''Select a stream in the list and scroll to it, clearing filters that hide it'''
+        if stream_id not in self.streams:
+            return
+        if stream_id not in self.visible_ids:
+            for variable in (self.name_filter, self.genre_filter, self.language_filter):
+                variable.set("")
+            self.apply_filters()
+        self.selected_id = stream_id
+        self.view_top = max(0, self.visible_ids.index(stream_id) - self.page_size // 2)
+        self.render_window()
+
+    def find_duplicate_streams(self):
+        '''Look for duplicate streams in the background and list them grouped'''
+        if not self.streams:
+            messagebox.showwarning("No Data", "No streams to check for duplicates.")
+            return
+        snapshot = [(stream_id, {"url": stream.url, "name": stream.name}) for stream_id, stream in self.streams.items()]
+        self.status_label.config(text="Looking for duplicates...")
+        threading.Thread(target=self.find_duplicates_thread, args=(snapshot,), daemon=True).start()
+
+    def find_duplicates_thread(self, snapshot):
+        started = time.perf_counter()
+        groups = find_duplicates(snapshot)
+        elapsed = time.perf_counter() - started
+        self.post_ui(lambda: self.show_duplicates(groups, elapsed))
+
+    def show_duplicates(self, groups, elapsed):
+        '''Show duplicate groups in a dialog where they can be inspected and removed'''
+        # Streams may have been deleted while the search ran
+        groups = [group._replace(ids=[i for i in group.ids if i in self.streams]) for group in groups]
+        groups = [group for group in groups if len(group.ids) > 1]
+        self.status_label.config(text=f"Found {len(groups)} duplicate groups in {elapsed:.1f} s")
+        if not groups:
+            messagebox.showinfo("Find Duplicates", "No duplicate streams found.")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Duplicates ({len(groups)} groups)")
+        tree = ttk.Treeview(dialog, columns=("url", "status"), selectmode="extended")
+        tree.heading("#0", text="Name")
+        tree.heading("url", text="URL")
+        tree.heading("status", text="Status")
+        tree.column("#0", width=260)
+        tree.column("url", width=360)
+        tree.column("status", width=110)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        labels = {URL_DUPLICATE: "Same stream", MIRROR_DUPLICATE: "Possible mirrors"}
+        kinds = {}
+        for number, group in enumerate(groups):
+            label = labels.get(group.kind, "Similar names")
+            kinds[f"g{number}"] = group.kind
+            parent = tree.insert("", tk.END, iid=f"g{number}", text=f"{label}: {group.key} ({len(group.ids)})", open=True)
+            for stream_id in group.ids:
+                stream = self.streams[stream_id]
+                tree.insert(
+                    parent, tk.END, iid=f"g{number}:{stream_id}", text=stream['name'],
+                    values=(stream['url'], self.statuses.get(stream_id, "")),
+                )
+
+        def selected_streams():
+            return [int(iid.split(":")[1]) for iid in tree.selection() if ":" in iid]
+
+        def show_selected(_event=None):
+            ids = selected_streams()
+            if ids:
+                self.show_stream(ids[0])
+
+        def remove_from_dialog(ids):
+            gone = set(ids)
+            for parent in tree.get_children():
+                for iid in tree.get_children(parent):
+                    if int(iid.split(":")[1]) in gone:
+                        tree.delete(iid)
+                if len(tree.get_children(parent)) < 2:
+                    tree.delete(parent)
+
+        def delete_selected():
+            ids = selected_streams()
+            if not ids:
+                messagebox.showwarning("No Selection", "Select the streams to delete.", parent=dialog)
+                return
+            if self.is_busy(parent=dialog):
+                return
+            self.delete_streams(ids)
+            remove_from_dialog(ids)
+
+        def keep_first():
+            # For each selected group keep its first stream and delete the rest
+            parents = {iid.split(":")[0] for iid in tree.selection()}
+            ids = []
+            for parent in parents:
+                ids.extend(int(iid.split(":")[1]) for iid in tree.get_children(parent)[1:])
+            if not ids:
+                messagebox.showwarning("No Selection", "Select the groups to clean up.", parent=dialog)
+                return
+            uncertain = sum(1 for parent in parents if kinds[parent] != URL_DUPLICATE)
+            if uncertain and not messagebox.askyesno(
+                "Keep First in Group",
+                f"{uncertain} of the selected groups are only possible duplicates (mirror hosts or similar names) "
+                "and may be different stations.\n\nDelete all but the first stream of each anyway?",
+                parent=dialog,
+            ):
+                return
+            if self.is_busy(parent=dialog):
+                return
+            self.delete_streams(ids)
+            remove_from_dialog(ids)
+
+        tree.bind("<Double-1>", show_selected)
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(fill=tk.X, pady=5)
+        tk.Button(button_frame, text="Show in List", command=show_selected).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Delete Selected", command=delete_selected).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Keep First in Group", command=keep_first).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+
+    def show_diagnostics(self):
+        '''Show timings of the hot paths, export them as JSON and arm a cProfile capture'''
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Diagnostics")
+        columns = ("count", "mean_ms", "p50_ms", "p95_ms", "max_ms")
+        tree = ttk.Treeview(dialog, columns=columns, height=12)
+        tree.heading("#0", text="Operation")
+        for col, title in zip(columns, ("Count", "Mean (ms)", "P50 (ms)", "P95 (ms)", "Max (ms)")):
+            tree.heading(col, text=title)
+            tree.column(col, width=90, anchor="e")
+        tree.column("#0", width=160)
+        tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        summary = tk.Label(dialog, anchor="w", justify=tk.LEFT)
+        summary.pack(fill=tk.X, padx=5)
+
+        def refresh():
+            snapshot = metrics.snapshot()
+            tree.delete(*tree.get_children())
+            for row in timing_rows(snapshot):
+                values = [row["count"]] + [
+                    "" if row[key] is None else f"{row[key]:.1f}" for key in ("mean_ms", "p50_ms", "p95_ms", "max_ms")
+                ]
+                tree.insert("", tk.END, text=row["operation"], values=values)
+            for name, value in sorted(snapshot["counters"].items()):
+                tree.insert("", tk.END, text=name, values=(value, "", "", "", ""))
+            text = f"Collected over {snapshot['uptime_seconds']:.0f} s"
+            pending = metrics.pending_profiles()
+            if pending:
+                text += f"; profiling next {', '.join(sorted(pending))}"
+            if metrics.last_profile is not None:
+                operation, path = metrics.last_profile
+                text += f"; last profile of {operation}: {path or 'could not be written'}"
+            summary.config(text=text)
+
+        def export():
+            path = filedialog.asksaveasfilename(
+                parent=dialog, defaultextension=".json", filetypes=[("JSON Files", "*.json")],
+                initialfile="ets2_radio_utility_metrics.json",
+            )
+            if not path:
+                return
+            try:
+                metrics.write_json(path)
+            except OSError as exc:
+                messagebox.showerror("Export Failed", f"Couldn't write {path}:\n{exc}", parent=dialog)
+                return
+            self.status_label.config(text=f"Metrics exported to {path}")
+
+        def reset():
+            metrics.reset()
+            refresh()
+
+        def profile_next():
+            operation = operation_choice.get()
+            path = filedialog.asksaveasfilename(
+                parent=dialog, defaultextension=".prof", filetypes=[("cProfile Stats", "*.prof")],
+                initialfile=f"ets2_radio_utility_{operation}.prof",
+            )
+            if path:
+                metrics.profile_next(operation, path)
+                refresh()
+
+        profile_frame = tk.Frame(dialog)
+        profile_frame.pack(fill=tk.X, pady=5)
+        tk.Label(profile_frame, text="Profile the next:").pack(side=tk.LEFT, padx=5)
+        operation_choice = tk.StringVar(value=PROFILED_OPERATIONS[0])
+        ttk.Combobox(
+            profile_frame, textvariable=operation_choice, values=PROFILED_OPERATIONS, state="readonly", width=18
+        ).pack(side=tk.LEFT, padx=5)
+        tk.Button(profile_frame, text="Capture to File...", command=profile_next).pack(side=tk.LEFT, padx=5)
+
+        button_frame = tk.Frame(dialog)
+        button_frame.pack(fill=tk.X, pady=5)
+        tk.Button(button_frame, text="Refresh", command=refresh).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Export JSON...", command=export).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Reset", command=reset).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        refresh()
 
     def save_file(self):
         '''Save the updated streams to a new file'''
+        if self.is_busy():
+            return
         if not self.streams:
             messagebox.showwarning("No Data", "No streams to save.")
             return
 
+        lossy = 0
         for i, stream in enumerate(self.streams, start=1):
             error = self.validate_stream(stream)
             if error:
                 messagebox.showerror("Invalid Stream", f"Error in stream {i}: {error}")
                 return
+            if any(REPLACEMENT_CHAR in str(stream[field]) for field in FIELDS):
+                lossy += 1
+        if lossy and not messagebox.askyesno(
+            "Unreadable Characters",
+            f"{lossy} streams contain characters that could not be read from the file and are shown as \ufffd. "
+            "Saving writes them that way.\n\nSave anyway?",
+        ):
+            return
 
         save_dialog_options = {"defaultextension": ".sii", "filetypes": [("SII Files", "*.sii")]}  # Default options
 
@@ -487,6 +1703,7 @@ class StreamManagerApp:
 
         save_path = os.path.abspath(save_path)
 
+        backup_path = None
         if os.path.exists(save_path):
             overwrite = messagebox.askyesno("Overwrite File?", f"{save_path} already exists. Do you want to overwrite it?")
             if not overwrite:
@@ -498,29 +1715,50 @@ class StreamManagerApp:
             )
             if create_backup:
                 backup_path = f"{save_path}.{datetime.now().strftime('%Y%m%d_%H%M%S')}.bak"
-                try:
-                    shutil.copy2(save_path, backup_path)
-                except OSError as exc:
-                    messagebox.showerror("Backup Error", f"Could not create backup file:\n{exc}")
-                    return
 
-        try:
-            with open(save_path, 'w') as f:
-                # Write the header and update the stream_data count
-                f.write('SiiNunit\n{\n')
-                f.write(f'live_stream_def : _nameless.23f.d60f.8a20 {{\n stream_data: {len(self.streams)}\n')
-
-                # Write the actual stream data
-                for i, stream in enumerate(self.streams):
-                    f.write(f'stream_data[{i}]: "{stream["url"]}|{stream["name"]}|{stream["genre"]}|{stream["language"]}|{stream["bitrate"]}|{stream["extra"]}"\n')
-
-                f.write('}\n')
-                f.write('}\n')
-        except OSError as exc:
-            messagebox.showerror("Save Error", f"Could not save file:\n{exc}")
+        # Editing is blocked until the save finishes, so the worker can read the streams directly
+        self.is_saving = True
+        self.status_label.config(text="Saving...")
+        threading.Thread(
+            target=self.save_file_thread,
+            args=(save_path, backup_path, list(self.streams), list(self.streams.ids()), self.streams.next_id),
+            daemon=True,
+        ).start()
+
+    def save_file_thread(self, save_path, backup_path, streams, stream_ids, next_id):
+        '''Back up the old file and write the new one atomically, off the UI thread'''
+        started = time.perf_counter()
+        error = None
+        signature = None
+        if backup_path:
+            try:
+                shutil.copy2(save_path, backup_path)
+            except OSError as exc:
+                error = ("Backup Error", f"Could not create backup file:\n{exc}")
+        if error is None:
+            try:
+                write_sii(save_path, streams)
+                signature = file_signature(save_path)
+            except OSError as exc:
+                error = ("Save Error", f"Could not save file:\n{exc}")
+        elapsed = time.perf_counter() - started
+        self.post_ui(lambda: self.finish_saving(save_path, stream_ids, next_id, error, elapsed, signature))
+
+    def finish_saving(self, save_path, stream_ids, next_id, error=None, elapsed=0.0, signature=None):
+        '''Report the outcome of a background save and base the journal on the saved file'''
+        self.is_saving = False
+        if error is not None:
+            self.status_label.config(text="Save failed")
+            messagebox.showerror(*error)
             return
 
         self.file_path = save_path
+        self.file_signature = signature
+        self.unsaved_changes = False
+        if self.watch_file:
+            self.watcher.watch(save_path, signature)
+        self.journal.start(save_path, stream_ids, next_id)
+        self.status_label.config(text=f"Saved {len(stream_ids)} streams in {elapsed:.1f} s")
         messagebox.showinfo("Save Successful", "Streams have been saved successfully.")
         self.save_settings()
 
@@ -528,38 +1766,263 @@ class StreamManagerApp:
         '''Check all streams with progress updates'''
         if self.is_testing_all:
             return
+        if self.is_loading:
+            messagebox.showwarning("Loading", "Please wait until the file has finished loading.")
+            return
         if not self.streams:
             messagebox.showwarning("No Data", "No streams to test.")
             return
+        deep = self.deep_verify_var.get()
+        if deep and not self.ensure_vlc_available():
+            return
 
         self.is_testing_all = True
         self.progress.config(maximum=len(self.streams), value=0)
-        self.status_label.config(text="Testing all streams...")
-        threading.Thread(target=self.test_all_thread, daemon=True).start()
+        self.status_label.config(text="Verifying all streams..." if deep else "Testing all streams...")
+        self.pause_button.config(text="Pause", state=tk.NORMAL)
+        self.cancel_button.config(state=tk.NORMAL)
+        # Snapshot on the UI thread so edits made during the run don't shift the list under the workers
+        jobs = [(stream_id, stream['url']) for stream_id, stream in self.streams.items()]
+        on_screen = self.visible_ids[self.view_top:self.view_top + self.page_size]
+        self.checker = ConcurrentChecker(
+            self.verify_stream if deep else self.check_stream,
+            max_workers=self.check_workers,
+            per_host_limit=self.check_per_host,
+        )
+        self.test_all_worker = threading.Thread(
+            target=self.test_all_thread, args=(self.checker, jobs, on_screen, self.only_stale.get()), daemon=True
+        )
+        self.test_all_worker.start()
+
+    def test_all_thread(self, checker, jobs, on_screen, only_stale=False):
+        '''Check the rows on screen first, then stale results, then the rest'''
+        cached = self.check_cache.get_many(url for _, url in jobs)
+        now = time.time()
+        screen_positions = {stream_id: position for position, stream_id in enumerate(on_screen)}
+        visible, stale, fresh = [], [], []
+        for stream_id, url in jobs:
+            entry = cached.get(normalize_url(url))
+            if entry is not None and entry.status == WORKING and entry.latency is not None:
+                # Past latencies give each host a tighter timeout from the first check on
+                checker.health.seed(host_key(url), entry.latency)
+            is_stale = not is_fresh(entry, self.check_ttl_hours, now)
+            if only_stale and not is_stale:
+                continue
+            if stream_id in screen_positions:
+                visible.append((stream_id, url))
+            elif is_stale:
+                stale.append((stream_id, url))
+            else:
+                fresh.append((stream_id, url))
+        visible.sort(key=lambda job: screen_positions[job[0]])
+        ordered = [((stream_id, url), url) for stream_id, url in visible + stale + fresh]
+        self.post_ui(lambda total=len(ordered): self.progress.config(maximum=max(total, 1)))
 
-    def test_all_thread(self):
         try:
-            for idx, stream in enumerate(self.streams):
+            checker.run(ordered, self.on_test_result)
+        finally:
+            self.check_cache.flush()
+            self.post_ui(self.finish_testing)
+
+    def on_test_result(self, job, result, completed):
+        '''Record a Test All result and forward it from a worker thread to the UI thread'''
+        stream_id, url = job
+        status_text = self.record_check(url, result)
+        self.post_status(stream_id, status_text, completed, url)
+
+    def post_status(self, stream_id, status, progress=None, url=None):
+        '''Queue a status change from a worker thread for the next UI pump
+
+        With ``url`` the status is dropped if the stream no longer has that URL by then.
+        '''
+        self.ui_queue.put(("status", stream_id, status, progress, url))
+
+    def post_ui(self, callback):
+        '''Queue a callback from a worker thread to run on the UI thread'''
+        self.ui_queue.put(("call", callback))
+
+    def pump_ui_queue(self):
+        '''Apply everything queued by worker threads in one batch'''
+        statuses = {}
+        checked_urls = {}
+        progress = None
+        callbacks = []
+        try:
+            while True:
                 try:
-                    is_working = self.check_stream(stream['url'])
+                    event = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event[0] == "status":
+                    _, stream_id, status, value, url = event
+                    statuses.pop(stream_id, None)  # keep the latest result last for the status label
+                    statuses[stream_id] = status
+                    checked_urls[stream_id] = url
+                    if value is not None:
+                        progress = value if progress is None else max(progress, value)
+                else:
+                    callbacks.append(event[1])
+
+            if statuses:
+                self.update_statuses(statuses, checked_urls)
+            if progress is not None:
+                self.progress.config(value=progress)
+            for callback in callbacks:
+                try:
+                    callback()
                 except Exception:
-                    is_working = False
-
-                status_text = "Working" if is_working else "Not Responding"
-                self.statuses[idx] = status_text
-                self.root.after(0, lambda i=idx, status=status_text: self.update_status(i, status))
-                self.root.after(0, lambda val=idx + 1: self.progress.config(value=val))
+                    # One failing callback must not drop the rest (e.g. the one ending Test All)
+                    self.report_error("A background task")
         finally:
-            self.root.after(0, self.finish_testing)
+            self.root.after(UI_PUMP_INTERVAL_MS, self.pump_ui_queue)
+
+    def report_error(self, what, *exc_info):
+        '''Log the exception being handled (or ``exc_info``) and point to the log in the status bar'''
+        log.error("%s failed", what, exc_info=exc_info or True)
+        self.status_label.config(text=f"{what} failed; details in {ERROR_LOG_PATH}")
+
+    def update_statuses(self, statuses, checked_urls=None):
+        '''Update the status label and the treeview rows for a batch of results'''
+        checked_urls = checked_urls or {}
+        # Results can arrive for streams deleted while they were being checked, or whose URL a reload changed
+        statuses = {
+            stream_id: status for stream_id, status in statuses.items()
+            if stream_id in self.streams and checked_urls.get(stream_id) in (None, self.streams[stream_id]['url'])
+        }
+        if not statuses:
+            return
+        stream_id, status = next(reversed(statuses.items()))
+        self.status_label.config(text=f"{self.streams[stream_id]['name']}: {status}")
+        if self.sort_order.sorts_on("status") and len(statuses) > MAX_TARGETED_MOVES:
+            self.statuses.update(statuses)
+            for stream_id in statuses:
+                self.sort_order.invalidate(stream_id, ("status",))
+            self.update_treeview()
+            return
+        for stream_id, status in statuses.items():
+            self.set_status(stream_id, status)
 
-    def update_status(self, index, status):
-        '''Update status label and treeview row'''
-        self.status_label.config(text=f"Stream {index + 1}: {status}")
-        self.update_treeview()
+    def set_status(self, stream_id, status):
+        '''Record a stream's status and refresh only what it affects'''
+        if stream_id not in self.streams:
+            return
+        self.statuses[stream_id] = status
+        self.refresh_row(stream_id)
+        self.sort_order.reposition(stream_id, "status")
+        if self.sort_order.sorts_on("status"):
+            self.move_row(stream_id)
+
+    def move_row(self, stream_id):
+        '''Move a row to its sorted position after one of its sort keys changed'''
+        try:
+            self.visible_ids.remove(stream_id)
+        except ValueError:
+            return
+        self.visible_ids.insert(self.sort_order.insertion_point(self.visible_ids, stream_id), stream_id)
+        self.render_window()
+
+    def toggle_pause_testing(self):
+        '''Pause or resume Test All; checks already running still finish'''
+        if self.checker is None or self.checker.cancelled:
+            return
+        if self.checker.paused:
+            self.checker.resume()
+            self.pause_button.config(text="Pause")
+            self.status_label.config(text="Testing all streams...")
+        else:
+            self.checker.pause()
+            self.pause_button.config(text="Resume")
+            self.status_label.config(text="Testing paused")
+
+    def cancel_testing(self):
+        '''Stop Test All once the checks already running have finished'''
+        if self.checker is None:
+            return
+        self.checker.cancel()
+        self.pause_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.status_label.config(text="Cancelling...")
+
+    def toggle_monitor(self):
+        '''Start or stop the background uptime monitor'''
+        self.monitor_enabled = self.monitor_var.get()
+        if self.monitor_enabled:
+            self.start_monitor()
+        else:
+            self.stop_monitor()
+        self.save_settings()
+
+    def start_monitor(self):
+        '''Re-check every stream in the background on a slow, rate-limited schedule'''
+        if self.monitor is not None:
+            return
+        if self.uptime_store is None:
+            self.uptime_store = UptimeStore(DEFAULT_HISTORY_PATH)
+        self.monitor = UptimeMonitor(
+            self.check_stream,
+            self.uptime_store,
+            interval=self.monitor_interval_minutes * 60,
+            per_minute=self.monitor_checks_per_minute,
+            on_result=self.on_monitor_result,
+        )
+        self.update_monitor_urls()
+        self.monitor.start()
+        # Histories from earlier sessions appear once the monitor thread has read them
+        self.root.after(MONITOR_REFRESH_MS, self.update_treeview)
+
+    def stop_monitor(self):
+        if self.monitor is not None:
+            # The check in progress finishes in the background instead of blocking the UI
+            self.monitor.stop(wait=False)
+            self.stopping_monitors = [monitor for monitor in self.stopping_monitors if not monitor.join(0)]
+            self.stopping_monitors.append(self.monitor)
+            self.monitor = None
+
+    def update_monitor_urls(self):
+        '''Tell the monitor which streams are in the list now'''
+        if self.monitor is not None:
+            self.monitor.set_urls(stream.url for stream in self.streams)
+
+    def on_monitor_result(self, url):
+        '''Forward a monitor result from the monitor thread to the UI thread'''
+        self.post_ui(lambda: self.queue_monitor_refresh(url))
+
+    def queue_monitor_refresh(self, url):
+        self.monitor_changed_urls.add(url)
+        if self.monitor_refresh_job is None:
+            self.monitor_refresh_job = self.root.after(MONITOR_REFRESH_MS, self.refresh_monitor_columns)
+
+    def refresh_monitor_columns(self):
+        '''Show new monitor results, touching only the rows of streams that were re-checked'''
+        self.monitor_refresh_job = None
+        urls, self.monitor_changed_urls = self.monitor_changed_urls, set()
+        changed = [stream_id for stream_id, stream in self.streams.items() if stream.url in urls]
+        sorted_by_monitor = any(self.sort_order.sorts_on(column) for column in MONITOR_COLUMNS)
+        if sorted_by_monitor and len(changed) > MAX_TARGETED_MOVES:
+            for stream_id in changed:
+                self.sort_order.invalidate(stream_id, MONITOR_COLUMNS)
+            self.update_treeview()
+            return
+        for stream_id in changed:
+            self.refresh_row(stream_id)
+            if sorted_by_monitor:
+                for column in MONITOR_COLUMNS:
+                    self.sort_order.reposition(stream_id, column)
+                self.move_row(stream_id)
+            else:
+                self.sort_order.invalidate(stream_id, MONITOR_COLUMNS)
 
     def finish_testing(self):
+        cancelled = self.checker is not None and self.checker.cancelled
         self.is_testing_all = False
-        self.status_label.config(text="Testing complete")
+        self.checker = None
+        self.pause_button.config(text="Pause", state=tk.DISABLED)
+        self.cancel_button.config(state=tk.DISABLED)
+        stats = self.get_http().stats()
+        self.status_label.config(
+            text=f"Testing {'cancelled' if cancelled else 'complete'} (connections reused: {stats['reuse_rate']:.0%}, "
+            f"DNS cache hits: {stats['dns_hit_rate']:.0%})"
+        )
 
     def load_settings(self):
         '''Restore last used file path and window geometry'''
@@ -573,12 +2036,41 @@ class StreamManagerApp:
         if geometry:
             self.root.geometry(geometry)
         self.file_path = settings.get("last_file", "")
+        self.check_workers = settings.get("check_workers", self.check_workers)
+        self.check_per_host = settings.get("check_per_host", self.check_per_host)
+        self.check_ttl_hours = settings.get("check_ttl_hours", self.check_ttl_hours)
+        self.network_caching_ms = settings.get("network_caching_ms", self.network_caching_ms)
+        self.prebuffer_enabled = settings.get("prebuffer_neighbours", self.prebuffer_enabled)
+        self.reopen_last_file = settings.get("reopen_last_file", self.reopen_last_file)
+        self.deep_verify = settings.get("deep_verify", self.deep_verify)
+        self.deep_verify_seconds = settings.get("deep_verify_seconds", self.deep_verify_seconds)
+        self.deep_verify_workers = settings.get("deep_verify_workers", self.deep_verify_workers)
+        self.watch_file = settings.get("watch_file", self.watch_file)
+        self.monitor_enabled = settings.get("monitor_enabled", self.monitor_enabled)
+        self.monitor_interval_minutes = settings.get("monitor_interval_minutes", self.monitor_interval_minutes)
+        self.monitor_checks_per_minute = settings.get("monitor_checks_per_minute", self.monitor_checks_per_minute)
+        if settings.get("import_rule") in CONFLICT_RULES:
+            self.import_rule = settings["import_rule"]
 
     def save_settings(self):
         '''Persist last used file path and window geometry'''
         settings = {
             "last_file": self.file_path,
             "geometry": self.root.winfo_geometry(),
+            "check_workers": self.check_workers,
+            "check_per_host": self.check_per_host,
+            "check_ttl_hours": self.check_ttl_hours,
+            "network_caching_ms": self.network_caching_ms,
+            "prebuffer_neighbours": self.prebuffer.get(),
+            "reopen_last_file": self.reopen_last_file,
+            "deep_verify": self.deep_verify_var.get(),
+            "deep_verify_seconds": self.deep_verify_seconds,
+            "deep_verify_workers": self.deep_verify_workers,
+            "watch_file": self.watch_file,
+            "import_rule": self.import_rule,
+            "monitor_enabled": self.monitor_enabled,
+            "monitor_interval_minutes": self.monitor_interval_minutes,
+            "monitor_checks_per_minute": self.monitor_checks_per_minute,
         }
         try:
             with open(self.settings_path, "w") as f:
@@ -587,11 +2079,45 @@ class StreamManagerApp:
             pass
 
     def on_close(self):
-        self.stop_playback()
+        # Both finish the checks they are running; wait for them below, before closing what they use
+        self.stop_monitor()
+        if self.checker:
+            self.checker.cancel()
+            # Checks already running still record their results in the cache
+            self.test_all_worker.join(CLOSE_WAIT_SECONDS)
+        # Superseded start and stop threads skip the engine, so nothing uses it after the release
+        self.playback_generation += 1
+        if self.playback_engine is not None:
+            with self.playback_lock:
+                # Stops every player before freeing them, on this thread rather than a worker
+                self.playback_engine.release()
         self.save_settings()
+        self.watcher.stop()
+        self.check_cache.close()
+        self.journal.close()
+        try:
+            metrics.write_json(DEFAULT_METRICS_PATH)
+        except OSError:
+            pass
+        deadline = time.monotonic() + CLOSE_WAIT_SECONDS
+        monitors_done = all([monitor.join(max(0.0, deadline - time.monotonic())) for monitor in self.stopping_monitors])
+        if self.decoder_pool is not None:
+            self.decoder_pool.close()
+        # A monitor check that outlived the wait still needs the store and the connections
+        if self.uptime_store is not None and monitors_done:
+            self.uptime_store.close()
+        if self.http is not None and monitors_done:
+            self.http.close()
         self.root.destroy()
 
 if __name__ == "__main__":
+    # Deep verify starts worker processes; a frozen executable has to run them instead of the GUI
+    multiprocessing.freeze_support()
+    handler = logging.FileHandler(ERROR_LOG_PATH, encoding="utf-8", delay=True)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+    logging.getLogger().addHandler(handler)
     root = tk.Tk()
-    app = StreamManagerApp(root)
+    app = StreamManagerApp(root, exit_after_startup="--startup-report" in sys.argv[1:])
+    # Exceptions in Tk callbacks would otherwise only be printed to the missing console
+    root.report_callback_exception = lambda *exc_info: app.report_error("An action", *exc_info)
     root.mainloop()
@@ -0,0 +1,182 @@
+'''Detailed stream probe: timings, ICY headers and measured bitrate within a fixed budget.'''
+
+import time
+from collections import namedtuple
+
+from search_index import fold
+
+PROBE_TIMEOUT = (5, 5)
+PROBE_MAX_BYTES = 512 * 1024
+PROBE_MAX_SECONDS = 3.0
+PROBE_CHUNK_SIZE = 4096
+
+# Servers send a burst of buffered audio on connect; throughput is measured after it
+BURST_GRACE_SECONDS = 0.5
+
+STANDARD_BITRATES = (32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+
+# A measured bitrate this far from the listed one is worth flagging
+BITRATE_TOLERANCE = 0.25
+
+# icy-name / icy-genre values servers send when nothing was configured
+PLACEHOLDER_ICY_VALUES = {"", "-", "unspecified", "unspecified name", "unspecified description", "no name", "various", "n/a"}
+
+# latency is time to first byte, so a ProbeResult can be stored like a CheckResult
+ProbeResult = namedtuple(
+    "ProbeResult",
+    "is_working http_status detail latency connect_time header_time content_type "
+    "icy_bitrate icy_name icy_genre measured_kbps bytes_read sample_seconds",
+)
+
+
+def parse_icy_bitrate(value):
+    '''Return the first number in an ``icy-br`` header (e.g. "128" or "128,128"), or None.'''
+    if not value:
+        return None
+    first = value.split(",")[0].strip()
+    try:
+        bitrate = int(float(first))
+    except ValueError:
+        return None
+    return bitrate if bitrate > 0 else None
+
+
+def _failed(detail, started, http_status=None, connect_time=None, header_time=None, content_type=""):
+    return ProbeResult(
+        False, http_status, detail, time.monotonic() - started, connect_time, header_time, content_type,
+        None, "", "", None, 0, 0.0,
+    )
+
+
+def probe_stream(http, url, timeout=PROBE_TIMEOUT, max_bytes=PROBE_MAX_BYTES, max_seconds=PROBE_MAX_SECONDS):
+    '''Probe ``url`` through a PooledHttp and return a ProbeResult.
+
+    Reads at most ``max_bytes`` for at most ``max_seconds`` after the first
+    byte, whichever comes first, then closes the connection.
+    '''
+    import requests
+
+    started = time.monotonic()
+    try:
+        response = http.get(url, timeout=timeout)
+    except requests.exceptions.RequestException as exc:
+        return _failed(type(exc).__name__, started)
+
+    try:
+        header_time = time.monotonic() - started
+        connect_time = http.take_connect_time(response)
+        headers = response.headers
+        content_type = headers.get("Content-Type", "")
+        if response.status_code != 200:
+            return _failed(
+                f"HTTP {response.status_code}", started, response.status_code, connect_time, header_time, content_type
+            )
+
+        chunks = response.iter_content(chunk_size=PROBE_CHUNK_SIZE)
+        try:
+            first = next(chunks)
+        except StopIteration:
+            return _failed("Empty response", started, response.status_code, connect_time, header_time, content_type)
+        first_byte = time.monotonic()
+        ttfb = first_byte - started
+
+        bytes_read = len(first)
+        measured_bytes = 0
+        measure_start = None
+        now = first_byte
+        for chunk in chunks:
+            now = time.monotonic()
+            bytes_read += len(chunk)
+            if now - first_byte >= BURST_GRACE_SECONDS:
+                if measure_start is None:
+                    measure_start = now
+                else:
+                    measured_bytes += len(chunk)
+            if bytes_read >= max_bytes or now - first_byte >= max_seconds:
+                break
+
+        measured_kbps = None
+        if measure_start is not None and now > measure_start and measured_bytes:
+            measured_kbps = measured_bytes * 8 / 1000 / (now - measure_start)
+
+        return ProbeResult(
+            True,
+            response.status_code,
+            "",
+            ttfb,
+            connect_time,
+            header_time,
+            content_type,
+            parse_icy_bitrate(headers.get("icy-br")),
+            headers.get("icy-name", "").strip(),
+            headers.get("icy-genre", "").strip(),
+            measured_kbps,
+            bytes_read,
+            now - first_byte,
+        )
+    except requests.exceptions.RequestException as exc:
+        return _failed(type(exc).__name__, started, response.status_code)
+    finally:
+        http.finish(response)
+
+
+def nearest_standard_bitrate(kbps):
+    return min(STANDARD_BITRATES, key=lambda rate: abs(rate - kbps))
+
+
+def suggest_corrections(stream, result):
+    '''Return ``{field: suggested value}`` for fields the probe suggests are wrong or missing.
+
+    The bitrate is corrected when the probe contradicts it; the ICY name and
+    genre are only suggested for fields left empty.
+    '''
+    if not result.is_working:
+        return {}
+
+    suggestions = {}
+    try:
+        listed = int(str(stream.get("bitrate", "")).strip())
+    except ValueError:
+        listed = None
+
+    measured = nearest_standard_bitrate(result.measured_kbps) if result.measured_kbps is not None else None
+    icy = result.icy_bitrate
+    if icy is not None and (measured is None or abs(measured - icy) <= icy * BITRATE_TOLERANCE):
+        # The advertised bitrate is trustworthy unless the measurement clearly contradicts it
+        if icy != listed:
+            suggestions["bitrate"] = str(icy)
+    elif measured is not None:
+        if listed is None or abs(measured - listed) > listed * BITRATE_TOLERANCE:
+            suggestions["bitrate"] = str(measured)
+
+    for field, value in (("name", result.icy_name), ("genre", result.icy_genre)):
+        if fold(value) in PLACEHOLDER_ICY_VALUES:
+            continue
+        # A name or genre the user chose is kept; the ICY values only fill in blanks
+        if not str(stream.get(field, "")).strip():
+            suggestions[field] = value
+    return suggestions
+
+
+def describe_probe(result):
+    '''Return a multi-line, human-readable summary of a ProbeResult.'''
+    def ms(seconds):
+        return "-" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+    lines = [f"Status: {'Working' if result.is_working else 'Not Responding'}"]
+    if result.detail:
+        lines.append(f"Detail: {result.detail}")
+    lines.append(f"Connect: {ms(result.connect_time)}")
+    lines.append(f"Headers: {ms(result.header_time)}")
+    lines.append(f"First byte: {ms(result.latency)}")
+    if result.content_type:
+        lines.append(f"Content type: {result.content_type}")
+    if result.icy_bitrate is not None:
+        lines.append(f"ICY bitrate: {result.icy_bitrate} kbps")
+    if result.icy_name:
+        lines.append(f"ICY name: {result.icy_name}")
+    if result.icy_genre:
+        lines.append(f"ICY genre: {result.icy_genre}")
+    if result.measured_kbps is not None:
+        lines.append(f"Measured: {result.measured_kbps:.0f} kbps over {result.sample_seconds:.1f} s")
+    return "\n".join(lines)
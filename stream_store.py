@@ -0,0 +1,120 @@
+'''Compact in-memory stream list addressed by stable ids.'''
+
+from sii_parser import FIELDS
+
+
+class Stream:
+    '''One station.
+
+    Uses ``__slots__`` instead of a per-stream dict, and reads like a dict
+    (``stream['url']``, ``stream.get(...)``, ``dict(stream)``) so code written
+    for plain stream dicts keeps working.
+    '''
+
+    __slots__ = ("id",) + FIELDS
+
+    def __init__(self, stream_id, url, name, genre, language, bitrate, extra):
+        self.id = stream_id
+        self.url = url
+        self.name = name
+        self.genre = genre
+        self.language = language
+        self.bitrate = bitrate
+        self.extra = extra
+
+    def __getitem__(self, field):
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        return getattr(self, field) if field in FIELDS else default
+
+    def keys(self):
+        return FIELDS
+
+    def __repr__(self):
+        return f"Stream({self.id}, {self.url!r}, {self.name!r})"
+
+
+class StreamStore:
+    '''Streams in insertion order, keyed by ids that never change or get reused.
+
+    Ids increase in insertion order, so sorting ids gives file order. Lookup,
+    update and delete by id are O(1). Genre, language, bitrate and extra
+    repeat a lot across a list, so equal values share one string object.
+    '''
+
+    def __init__(self):
+        self._streams = {}
+        self._shared = {}
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._streams)
+
+    def __bool__(self):
+        return bool(self._streams)
+
+    def __iter__(self):
+        return iter(self._streams.values())
+
+    def __contains__(self, stream_id):
+        return stream_id in self._streams
+
+    def __getitem__(self, stream_id):
+        return self._streams[stream_id]
+
+    def get(self, stream_id):
+        return self._streams.get(stream_id)
+
+    @property
+    def next_id(self):
+        '''The id the next added stream will get.'''
+        return self._next_id
+
+    def ids(self):
+        '''Return a live, ordered view of the ids.'''
+        return self._streams.keys()
+
+    def items(self):
+        return self._streams.items()
+
+    def add(self, stream):
+        '''Add a stream (any mapping with the stream fields) and return its new Stream.'''
+        stream_id = self._next_id
+        self._next_id += 1
+        record = Stream(stream_id, *self._values(stream))
+        self._streams[stream_id] = record
+        return record
+
+    def extend(self, streams):
+        '''Add several streams and return their ids.'''
+        return [self.add(stream).id for stream in streams]
+
+    def update(self, stream_id, stream):
+        '''Replace the fields of an existing stream, keeping its id.'''
+        record = self._streams[stream_id]
+        for field, value in zip(FIELDS, self._values(stream)):
+            setattr(record, field, value)
+        return record
+
+    def remove(self, stream_id):
+        return self._streams.pop(stream_id)
+
+    def clear(self):
+        '''Remove every stream; ids keep counting so stale references can't match new streams.'''
+        self._streams = {}
+        self._shared = {}
+
+    def _values(self, stream):
+        url, name, genre, language, bitrate, extra = (stream[field] for field in FIELDS)
+        shared = self._shared
+        return (
+            url,
+            name,
+            shared.setdefault(genre, genre),
+            shared.setdefault(language, language),
+            shared.setdefault(bitrate, bitrate),
+            shared.setdefault(extra, extra),
+        )
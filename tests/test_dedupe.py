@@ -0,0 +1,30 @@
+'''URL keys used to group duplicate streams and mirror candidates.'''
+
+from dedupe import MIRROR_DUPLICATE, URL_DUPLICATE, canonical_url, find_duplicates, mirror_key
+
+
+def test_tracking_params_share_one_key():
+    key = canonical_url("https://ice02.fluidstream.net/marilu.mp3?FLID=7")
+    assert canonical_url("https://ice02.fluidstream.net/marilu.mp3?FLID=9") == key
+    assert canonical_url("http://ICE02.fluidstream.net:80/marilu.mp3/?flid=3&utm_source=app") == key
+    assert key == canonical_url("https://ice02.fluidstream.net/marilu.mp3")
+
+
+def test_stream_selecting_params_are_kept():
+    assert canonical_url("http://example.com:8000/stream?sid=1") != canonical_url("http://example.com:8000/stream?sid=2")
+    assert canonical_url("http://example.com/live?source=app") != canonical_url("http://example.com/live")
+    assert canonical_url("http://example.com/live?sid=1&FLID=2") == canonical_url("http://example.com/live?sid=1")
+
+
+def test_flid_variants_are_url_duplicates_and_mirrors_are_candidates():
+    streams = {
+        1: {"url": "https://ice02.fluidstream.net/marilu.mp3?FLID=7", "name": "Radio Marilù"},
+        2: {"url": "https://ice02.fluidstream.net/marilu.mp3?FLID=9", "name": "Marilù"},
+        3: {"url": "https://ice07.fluidstream.net/marilu.mp3", "name": "Radio Marilu"},
+    }
+    assert mirror_key(streams[1]["url"]) == mirror_key(streams[3]["url"])
+
+    groups = find_duplicates(streams.items(), names=False)
+    kinds = {group.kind: sorted(group.ids) for group in groups}
+    assert kinds[URL_DUPLICATE] == [1, 2]
+    assert kinds[MIRROR_DUPLICATE] == [1, 2, 3]
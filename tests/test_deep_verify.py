@@ -0,0 +1,175 @@
+'''Deep verification against the fake radio server: playlist resolution, the decoder pool and real decodes.'''
+
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+import deep_verify
+from benchmarks.fake_radio_server import server_url, start_server
+from deep_verify import DecodeOutcome, DecoderPool, parse_playlist, resolve_stream, verify_stream
+from http_pool import PooledHttp
+
+# Not real audio: enough for resolve_stream, which only sniffs the first bytes
+FAKE_MP3 = b"\xff\xfb\x90\x00" * 1024
+
+
+def stand_in_worker(conn, network_caching_ms):
+    '''Answers like run_vlc_worker without VLC; "hang" and "crash" in the URL misbehave on purpose.'''
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        url, seconds = job
+        if "hang" in url:
+            time.sleep(60)
+        if "crash" in url:
+            os._exit(3)
+        conn.send(DecodeOutcome("", "MP3", 44100, 2, seconds, 128))
+
+
+@pytest.fixture
+def media(tmp_path):
+    (tmp_path / "test.mp3").write_bytes(FAKE_MP3)
+    return tmp_path
+
+
+@pytest.fixture
+def base(media):
+    server = start_server(media_dir=str(media))
+    yield server_url(server)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def http():
+    pool = PooledHttp()
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def pool():
+    decoders = DecoderPool(max_workers=2, seconds=0.5, target=stand_in_worker)
+    yield decoders
+    decoders.close()
+
+
+def test_parse_playlist_orders_pls_entries_by_number():
+    text = "[playlist]\nFile2=http://b/\nTitle1=x\nFile1=http://a/\nNumberOfEntries=2\n"
+    assert parse_playlist(text) == ["http://a/", "http://b/"]
+    assert parse_playlist("#EXTM3U\n#EXTINF:-1,x\nhttp://a/\n\n") == ["http://a/"]
+
+
+@pytest.mark.parametrize(
+    "path", ["/file/test.mp3", "/pls/file/test.mp3", "/m3u/file/test.mp3", "/pls/m3u/file/test.mp3"]
+)
+def test_resolve_follows_playlists_to_the_stream(base, http, path):
+    url, http_status, latency, failure = resolve_stream(http, base + path)
+    assert failure is None
+    assert url == base + "/file/test.mp3"
+    assert http_status == 200
+    assert latency is not None
+
+
+def test_resolve_reports_where_a_redirect_led(base, http):
+    url, http_status, _, failure = resolve_stream(http, base + "/redirect/7.mp3")
+    assert failure is None
+    assert url == base + "/stream/7.mp3"
+    assert http_status == 200
+
+
+def test_resolve_rejects_html_pages(base, http):
+    _, http_status, _, failure = resolve_stream(http, base + "/html/1.mp3")
+    assert failure.detail == "HTML page instead of audio"
+    assert http_status == 200
+    assert not failure.is_working
+
+
+@pytest.mark.parametrize("path", ["/error/404", "/file/missing.mp3"])
+def test_resolve_reports_http_errors(base, http, path):
+    _, http_status, _, failure = resolve_stream(http, base + path)
+    assert http_status == 404
+    assert failure.detail == "HTTP 404"
+
+
+def test_resolve_reports_dead_servers(base, http):
+    _, http_status, _, failure = resolve_stream(http, base + "/dead/1.mp3")
+    assert http_status is None
+    assert failure.detail == "ConnectionError"
+
+
+def test_verify_decodes_the_resolved_stream(base, http, pool):
+    result = verify_stream(http, pool, base + "/pls/file/test.mp3")
+    assert result.is_working
+    assert result.resolved_url == base + "/file/test.mp3"
+    assert (result.codec, result.sample_rate, result.channels, result.decoded_kbps) == ("MP3", 44100, 2, 128)
+
+
+def test_verify_skips_the_decoder_for_html(base, http):
+    class NoPool:
+        seconds = 0.5
+
+        def decode(self, url):
+            raise AssertionError("HTML pages must not be decoded")
+
+    result = verify_stream(http, NoPool(), base + "/html/1.mp3")
+    assert not result.is_working
+
+
+def test_pool_kills_and_replaces_a_hung_worker(monkeypatch, pool):
+    monkeypatch.setattr(deep_verify, "DECODE_GRACE_SECONDS", 1.0)
+    started = time.monotonic()
+    assert pool.decode("http://fake/hang").error == "Decoder timed out"
+    assert time.monotonic() - started < 10
+    assert pool.decode("http://fake/ok").error == ""
+    assert len(pool._all) == 1
+
+
+def test_pool_survives_a_crashing_worker(pool):
+    assert pool.decode("http://fake/crash").error == "Decoder crashed"
+    assert pool.decode("http://fake/ok").error == ""
+
+
+def test_pool_refuses_work_after_close(pool):
+    assert pool.decode("http://fake/ok").error == ""
+    pool.close()
+    assert pool.decode("http://fake/ok").error == "Verification was stopped"
+
+
+def vlc_available():
+    try:
+        import vlc
+
+        return vlc.Instance("--no-video", "--quiet") is not None
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(not vlc_available(), reason="VLC (python-vlc and libvlc) is not installed")
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is needed to make the sample files")
+@pytest.mark.parametrize(
+    "name, encoder, codec",
+    [("tone.mp3", ["-b:a", "128k"], "MP3"), ("tone.aac", ["-c:a", "aac", "-b:a", "96k", "-f", "adts"], "AAC")],
+)
+def test_real_decode_of_sample_files(media, base, http, name, encoder, codec):
+    subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=10", "-ar", "44100"]
+        + encoder + [str(media / name)],
+        check=True,
+    )
+    decoders = DecoderPool(max_workers=1, seconds=2.0)
+    try:
+        result = verify_stream(http, decoders, base + "/pls/file/" + name)
+    finally:
+        decoders.close()
+    assert result.is_working, result.detail
+    assert result.codec == codec
+    assert result.sample_rate == 44100
+    assert result.decoded_seconds >= 2.0
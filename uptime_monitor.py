@@ -0,0 +1,309 @@
+'''Background uptime monitor: rate-limited re-checks and a fixed-size result history per stream.'''
+
+import array
+import bisect
+import heapq
+import os
+import random
+import sqlite3
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from check_cache import normalize_url
+from stream_checker import CheckResult
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".ets2_radio_utility_uptime.sqlite3")
+
+# Results kept per stream; older ones drop out of the stats
+HISTORY_SIZE = 48
+
+DEFAULT_INTERVAL_MINUTES = 60
+DEFAULT_CHECKS_PER_MINUTE = 20
+
+# Each re-check is moved by up to this fraction of the interval so checks don't bunch up
+SCHEDULE_JITTER = 0.2
+
+# Changed histories are written to disk after this many new results (and when the monitor stops)
+SAVE_EVERY = 50
+
+# Latencies are stored as whole milliseconds; this marks a result without one
+NO_LATENCY = 0xFFFF
+
+# uptime is a fraction from 0 to 1; p50/p95 are milliseconds; last_failure is a timestamp or None
+UptimeStats = namedtuple("UptimeStats", "uptime p50 p95 last_failure checks")
+
+_HEADER = struct.Struct("<HHdd")
+
+
+def percentile(sorted_values, percent):
+    '''Return the nearest-rank percentile of an already sorted sequence, or None if it is empty.'''
+    if not sorted_values:
+        return None
+    rank = max(1, -(-percent * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+class StreamHistory:
+    '''The last HISTORY_SIZE check results of one stream, with running totals for its stats.
+
+    Results and latencies are ring buffers of bytes and 16-bit milliseconds.
+    The latencies of the successful results in the window are also kept in
+    sorted order, so adding a result updates every stat in O(HISTORY_SIZE)
+    and reading percentiles is a lookup.
+    '''
+
+    __slots__ = ("ok", "latencies", "sorted_latencies", "position", "count", "successes", "last_failure", "last_checked")
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.ok = bytearray(size)
+        self.latencies = array.array("H", [NO_LATENCY]) * size
+        self.sorted_latencies = array.array("H")
+        self.position = 0
+        self.count = 0
+        self.successes = 0
+        self.last_failure = 0.0
+        self.last_checked = 0.0
+
+    def add(self, is_working, latency, checked_at):
+        '''Add a result, dropping the oldest one once the buffer is full.'''
+        if self.count == len(self.ok):
+            if self.ok[self.position]:
+                self.successes -= 1
+                old = self.latencies[self.position]
+                if old != NO_LATENCY:
+                    del self.sorted_latencies[bisect.bisect_left(self.sorted_latencies, old)]
+        else:
+            self.count += 1
+
+        milliseconds = NO_LATENCY
+        if is_working and latency is not None:
+            milliseconds = min(int(latency * 1000), NO_LATENCY - 1)
+        self.ok[self.position] = 1 if is_working else 0
+        self.latencies[self.position] = milliseconds
+        if is_working:
+            self.successes += 1
+            if milliseconds != NO_LATENCY:
+                bisect.insort(self.sorted_latencies, milliseconds)
+        else:
+            self.last_failure = checked_at
+        self.position = (self.position + 1) % len(self.ok)
+        self.last_checked = checked_at
+
+    def stats(self):
+        return UptimeStats(
+            self.successes / self.count if self.count else None,
+            percentile(self.sorted_latencies, 50),
+            percentile(self.sorted_latencies, 95),
+            self.last_failure or None,
+            self.count,
+        )
+
+    def to_bytes(self):
+        return (
+            _HEADER.pack(self.position, self.count, self.last_failure, self.last_checked)
+            + bytes(self.ok)
+            + self.latencies.tobytes()
+        )
+
+    @classmethod
+    def from_bytes(cls, data, size=HISTORY_SIZE):
+        '''Rebuild a history from ``to_bytes``; returns None if ``data`` was written with another size.'''
+        if len(data) != _HEADER.size + size * 3:
+            return None
+        history = cls(size)
+        history.position, history.count, history.last_failure, history.last_checked = _HEADER.unpack_from(data)
+        history.ok[:] = data[_HEADER.size:_HEADER.size + size]
+        history.latencies = array.array("H")
+        history.latencies.frombytes(data[_HEADER.size + size:])
+        filled = range(size) if history.count == size else range(history.count)
+        history.successes = sum(history.ok[i] for i in filled)
+        history.sorted_latencies = array.array(
+            "H", sorted(history.latencies[i] for i in filled if history.ok[i] and history.latencies[i] != NO_LATENCY)
+        )
+        return history
+
+
+class UptimeStore:
+    '''StreamHistory per normalized URL, persisted in SQLite.
+
+    Safe to share between threads. Like CheckCache it falls back to memory if
+    the database can't be opened.
+    '''
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._histories = {}
+        self._dirty = set()
+        try:
+            self._conn = self._connect(path)
+        except sqlite3.Error:
+            self.path = ":memory:"
+            self._conn = self._connect(self.path)
+
+    @staticmethod
+    def _connect(path):
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("CREATE TABLE IF NOT EXISTS history (url TEXT PRIMARY KEY, data BLOB NOT NULL)")
+        conn.commit()
+        return conn
+
+    def load(self):
+        '''Read every stored history into memory.'''
+        with self._lock:
+            rows = self._conn.execute("SELECT url, data FROM history").fetchall()
+            for url, data in rows:
+                if url not in self._histories:
+                    history = StreamHistory.from_bytes(data)
+                    if history is not None:
+                        self._histories[url] = history
+
+    def record(self, url, result, checked_at=None):
+        '''Add a CheckResult to the history of ``url``; returns the number of unsaved histories.'''
+        key = normalize_url(url)
+        with self._lock:
+            history = self._histories.get(key)
+            if history is None:
+                history = self._histories[key] = StreamHistory()
+            history.add(result.is_working, result.latency, time.time() if checked_at is None else checked_at)
+            self._dirty.add(key)
+            return len(self._dirty)
+
+    def stats(self, url):
+        '''Return UptimeStats for ``url``, or None if it has never been monitored.'''
+        key = normalize_url(url)
+        with self._lock:
+            history = self._histories.get(key)
+            return history.stats() if history is not None else None
+
+    def last_checked(self, url):
+        with self._lock:
+            history = self._histories.get(normalize_url(url))
+            return history.last_checked if history is not None else 0.0
+
+    def flush(self):
+        '''Write changed histories to disk.'''
+        with self._lock:
+            rows = [(key, self._histories[key].to_bytes()) for key in self._dirty]
+            self._dirty = set()
+            if rows:
+                try:
+                    self._conn.executemany("INSERT OR REPLACE INTO history (url, data) VALUES (?, ?)", rows)
+                    self._conn.commit()
+                except sqlite3.Error:
+                    pass
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+class UptimeMonitor:
+    '''Re-checks a set of URLs in the background and records the results in an UptimeStore.
+
+    Each URL is checked about every ``interval`` seconds, give or take
+    SCHEDULE_JITTER, and never more than ``per_minute`` checks start in a
+    minute. URLs that were never checked go first, in random order; the
+    others continue the schedule of earlier sessions. ``on_result(url)`` is
+    called from the monitor thread after each check.
+    '''
+
+    def __init__(self, check_func, store, interval=DEFAULT_INTERVAL_MINUTES * 60,
+                 per_minute=DEFAULT_CHECKS_PER_MINUTE, on_result=None):
+        self.check_func = check_func
+        self.store = store
+        self.interval = max(1.0, float(interval))
+        self.per_minute = max(1.0, float(per_minute))
+        self.on_result = on_result
+        self._urls = set()
+        self._urls_changed = False
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def set_urls(self, urls):
+        '''Replace the URLs to monitor.'''
+        with self._condition:
+            self._urls = set(urls)
+            self._urls_changed = True
+            self._condition.notify()
+
+    def start(self):
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="uptime-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=True, timeout=None):
+        '''Stop after the check in progress (if any) and save the histories.
+
+        With ``wait`` False this returns at once and the thread finishes on its
+        own; ``join`` waits for it later. Returns True once the thread is done.
+        '''
+        if self._thread is None:
+            return True
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        return self.join(timeout) if wait else False
+
+    def join(self, timeout=None):
+        '''Wait up to ``timeout`` seconds for a stopped monitor to finish; returns True if it has.'''
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+        return True
+
+    def _next_due(self, now):
+        return now + self.interval * random.uniform(1 - SCHEDULE_JITTER, 1 + SCHEDULE_JITTER)
+
+    def _run(self):
+        self.store.load()
+        schedule = []
+        scheduled = set()
+        next_allowed = 0.0
+        try:
+            while True:
+                with self._condition:
+                    if self._stopped:
+                        return
+                    now = time.time()
+                    if self._urls_changed:
+                        self._urls_changed = False
+                        urls = self._urls
+                        for url in urls - scheduled:
+                            last = self.store.last_checked(url)
+                            due = self._next_due(last) if last else now + random.random()
+                            heapq.heappush(schedule, (due, url))
+                        # Removed URLs are dropped when they come up
+                        scheduled = set(urls)
+                    if not schedule:
+                        self._condition.wait()
+                        continue
+                    due = max(schedule[0][0], next_allowed)
+                    if due > now:
+                        self._condition.wait(due - now)
+                        continue
+                    _, url = heapq.heappop(schedule)
+                    if url not in scheduled:
+                        continue
+
+                started = time.time()
+                try:
+                    result = self.check_func(url)
+                except Exception as exc:
+                    result = CheckResult(False, None, None, str(exc))
+                if self.store.record(url, result, started) >= SAVE_EVERY:
+                    self.store.flush()
+                next_allowed = started + 60.0 / self.per_minute
+                with self._condition:
+                    heapq.heappush(schedule, (self._next_due(started), url))
+                if self.on_result is not None:
+                    self.on_result(url)
+        finally:
+            self.store.flush()